@@ -0,0 +1,181 @@
+"""
+Summary:
+Streaming reader for Ableton Live sets (.als).
+An .als file is gzip-compressed XML that can inflate to hundreds of MB. The file is
+decompressed as a stream into xml.etree.ElementTree.iterparse, values are taken from
+the attributes of 'start' events, and every element is cleared and detached from its
+parent at its 'end' event, so the DOM is never held in memory.
+
+License: MIT License
+"""
+
+import gzip
+import zlib
+import xml.etree.ElementTree as ET
+
+## =-------------------------------------------------------------------=##
+
+# Bump when the extracted information changes; invalidates this parser's parse-cache entries
+PARSER_VERSION = 1
+
+_TRACK_TAGS = {'AudioTrack', 'MidiTrack', 'ReturnTrack', 'GroupTrack'}
+_MASTER_TAGS = {'MasterTrack', 'MainTrack'}
+_PLUGIN_INFO_TAGS = {'VstPluginInfo', 'Vst3PluginInfo', 'AuPluginInfo'}
+# Live stores the mixer time signature as denominator_index * 99 + (numerator - 1)
+_TIME_SIGNATURE_DENOMINATORS = [1, 2, 4, 8, 16]
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+def decode_time_signature(value):
+    # Decode Live's time signature enum value, e.g. 201 -> "4/4".
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return ""
+    #end
+    denominator_index, numerator = divmod(value, 99)
+    if not 0 <= denominator_index < len(_TIME_SIGNATURE_DENOMINATORS):
+        return ""
+    #end
+    return f"{numerator + 1}/{_TIME_SIGNATURE_DENOMINATORS[denominator_index]}"
+#end
+
+
+def _to_float(value, default=None):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+    #end
+#end
+
+
+def parse_als_stream(stream):
+    # Parse an uncompressed Live set XML stream and return the extracted project information.
+    info = {
+        "version": "",
+        "tempo": None,
+        "time_signature": "",
+        "markers": [],
+        "tracks": [],
+        "device_list": [],
+    }
+    tags = []       # tag names of the open elements
+    elements = []   # the open elements themselves, to detach children once they end
+    owner = None    # track dict (or master pseudo-track) the current devices belong to
+    owner_depth = -1
+    devices = []    # (depth, device dict) of the open device elements
+    locator = None
+
+    for event, elem in ET.iterparse(stream, events=('start', 'end')):
+        if event == 'start':
+            tag = elem.tag
+            parent = tags[-1] if tags else ''
+            depth = len(tags)
+            value = elem.get('Value')
+
+            if depth == 0:
+                info["version"] = elem.get('Creator', '')
+            elif tag in _TRACK_TAGS and parent == 'Tracks':
+                owner = {"name": "", "type": tag, "devices": []}
+                owner_depth = depth
+                info["tracks"].append(owner)
+            elif tag in _MASTER_TAGS and parent == 'LiveSet':
+                owner = {"name": "Master", "type": tag, "devices": []}
+                owner_depth = depth
+            elif parent == 'Devices':
+                device = {"name": tag, "track": owner["name"] if owner else ""}
+                devices.append((depth, device))
+                info["device_list"].append(device)
+                if owner is not None:
+                    owner["devices"].append(device)
+                #end
+            elif tag == 'EffectiveName' and parent == 'Name' and owner is not None \
+                    and depth == owner_depth + 2:
+                owner["name"] = value or ""
+            elif devices and ((tag == 'PlugName' and parent == 'VstPluginInfo')
+                              or (tag == 'Name' and parent in _PLUGIN_INFO_TAGS)):
+                # Plugin devices are all called PluginDevice/AuPluginDevice; use the plugin's name
+                devices[-1][1]["name"] = value or devices[-1][1]["name"]
+            elif tag == 'Manual' and parent in ('Tempo', 'TimeSignature') and len(tags) >= 2 \
+                    and tags[-2] == 'Mixer' and owner is not None and owner["type"] in _MASTER_TAGS:
+                # Every track mixer has Tempo/TimeSignature nodes; only the master's are used
+                if parent == 'Tempo':
+                    info["tempo"] = _to_float(value)
+                else:
+                    info["time_signature"] = decode_time_signature(value)
+                #end
+            elif tag == 'Locator' and parent == 'Locators':
+                locator = {"name": "", "time": 0.0}
+                info["markers"].append(locator)
+            elif locator is not None and parent == 'Locator':
+                if tag == 'Time':
+                    locator["time"] = _to_float(value, 0.0)
+                elif tag == 'Name':
+                    locator["name"] = value or ""
+                #end
+            #end
+
+            tags.append(tag)
+            elements.append(elem)
+        else:
+            tags.pop()
+            elements.pop()
+            depth = len(tags)
+            if devices and devices[-1][0] == depth:
+                devices.pop()
+            #end
+            if depth == owner_depth:
+                owner = None
+                owner_depth = -1
+            #end
+            if elem.tag == 'Locator':
+                locator = None
+            #end
+            # Drop the finished element: its children were already detached,
+            # and it is always the last child of its parent at this point.
+            elem.clear()
+            if elements:
+                del elements[-1][-1]
+            #end
+        #end
+    #end
+    # Plugin names are only known once the plugin info was read, so list track devices by name last
+    for track in info["tracks"]:
+        track["devices"] = [device["name"] for device in track["devices"]]
+    #end
+    return info
+#end
+
+
+def parse_als_file(daw_project_file):
+    # Stream a .als file from disk; older or hand-extracted sets may be plain XML.
+    with open(daw_project_file, 'rb') as raw:
+        magic = raw.read(2)
+        raw.seek(0)
+        if magic == _GZIP_MAGIC:
+            with gzip.GzipFile(fileobj=raw) as stream:
+                return parse_als_stream(stream)
+            #end
+        #end
+        return parse_als_stream(raw)
+    #end
+#end
+
+
+## ==================== DAW parser entry point ================================
+def get_ableton_live_info(daw_project_file):
+    # Get information about an Ableton Live project file.
+    if not daw_project_file.lower().endswith('.als'):
+        return {}
+    #end
+
+    # Stream the gzip-compressed XML through iterparse without building the DOM.
+    # A corrupt deflate stream raises zlib.error, which is not an OSError.
+    try:
+        info = parse_als_file(daw_project_file)
+    except (OSError, EOFError, zlib.error, ET.ParseError) as err:
+        return {"daw_name": "Ableton Live", "notes": f"FILE NOT READABLE: {err}"}
+    #end
+    return {"daw_name": "Ableton Live", **info}
+#end
@@ -0,0 +1,430 @@
+"""
+Summary:
+Header-only probing of audio files: duration, sample rate, bit depth and channel count
+for WAV/RF64/BW64, AIFF/AIFC, FLAC, MP3 and Ogg (Vorbis/Opus) without decoding.
+The format is sniffed from the first bytes, not the extension. Each probe reads one
+PROBE_BYTES block from the start of the file, plus at most a few small seeks and reads:
+RIFF/AIFF chunk headers beyond the first block, the frames behind a large ID3v2 tag, and
+one PROBE_BYTES block from the end of an Ogg stream (its last granule position).
+Lossy formats report bit_depth None; MP3 duration comes from the Xing/Info or VBRI
+header when present and is estimated from the first frame's bitrate otherwise.
+
+License: MIT License
+"""
+
+import os
+import struct
+import threading
+
+## =-------------------------------------------------------------------=##
+
+PROBE_BYTES = 4096
+DEFAULT_MAX_WORKERS = 8
+# Maximum number of RIFF/AIFF chunks stepped over looking for the format and data chunks
+_MAX_CHUNKS = 64
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_IEEE_FLOAT = 3
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+_MP3_BITRATES = {
+    (1, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (1, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (1, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (2, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (2, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (2, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {1: [44100, 48000, 32000], 2: [22050, 24000, 16000], 25: [11025, 12000, 8000]}
+# AIFC compression types of uncompressed sample data: (sample format, byte order)
+_AIFC_ENCODINGS = {
+    b'NONE': ('int', '>'), b'twos': ('int', '>'), b'sowt': ('int', '<'),
+    b'fl32': ('float', '>'), b'FL32': ('float', '>'), b'fl64': ('float', '>'), b'FL64': ('float', '>'),
+}
+
+
+class AudioProbeError(ValueError):
+    pass
+#end
+
+
+def _probe_result(fmt, duration, sample_rate, bit_depth, channels):
+    return {
+        "format": fmt,
+        "duration": round(duration, 3) if duration is not None else None,
+        "sample_rate": sample_rate,
+        "bit_depth": bit_depth,
+        "channels": channels,
+    }
+#end
+
+
+def _read_at(f, head, pos, length):
+    # Bytes [pos, pos + length) of the file, from the first block when they are in it.
+    if pos + length <= len(head):
+        return head[pos:pos + length]
+    #end
+    f.seek(pos)
+    return f.read(length)
+#end
+
+
+## ==================== RIFF (WAV, RF64, BW64) ================================
+def riff_layout(f, head, file_size):
+    # Walk the WAVE chunks; returns (format tag, channels, sample rate, byte rate, block align,
+    # bit depth, data offset, data size). The data chunk is None when it was not found.
+    if head[8:12] != b'WAVE':
+        raise AudioProbeError("RIFF file is not WAVE")
+    #end
+    fmt = None
+    ds64_data_size = None
+    data = (None, None)
+    pos = 12
+    for _ in range(_MAX_CHUNKS):
+        header = _read_at(f, head, pos, 8)
+        if len(header) < 8:
+            break
+        #end
+        chunk_id, length = header[:4], struct.unpack('<I', header[4:])[0]
+        if chunk_id == b'fmt ':
+            body = _read_at(f, head, pos + 8, min(length, 26))
+            if len(body) < 16:
+                raise AudioProbeError("truncated fmt chunk")
+            #end
+            fmt = list(struct.unpack_from('<HHIIHH', body))
+            if fmt[0] == _WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                # the actual format code starts the SubFormat GUID
+                fmt[0] = struct.unpack_from('<H', body, 24)[0]
+            #end
+        elif chunk_id == b'ds64':
+            body = _read_at(f, head, pos + 8, 16)
+            if len(body) == 16:
+                ds64_data_size = struct.unpack('<QQ', body)[1]
+            #end
+        elif chunk_id == b'data':
+            data_size = ds64_data_size if length == 0xFFFFFFFF and ds64_data_size is not None else length
+            # a file cut short holds less audio than its header claims
+            data = (pos + 8, min(data_size, max(0, file_size - pos - 8)))
+            break
+        #end
+        pos += 8 + length + (length & 1)
+    #end
+    if fmt is None:
+        raise AudioProbeError("no fmt chunk")
+    #end
+    return (*fmt, *data)
+#end
+
+
+def probe_riff(f, head, file_size):
+    _, channels, sample_rate, byte_rate, block_align, bit_depth, _, data_size = riff_layout(f, head, file_size)
+    byte_rate = byte_rate or block_align * sample_rate
+    duration = data_size / byte_rate if data_size is not None and byte_rate else None
+    return _probe_result("wav", duration, sample_rate, bit_depth, channels)
+#end
+
+
+## ==================== AIFF / AIFC ================================
+def _extended_to_float(raw):
+    # 80-bit IEEE 754 extended precision (the AIFF sample rate field).
+    exponent = ((raw[0] & 0x7F) << 8) | raw[1]
+    mantissa = int.from_bytes(raw[2:10], 'big')
+    if exponent == 0 and mantissa == 0:
+        return 0.0
+    #end
+    value = mantissa * 2.0 ** (exponent - 16383 - 63)
+    return -value if raw[0] & 0x80 else value
+#end
+
+
+def aiff_layout(f, head, file_size):
+    # Walk the AIFF/AIFC chunks; returns (channels, frames, bit depth, sample rate, compression type,
+    # data offset, data size). The sound data is None when no SSND chunk was found.
+    if head[8:12] not in (b'AIFF', b'AIFC'):
+        raise AudioProbeError("FORM file is not AIFF")
+    #end
+    comm = None
+    data = (None, None)
+    pos = 12
+    for _ in range(_MAX_CHUNKS):
+        header = _read_at(f, head, pos, 8)
+        if len(header) < 8:
+            break
+        #end
+        chunk_id, length = header[:4], struct.unpack('>I', header[4:])[0]
+        if chunk_id == b'COMM':
+            body = _read_at(f, head, pos + 8, min(length, 22))
+            if len(body) < 18:
+                raise AudioProbeError("truncated COMM chunk")
+            #end
+            channels, frames, bit_depth = struct.unpack('>hIh', body[:8])
+            compression = body[18:22] if head[8:12] == b'AIFC' else b'NONE'
+            comm = (channels, frames, bit_depth, _extended_to_float(body[8:18]), compression)
+        elif chunk_id == b'SSND':
+            body = _read_at(f, head, pos + 8, 4)
+            offset = struct.unpack('>I', body)[0] if len(body) == 4 else 0
+            start = pos + 16 + offset
+            data = (start, min(max(0, length - 8 - offset), max(0, file_size - start)))
+        #end
+        if comm is not None and data[0] is not None:
+            break
+        #end
+        pos += 8 + length + (length & 1)
+    #end
+    if comm is None:
+        raise AudioProbeError("no COMM chunk")
+    #end
+    return (*comm, *data)
+#end
+
+
+def probe_aiff(f, head, file_size):
+    channels, frames, bit_depth, sample_rate, _, _, _ = aiff_layout(f, head, file_size)
+    duration = frames / sample_rate if sample_rate > 0 else None
+    return _probe_result("aiff", duration, int(round(sample_rate)), bit_depth, channels)
+#end
+
+
+## ==================== FLAC ================================
+def probe_flac(f, head, start):
+    # STREAMINFO is always the first metadata block, right after the 'fLaC' marker.
+    block = _read_at(f, head, start, 42)
+    if len(block) < 42 or block[4] & 0x7F != 0:
+        raise AudioProbeError("missing FLAC STREAMINFO")
+    #end
+    bits = int.from_bytes(block[18:26], 'big')
+    sample_rate = bits >> 44
+    channels = ((bits >> 41) & 0x7) + 1
+    bit_depth = ((bits >> 36) & 0x1F) + 1
+    total_samples = bits & 0xFFFFFFFFF
+    duration = total_samples / sample_rate if sample_rate and total_samples else None
+    return _probe_result("flac", duration, sample_rate, bit_depth, channels)
+#end
+
+
+## ==================== MP3 ================================
+def _parse_mp3_header(buf, i):
+    # Decode the frame header at buf[i]; None if it is not a valid MPEG audio header.
+    if i + 4 > len(buf) or buf[i] != 0xFF or buf[i + 1] & 0xE0 != 0xE0:
+        return None
+    #end
+    version_bits = (buf[i + 1] >> 3) & 3
+    layer_bits = (buf[i + 1] >> 1) & 3
+    bitrate_index = buf[i + 2] >> 4
+    rate_index = (buf[i + 2] >> 2) & 3
+    if version_bits == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+    #end
+    version = {3: 1, 2: 2, 0: 25}[version_bits]
+    layer = 4 - layer_bits
+    bitrate = _MP3_BITRATES[(min(version, 2), layer)][bitrate_index] * 1000
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    padding = (buf[i + 2] >> 1) & 1
+    channels = 1 if buf[i + 3] >> 6 == 3 else 2
+    if layer == 1:
+        frame_length = (12 * bitrate // sample_rate + padding) * 4
+        samples_per_frame = 384
+    else:
+        samples_per_frame = 1152 if layer == 2 or version == 1 else 576
+        frame_length = samples_per_frame // 8 * bitrate // sample_rate + padding
+    #end
+    return version, bitrate, sample_rate, channels, frame_length, samples_per_frame
+#end
+
+
+def probe_mp3(f, head, start, file_size):
+    buf = head[start:] if start < len(head) else b''
+    if len(buf) < PROBE_BYTES // 2 and start + len(buf) < file_size:
+        f.seek(start)
+        buf = f.read(PROBE_BYTES)
+    #end
+    for i in range(len(buf) - 3):
+        frame = _parse_mp3_header(buf, i)
+        if frame is None:
+            continue
+        #end
+        version, bitrate, sample_rate, channels, frame_length, samples_per_frame = frame
+        # Confirm with the next frame header when it is inside the probed block
+        if i + frame_length + 4 <= len(buf) and _parse_mp3_header(buf, i + frame_length) is None:
+            continue
+        #end
+        frames = None
+        side_info = (32 if channels == 2 else 17) if version == 1 else (17 if channels == 2 else 9)
+        xing = i + 4 + side_info
+        if buf[xing:xing + 4] in (b'Xing', b'Info') and len(buf) >= xing + 12:
+            flags = struct.unpack_from('>I', buf, xing + 4)[0]
+            if flags & 1:
+                frames = struct.unpack_from('>I', buf, xing + 8)[0]
+            #end
+        elif buf[i + 36:i + 40] == b'VBRI' and len(buf) >= i + 54:
+            frames = struct.unpack_from('>I', buf, i + 50)[0]
+        #end
+        if frames:
+            duration = frames * samples_per_frame / sample_rate
+        else:
+            duration = (file_size - start - i) * 8 / bitrate
+        #end
+        return _probe_result("mp3", duration, sample_rate, None, channels)
+    #end
+    raise AudioProbeError("no MPEG audio frame found")
+#end
+
+
+## ==================== Ogg (Vorbis, Opus) ================================
+def probe_ogg(f, head, file_size):
+    if len(head) < 27:
+        raise AudioProbeError("truncated Ogg page")
+    #end
+    serial = head[14:18]
+    packet = head[27 + head[26]:]
+    if packet[:7] == b'\x01vorbis' and len(packet) >= 16:
+        fmt = "vorbis"
+        channels = packet[11]
+        sample_rate = granule_rate = struct.unpack_from('<I', packet, 12)[0]
+        pre_skip = 0
+    elif packet[:8] == b'OpusHead' and len(packet) >= 16:
+        fmt = "opus"
+        channels = packet[9]
+        pre_skip = struct.unpack_from('<H', packet, 10)[0]
+        # Opus always runs at 48 kHz; the header keeps the rate of the original input
+        sample_rate = struct.unpack_from('<I', packet, 12)[0] or 48000
+        granule_rate = 48000
+    else:
+        raise AudioProbeError("unsupported Ogg codec")
+    #end
+
+    # The last page of the stream holds the total number of samples in its granule position
+    tail_start = max(0, file_size - PROBE_BYTES)
+    tail = _read_at(f, head, tail_start, file_size - tail_start)
+    duration = None
+    pos = tail.rfind(b'OggS')
+    while pos >= 0:
+        if pos + 18 <= len(tail) and tail[pos + 14:pos + 18] == serial:
+            granule = struct.unpack_from('<q', tail, pos + 6)[0]
+            if granule >= 0 and granule_rate:
+                duration = max(0, granule - pre_skip) / granule_rate
+            #end
+            break
+        #end
+        pos = tail.rfind(b'OggS', 0, pos)
+    #end
+    return _probe_result(fmt, duration, sample_rate, None, channels)
+#end
+
+
+## ==================== Entry points ================================
+def _id3v2_size(head):
+    # Total size of a leading ID3v2 tag (0 if there is none).
+    if head[:3] != b'ID3' or len(head) < 10:
+        return 0
+    #end
+    size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+    return 10 + size + (10 if head[5] & 0x10 else 0)
+#end
+
+
+def probe_audio_stream(f, file_size):
+    # Probe an open binary file object of file_size bytes.
+    head = f.read(PROBE_BYTES)
+    magic = head[:4]
+    if magic in (b'RIFF', b'RF64', b'BW64'):
+        return probe_riff(f, head, file_size)
+    #end
+    if magic == b'FORM':
+        return probe_aiff(f, head, file_size)
+    #end
+    if magic == b'OggS':
+        return probe_ogg(f, head, file_size)
+    #end
+    start = _id3v2_size(head)
+    if _read_at(f, head, start, 4) == b'fLaC':
+        return probe_flac(f, head, start)
+    #end
+    return probe_mp3(f, head, start, file_size)
+#end
+
+
+def probe_audio_file(filename):
+    # Header information of one audio file; failures are reported in the "notes" field.
+    try:
+        with open(filename, 'rb') as f:
+            return probe_audio_stream(f, os.fstat(f.fileno()).st_size)
+        #end
+    except (OSError, ValueError, struct.error) as err:
+        return {"notes": f"PROBE FAILED: {err}"}
+    #end
+#end
+
+
+def read_pcm_layout(filename):
+    # Where and how the uncompressed samples of a WAV/AIFF file are stored:
+    # format, channels, sample_rate, bit_depth, sample_format ('int', 'uint' or 'float'),
+    # byte_order ('<' or '>'), data_offset and data_size in bytes.
+    # Raises AudioProbeError for other formats and compressed encodings.
+    with open(filename, 'rb') as f:
+        file_size = os.fstat(f.fileno()).st_size
+        head = f.read(PROBE_BYTES)
+        if head[:4] in (b'RIFF', b'RF64', b'BW64'):
+            fmt_tag, channels, sample_rate, _, _, bit_depth, data_offset, data_size = riff_layout(f, head, file_size)
+            if fmt_tag == _WAVE_FORMAT_PCM:
+                # 8-bit WAV samples are unsigned
+                sample_format = 'uint' if bit_depth == 8 else 'int'
+            elif fmt_tag == _WAVE_FORMAT_IEEE_FLOAT:
+                sample_format = 'float'
+            else:
+                raise AudioProbeError(f"compressed WAV (format 0x{fmt_tag:04x})")
+            #end
+            fmt, byte_order = "wav", '<'
+        elif head[:4] == b'FORM':
+            channels, _, bit_depth, sample_rate, compression, data_offset, data_size = aiff_layout(f, head, file_size)
+            sample_format, byte_order = _AIFC_ENCODINGS.get(compression, (None, None))
+            if sample_format is None:
+                raise AudioProbeError(f"compressed AIFC ({compression.decode('latin-1')!r})")
+            #end
+            if compression in (b'fl32', b'FL32', b'fl64', b'FL64'):
+                bit_depth = 32 if compression.lower() == b'fl32' else 64
+            #end
+            fmt, sample_rate = "aiff", int(round(sample_rate))
+        else:
+            raise AudioProbeError("not a WAV or AIFF file")
+        #end
+    #end
+    if data_offset is None:
+        raise AudioProbeError("no sample data")
+    #end
+    valid_depths = (32, 64) if sample_format == 'float' else (8, 16, 24, 32)
+    if channels < 1 or bit_depth not in valid_depths:
+        raise AudioProbeError(f"unsupported sample layout ({channels} channels, {bit_depth} bit {sample_format})")
+    #end
+    return {
+        "format": fmt,
+        "channels": channels,
+        "sample_rate": sample_rate,
+        "bit_depth": bit_depth,
+        "sample_format": sample_format,
+        "byte_order": byte_order,
+        "data_offset": data_offset,
+        "data_size": data_size,
+    }
+#end
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def probe_audio_files(filenames, max_workers=DEFAULT_MAX_WORKERS):
+    # Probe several files through a bounded thread pool shared by the whole process.
+    # Results are returned in the order of filenames.
+    global _executor
+    filenames = list(filenames)
+    if len(filenames) <= 1:
+        return [probe_audio_file(filename) for filename in filenames]
+    #end
+    with _executor_lock:
+        if _executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='audio_probe')
+        #end
+    #end
+    return list(_executor.map(probe_audio_file, filenames))
+#end
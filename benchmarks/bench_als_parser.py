@@ -0,0 +1,117 @@
+"""
+Summary:
+Benchmark for the streaming Ableton Live set reader (als_parser.py).
+Writes a synthetic gzip-compressed .als with many tracks, devices and automation-like
+parameter nodes, then runs the streaming parser and, for comparison, a full DOM parse
+(ElementTree.parse) each in a fresh subprocess and reports wall time and peak RSS.
+
+Usage:
+python benchmarks/bench_als_parser.py --tracks 400
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PACKAGE_DIR)
+
+
+def write_synthetic_als(filename, n_tracks, params_per_device=400):
+    # Write a synthetic Live 11 set; returns the uncompressed XML size in bytes.
+    written = 0
+    with gzip.open(filename, 'wt', encoding='utf-8', compresslevel=6) as f:
+        def w(text):
+            nonlocal written
+            written += len(text)
+            f.write(text)
+        #end
+        w('<?xml version="1.0" encoding="UTF-8"?>\n')
+        w('<Ableton MajorVersion="5" MinorVersion="11.0_433" Creator="Ableton Live 11.3.4">\n<LiveSet>\n<Tracks>\n')
+        for t in range(n_tracks):
+            kind = 'MidiTrack' if t % 2 else 'AudioTrack'
+            w(f'<{kind} Id="{t}"><Name><EffectiveName Value="Track {t}" /><UserName Value="" /></Name>\n')
+            w('<DeviceChain><Mixer><Tempo><Manual Value="99" /></Tempo></Mixer><DeviceChain><Devices>\n')
+            for d in range(3):
+                if d == 2:
+                    w(f'<PluginDevice Id="{d}"><PluginDesc><VstPluginInfo Id="0">'
+                      f'<PlugName Value="Synth {t}" /></VstPluginInfo></PluginDesc>\n')
+                    tag = 'PluginDevice'
+                else:
+                    w(f'<Eq8 Id="{d}">\n')
+                    tag = 'Eq8'
+                #end
+                for p in range(params_per_device):
+                    w(f'<Param{p % 16}><LomId Value="0" /><Manual Value="{p * 0.5}" />'
+                      f'<AutomationTarget Id="{t * 10000 + d * 1000 + p}"><LockEnvelope Value="0" />'
+                      f'</AutomationTarget></Param{p % 16}>\n')
+                #end
+                w(f'</{tag}>\n')
+            #end
+            w(f'</Devices></DeviceChain></DeviceChain></{kind}>\n')
+        #end
+        w('</Tracks>\n<MasterTrack><Name><EffectiveName Value="Master" /></Name><DeviceChain><Mixer>'
+          '<Tempo><LomId Value="0" /><Manual Value="124" /></Tempo>'
+          '<TimeSignature><LomId Value="0" /><Manual Value="200" /></TimeSignature>'
+          '</Mixer><DeviceChain><Devices><Limiter Id="0" /></Devices></DeviceChain></DeviceChain></MasterTrack>\n')
+        w('<Locators><Locators>')
+        for i in range(32):
+            w(f'<Locator Id="{i}"><Time Value="{i * 16}" /><Name Value="Part {i}" /></Locator>')
+        #end
+        w('</Locators></Locators>\n</LiveSet>\n</Ableton>\n')
+    #end
+    return written
+#end
+
+
+def run_child(mode, filename):
+    # Parse in this process and print timing and peak RSS as JSON (used via subprocess).
+    import resource
+    start = time.perf_counter()
+    if mode == 'stream':
+        from als_parser import parse_als_file
+        info = parse_als_file(filename)
+        summary = {"tracks": len(info["tracks"]), "devices": len(info["device_list"]),
+                   "tempo": info["tempo"], "time_signature": info["time_signature"]}
+    else:
+        import xml.etree.ElementTree as ET
+        with gzip.open(filename) as f:
+            root = ET.parse(f).getroot()
+        #end
+        summary = {"tracks": len(root.find('LiveSet/Tracks'))}
+    #end
+    elapsed = time.perf_counter() - start
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"elapsed": elapsed, "max_rss_mb": max_rss_kb / 1024, **summary}))
+#end
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the streaming ALS reader.')
+    parser.add_argument('--tracks', type=int, default=400, help='number of tracks in the synthetic set')
+    parser.add_argument('--child', nargs=2, metavar=('MODE', 'FILE'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(*args.child)
+        sys.exit(0)
+    #end
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'synthetic.als')
+        xml_size = write_synthetic_als(filename, args.tracks)
+        print(f'file: {os.path.getsize(filename) / 1e6:.1f} MB gzip, {xml_size / 1e6:.1f} MB XML, {args.tracks} tracks')
+        for mode in ['stream', 'dom']:
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, filename],
+                                 capture_output=True, text=True, check=True).stdout
+            result = json.loads(out)
+            print(f'{mode:>6}: {result["elapsed"] * 1000:.0f} ms, peak RSS {result["max_rss_mb"]:.0f} MB, '
+                  f'{xml_size / 1e6 / result["elapsed"]:.0f} MB/s XML  {result}')
+        #end
+    #end
+#end
@@ -0,0 +1,107 @@
+"""
+Summary:
+Benchmark for the concurrent project walker (async_walk.py) on a stand-in for a network
+file system: a local project tree where every os.scandir call first sleeps for --latency
+milliseconds (the sleep releases the GIL like a blocking network call does). For each
+latency, the directory tree and file list of the project (get_directory_tree_asDictionary
+and get_filepath_list) are built from a sequentially filled DirectorySnapshot and from one
+filled by prefetch_snapshot; both must be identical.
+
+Usage:
+python benchmarks/bench_async_walk.py --dirs 8 --levels 3 --latency 0,2,10 --concurrency 16
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from directory_snapshot import DirectorySnapshot
+from repository_handling import get_directory_tree_asDictionary, get_filepath_list
+from async_walk import prefetch_snapshot
+
+_scandir = os.scandir
+
+
+def make_project(root, n_dirs, levels, n_files):
+    # A project with n_dirs subdirectories per directory, levels deep, and n_files files in each.
+    os.makedirs(root)
+    open(os.path.join(root, 'Song.rpp'), 'w').close()
+    level = [root]
+    n_directories = 1
+    for _ in range(levels):
+        next_level = []
+        for path in level:
+            for f in range(n_files):
+                open(os.path.join(path, f'take{f}.wav'), 'w').close()
+            #end
+            for d in range(n_dirs):
+                os.mkdir(os.path.join(path, f'dir{d}'))
+                next_level.append(os.path.join(path, f'dir{d}'))
+            #end
+        #end
+        n_directories += len(next_level)
+        level = next_level
+    #end
+    return n_directories
+#end
+
+
+def set_latency(seconds):
+    # Make every os.scandir call wait for seconds first (0 restores the real one).
+    if not seconds:
+        os.scandir = _scandir
+        return
+    #end
+
+    def slow_scandir(path='.'):
+        time.sleep(seconds)
+        return _scandir(path)
+    #end
+
+    os.scandir = slow_scandir
+#end
+
+
+def tree_and_list(project, concurrency=None):
+    snapshot = DirectorySnapshot(project)
+    if concurrency:
+        prefetch_snapshot(snapshot, concurrency)
+    #end
+    return get_directory_tree_asDictionary(project, snapshot), get_filepath_list(project, snapshot=snapshot)
+#end
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return time.perf_counter() - start, result
+#end
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the sequential and the concurrent project walk.')
+    parser.add_argument('--dirs', type=int, default=8, help='subdirectories per directory')
+    parser.add_argument('--levels', type=int, default=3, help='directory levels')
+    parser.add_argument('--files', type=int, default=4, help='files per directory')
+    parser.add_argument('--latency', default='0,2,10', help='comma-separated scandir latencies in ms')
+    parser.add_argument('--concurrency', type=int, default=16, help='concurrent directory calls')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project = os.path.join(tmpdir, 'Song')
+        n_directories = make_project(project, args.dirs, args.levels, args.files)
+        print(f'{n_directories} directories, concurrency {args.concurrency}')
+        for latency_ms in [float(latency) for latency in args.latency.split(',')]:
+            set_latency(latency_ms / 1000)
+            sync_seconds, sync_result = timed(tree_and_list, project)
+            async_seconds, async_result = timed(tree_and_list, project, args.concurrency)
+            set_latency(0)
+            assert sync_result == async_result, 'the concurrent walk changed the tree or the file list'
+            print(f'latency {latency_ms:5.1f} ms: sequential {sync_seconds * 1000:8.1f} ms, '
+                  f'concurrent {async_seconds * 1000:8.1f} ms ({sync_seconds / async_seconds:.1f}x)')
+        #end
+    #end
+#end
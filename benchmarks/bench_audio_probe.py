@@ -0,0 +1,225 @@
+"""
+Summary:
+Benchmark and self-check for the header-only audio probe (audio_probe.py).
+Writes N synthetic audio files cycling through WAV, RF64, AIFF, FLAC, MP3 (Xing and CBR)
+and Ogg Vorbis/Opus, each a valid header followed by a sparse body so the files have a
+realistic size without filling the disk. Every probe result is checked against the
+values the file was written with. It then times an os.stat of every file, the probe of
+every file through the bounded thread pool, and a full read of a sample of the files,
+and reports the bytes read per probe (from /proc/self/io where available).
+
+Usage:
+python benchmarks/bench_audio_probe.py --files 10000 --size-mb 40
+"""
+
+import os
+import sys
+import time
+import struct
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from audio_probe import probe_audio_files, probe_audio_file, PROBE_BYTES
+
+
+def _riff_chunk(chunk_id, body):
+    return chunk_id + struct.pack('<I', len(body)) + body + b'\x00' * (len(body) & 1)
+#end
+
+
+def make_wav(size, rf64=False, rate=48000, bits=24, channels=2):
+    fmt = struct.pack('<HHIIHH', 1, channels, rate, rate * channels * bits // 8, channels * bits // 8, bits)
+    data_size = size - 200
+    header = b''
+    if rf64:
+        header += _riff_chunk(b'ds64', struct.pack('<QQQI', size - 8, data_size, 0, 0))
+    #end
+    header += _riff_chunk(b'LIST', b'INFOISFT\x06\x00\x00\x00bench\x00')
+    header += _riff_chunk(b'fmt ', fmt)
+    header += b'data' + struct.pack('<I', 0xFFFFFFFF if rf64 else data_size)
+    magic = b'RF64' + struct.pack('<I', 0xFFFFFFFF) if rf64 else b'RIFF' + struct.pack('<I', size - 8)
+    expected = {"format": "wav", "sample_rate": rate, "bit_depth": bits, "channels": channels,
+                "duration": data_size / (rate * channels * bits // 8)}
+    return magic + b'WAVE' + header, expected
+#end
+
+
+def _extended(value):
+    # 80-bit extended float of a positive integer (AIFF sample rate).
+    exponent = value.bit_length() - 1
+    mantissa = value << (63 - exponent)
+    return struct.pack('>HQ', exponent + 16383, mantissa)
+#end
+
+
+def make_aiff(size, rate=44100, bits=16, channels=2):
+    frames = (size - 200) // (channels * bits // 8)
+    comm = struct.pack('>hIh', channels, frames, bits) + _extended(rate)
+    body = b'AIFF' + b'COMM' + struct.pack('>I', len(comm)) + comm + b'SSND' + struct.pack('>III', size - 200, 0, 0)
+    expected = {"format": "aiff", "sample_rate": rate, "bit_depth": bits, "channels": channels,
+                "duration": frames / rate}
+    return b'FORM' + struct.pack('>I', size - 8) + body, expected
+#end
+
+
+def make_flac(size, rate=96000, bits=24, channels=2, seconds=123):
+    total = rate * seconds
+    packed = (rate << 44) | ((channels - 1) << 41) | ((bits - 1) << 36) | total
+    streaminfo = struct.pack('>HH', 4096, 4096) + b'\x00' * 6 + packed.to_bytes(8, 'big') + b'\x00' * 16
+    expected = {"format": "flac", "sample_rate": rate, "bit_depth": bits, "channels": channels,
+                "duration": float(seconds)}
+    return b'ID3\x03\x00\x00\x00\x00\x00\x20' + b'\x00' * 32 + b'fLaC' + b'\x80\x00\x00\x22' + streaminfo, expected
+#end
+
+
+def make_mp3(size, xing=True):
+    # MPEG-1 Layer III, 128 kbps, 44.1 kHz, joint stereo
+    header = b'\xff\xfb\x90\x44'
+    frame_length = 144 * 128000 // 44100
+    frames = 5000
+    first = header + b'\x00' * 32
+    if xing:
+        first += b'Xing' + struct.pack('>II', 1, frames)
+        duration = frames * 1152 / 44100
+    else:
+        duration = size * 8 / 128000
+    #end
+    first = first.ljust(frame_length, b'\x00')
+    expected = {"format": "mp3", "sample_rate": 44100, "bit_depth": None, "channels": 2, "duration": duration}
+    return first + header.ljust(frame_length, b'\x00') * 2, expected
+#end
+
+
+def _ogg_page(serial, granule, packet, flags=0):
+    segments = bytes([255] * (len(packet) // 255) + [len(packet) % 255])
+    return b'OggS' + struct.pack('<BBqIII', 0, flags, granule, serial, 0, 0) + bytes([len(segments)]) + segments + packet
+#end
+
+
+def make_ogg(size, opus=False):
+    serial = 0x1234
+    if opus:
+        packet = b'OpusHead' + struct.pack('<BBHIhB', 1, 2, 312, 44100, 0, 0)
+        granule = 48000 * 200 + 312
+        expected = {"format": "opus", "sample_rate": 44100, "bit_depth": None, "channels": 2, "duration": 200.0}
+    else:
+        packet = b'\x01vorbis' + struct.pack('<IBIiiiBB', 0, 2, 44100, 0, 128000, 0, 0xB8, 1)
+        granule = 44100 * 180
+        expected = {"format": "vorbis", "sample_rate": 44100, "bit_depth": None, "channels": 2, "duration": 180.0}
+    #end
+    head = _ogg_page(serial, 0, packet, flags=2)
+    tail = _ogg_page(serial, granule, b'\x00' * 100, flags=4)
+    return head, tail, expected
+#end
+
+
+GENERATORS = [
+    ('wav', lambda size: make_wav(size)),
+    ('wav', lambda size: make_wav(size, rf64=True)),
+    ('aif', lambda size: make_aiff(size)),
+    ('flac', lambda size: make_flac(size)),
+    ('mp3', lambda size: make_mp3(size)),
+    ('mp3', lambda size: make_mp3(size, xing=False)),
+    ('ogg', lambda size: make_ogg(size)),
+    ('opus', lambda size: make_ogg(size, opus=True)),
+]
+
+
+def write_files(directory, count, size):
+    # Write count sparse files of size bytes; return [(filename, expected probe result)].
+    files = []
+    for i in range(count):
+        ext, generator = GENERATORS[i % len(GENERATORS)]
+        parts = generator(size)
+        filename = os.path.join(directory, f'{i:06d}.{ext}')
+        with open(filename, 'wb') as f:
+            f.write(parts[0])
+            if len(parts) == 3:
+                f.seek(size - len(parts[1]))
+                f.write(parts[1])
+            else:
+                f.truncate(size)
+            #end
+        #end
+        files.append((filename, parts[-1]))
+    #end
+    return files
+#end
+
+
+def check(files):
+    # Compare every probe result with the values its file was written with.
+    for (filename, expected), result in zip(files, probe_audio_files([f for f, _ in files])):
+        for key, value in expected.items():
+            got = result.get(key)
+            if key == "duration" and got is not None and abs(got - value) < 0.01:
+                continue
+            #end
+            if got != value:
+                raise AssertionError(f'{filename}: {key} is {got!r}, expected {value!r} ({result})')
+            #end
+        #end
+    #end
+#end
+
+
+def _rchar():
+    try:
+        with open('/proc/self/io') as f:
+            return int(next(line for line in f if line.startswith('rchar:')).split()[1])
+        #end
+    except (OSError, StopIteration):
+        return None
+    #end
+#end
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+#end
+
+
+def read_all(filenames):
+    for filename in filenames:
+        with open(filename, 'rb') as f:
+            while f.read(1024 * 1024):
+                pass
+            #end
+        #end
+    #end
+#end
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark header-only audio probing.')
+    parser.add_argument('--files', type=int, default=10000, help='number of audio files')
+    parser.add_argument('--size-mb', type=int, default=40, help='logical (sparse) size of each file')
+    parser.add_argument('--read-sample', type=int, default=100, help='files fully read for the comparison')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        files = write_files(tmpdir, args.files, args.size_mb * 1024 * 1024)
+        filenames = [f for f, _ in files]
+        check(files)
+        print(f'check: {len(files)} probes match the written headers '
+              f'({len(GENERATORS)} variants: WAV, RF64, AIFF, FLAC+ID3, MP3 Xing/CBR, Vorbis, Opus)')
+
+        stat_time = timed(lambda: [os.stat(f) for f in filenames])
+        rchar = _rchar()
+        probe_time = timed(probe_audio_files, filenames)
+        per_probe = (_rchar() - rchar) / len(filenames) if rchar is not None else None
+        serial_time = timed(lambda: [probe_audio_file(f) for f in filenames])
+        sample = filenames[:args.read_sample]
+        read_time = timed(read_all, sample) * len(filenames) / len(sample)
+
+        print(f'stat  {len(filenames)} files: {stat_time * 1000:8.0f} ms')
+        print(f'probe {len(filenames)} files: {probe_time * 1000:8.0f} ms (thread pool), '
+              f'{serial_time * 1000:.0f} ms serial'
+              + (f', {per_probe:.0f} bytes read per file (limit {PROBE_BYTES} + tail/seek reads)' if per_probe else ''))
+        print(f'read  {len(filenames)} files: {read_time * 1000:8.0f} ms (extrapolated from {len(sample)} full reads '
+              f'of {args.size_mb} MB)')
+    #end
+#end
@@ -0,0 +1,87 @@
+"""
+Summary:
+Size and load-time comparison of the classic project file listing ('directory_tree' and
+'filepath_list') and the compact inventory (compact_inventory.py) on a synthetic large
+project: nested track/take/freeze folders of tens of thousands of files, plus a symbolic
+link to a directory and a broken link, where the two classic views differ. Both listings
+are serialised as make_json_dtb_file writes them (indent=4); the compact one must derive
+exactly the classic views.
+
+Usage:
+python benchmarks/bench_compact_inventory.py --tracks 100 --takes 20 --files 20
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from repository_handling import get_directory_tree_asDictionary, get_filepath_list
+from directory_snapshot import DirectorySnapshot
+from compact_inventory import build_inventory, inventory_to_tree, inventory_to_filepath_list
+
+
+def make_project(root, n_tracks, n_takes, n_files):
+    project = os.path.join(root, 'Big Session')
+    os.makedirs(project)
+    open(os.path.join(project, 'Big Session.rpp'), 'w').close()
+    for t in range(n_tracks):
+        for k in range(n_takes):
+            take = os.path.join(project, 'Audio Files', f'Track {t:03d}', f'Take {k:02d}')
+            os.makedirs(take)
+            for i in range(n_files):
+                open(os.path.join(take, f'Track {t:03d}_Take {k:02d}_{i:03d}.wav'), 'w').close()
+            #end
+        #end
+    #end
+    os.symlink(os.path.join(project, 'Audio Files', 'Track 000'), os.path.join(project, 'Linked Track'))
+    os.symlink(os.path.join(project, 'missing.wav'), os.path.join(project, 'broken.wav'))
+    return project
+#end
+
+
+def best_of(function, repeat=3):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = function()
+        times.append(time.perf_counter() - start)
+    #end
+    return value, min(times)
+#end
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the classic and compact project file listings.')
+    parser.add_argument('--tracks', type=int, default=100, help='track folders')
+    parser.add_argument('--takes', type=int, default=20, help='take folders per track')
+    parser.add_argument('--files', type=int, default=20, help='files per take folder')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project = make_project(tmpdir, args.tracks, args.takes, args.files)
+        snapshot = DirectorySnapshot(project)
+        classic, classic_build = best_of(lambda: {
+            "directory_tree": get_directory_tree_asDictionary(project, snapshot),
+            "filepath_list": get_filepath_list(project, snapshot=snapshot)})
+        compact, compact_build = best_of(lambda: {"inventory": build_inventory(project, snapshot)})
+        print(f'project: {len(classic["filepath_list"])} files, {args.tracks * (args.takes + 1) + 1} directories')
+
+        classic_text = json.dumps(classic, indent=4)
+        compact_text = json.dumps(compact, indent=4)
+        loaded, classic_load = best_of(lambda: json.loads(classic_text))
+        compact_loaded, compact_load = best_of(lambda: json.loads(compact_text))
+        views, derive = best_of(lambda: (inventory_to_tree(compact_loaded["inventory"]),
+                                         inventory_to_filepath_list(compact_loaded["inventory"])))
+        assert views == (classic["directory_tree"], classic["filepath_list"]), 'derived views differ'
+
+        print(f'classic: {len(classic_text) / 1e6:6.2f} MB, build {classic_build * 1000:6.1f} ms, '
+              f'json load {classic_load * 1000:6.1f} ms')
+        print(f'compact: {len(compact_text) / 1e6:6.2f} MB, build {compact_build * 1000:6.1f} ms, '
+              f'json load {compact_load * 1000:6.1f} ms, both views derived in {derive * 1000:6.1f} ms '
+              '(includes size/mtime columns)')
+    #end
+#end
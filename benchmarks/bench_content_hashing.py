@@ -0,0 +1,95 @@
+"""
+Summary:
+Benchmark for media content hashing (content_hashing.py).
+Builds a synthetic archive of projects that share a pool of sample files (copied into
+each project, as happens when projects are duplicated), then hashes all media files
+cold with 1 and with N threads, and once more warm through the digest cache, where no
+file content should be read. Finishes with the duplicate report totals.
+
+Usage:
+python benchmarks/bench_content_hashing.py --projects 50 --samples 20 --sample-mb 8 --threads 4
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import content_hashing
+from content_hashing import hash_files, DigestCache, build_duplicate_report, HASH_ALGORITHM
+
+
+def make_archive(root, n_projects, n_samples, sample_mb, seed=0):
+    # Every project gets a random subset of the shared samples plus one unique bounce.
+    rng = random.Random(seed)
+    pool = os.path.join(root, 'pool')
+    os.makedirs(pool)
+    for i in range(n_samples):
+        with open(os.path.join(pool, f'sample{i}.wav'), 'wb') as f:
+            f.write(rng.randbytes(sample_mb * 1024 * 1024))
+        #end
+    #end
+    projects = {}
+    for p in range(n_projects):
+        project = os.path.join(root, f'project{p}')
+        os.makedirs(os.path.join(project, 'Samples'))
+        for i in rng.sample(range(n_samples), max(1, n_samples // 4)):
+            shutil.copyfile(os.path.join(pool, f'sample{i}.wav'), os.path.join(project, 'Samples', f'sample{i}.wav'))
+        #end
+        with open(os.path.join(project, 'bounce.wav'), 'wb') as f:
+            f.write(rng.randbytes(sample_mb * 1024 * 1024))
+        #end
+        projects[project] = [os.path.join(dirpath, name) for dirpath, _, names in os.walk(project) for name in names]
+    #end
+    return projects
+#end
+
+
+def hash_archive(projects, cache, threads):
+    content_hashing._executor = None
+    start = time.perf_counter()
+    totals = {"hashed": 0, "cached": 0, "bytes": 0}
+    project_digests = {}
+    for project, files in projects.items():
+        stats_list = [(filename, os.stat(filename)) for filename in files]
+        digests, stats = hash_files(stats_list, cache, max_workers=threads)
+        for key in totals:
+            totals[key] += stats[key]
+        #end
+        project_digests[project] = {os.path.relpath(filename, project): {"digest": digest, "size": st.st_size}
+                                    for (filename, st), digest in zip(stats_list, digests)}
+    #end
+    return time.perf_counter() - start, totals, project_digests
+#end
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark media content hashing.')
+    parser.add_argument('--projects', type=int, default=50, help='number of projects')
+    parser.add_argument('--samples', type=int, default=20, help='shared samples in the pool')
+    parser.add_argument('--sample-mb', type=int, default=8, help='size of every sample file')
+    parser.add_argument('--threads', type=int, default=4, help='hashing threads for the parallel run')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        projects = make_archive(os.path.join(tmpdir, 'archive'), args.projects, args.samples, args.sample_mb)
+        print(f'archive: {args.projects} projects, {sum(map(len, projects.values()))} media files, '
+              f'algorithm {HASH_ALGORITHM}')
+        for threads in (1, args.threads):
+            cache = DigestCache(os.path.join(tmpdir, f'digests{threads}.sqlite'))
+            elapsed, totals, _ = hash_archive(projects, cache, threads)
+            print(f'cold, {threads} thread(s): {totals["hashed"]} files, {totals["bytes"] / 1e6:.0f} MB hashed in '
+                  f'{elapsed * 1000:.0f} ms ({totals["bytes"] / 1e6 / elapsed:.0f} MB/s)')
+        #end
+        elapsed, totals, project_digests = hash_archive(projects, cache, args.threads)
+        assert totals["hashed"] == 0 and totals["bytes"] == 0, totals
+        print(f'warm (digest cache): {totals["cached"]} files, 0 bytes read, {elapsed * 1000:.0f} ms')
+        report = build_duplicate_report(project_digests)
+        print(f'report: {report["unique_files"]} unique of {report["media_files"]} files, '
+              f'{report["reclaimable_bytes"] / 1e6:.0f} MB of {report["total_bytes"] / 1e6:.0f} MB reclaimable')
+    #end
+#end
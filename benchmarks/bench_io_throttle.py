@@ -0,0 +1,96 @@
+"""
+Summary:
+Simulation of the adaptive concurrency cap of the I/O throttle (io_throttle.py); its exact
+behaviour is checked by tests/test_io_throttle.py.
+
+The simulation stands in for a NAS whose latency grows once more than --knee operations are
+in flight: --threads workers issue "stat" calls with and without the adaptive cap, and the
+average latency and final cap are reported.
+
+Usage:
+python benchmarks/bench_io_throttle.py --threads 32 --knee 4 --target-ms 4
+"""
+
+import os
+import sys
+import time
+import argparse
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from io_throttle import IOThrottle
+
+## =-------------------------------------------------------------------=##
+
+class SimulatedStorage:
+    # Latency base_latency while at most knee operations are in flight, growing linearly beyond.
+
+    def __init__(self, base_latency, knee):
+        self.base_latency = base_latency
+        self.knee = knee
+        self.in_flight = 0
+        self.latencies = []
+        self.lock = threading.Lock()
+    #end
+
+    def stat(self):
+        with self.lock:
+            self.in_flight += 1
+            latency = self.base_latency * max(1.0, self.in_flight / self.knee)
+        #end
+        time.sleep(latency)
+        with self.lock:
+            self.in_flight -= 1
+            self.latencies.append(latency)
+        #end
+    #end
+#end
+
+
+def simulate(n_threads, ops_per_thread, storage, throttle):
+    # Wall time of the run and the mean latency the storage delivered (to everyone using it).
+    storage.latencies = []
+
+    def worker():
+        for _ in range(ops_per_thread):
+            if throttle is None:
+                storage.stat()
+            else:
+                with throttle:
+                    storage.stat()
+                #end
+            #end
+        #end
+    #end
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    #end
+    for thread in threads:
+        thread.join()
+    #end
+    return time.perf_counter() - start, sum(storage.latencies) / len(storage.latencies)
+#end
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate the adaptive I/O concurrency cap.')
+    parser.add_argument('--threads', type=int, default=32, help='worker threads of the simulation')
+    parser.add_argument('--ops', type=int, default=40, help='operations per thread')
+    parser.add_argument('--base-ms', type=float, default=1.0, help='latency of the storage when not overloaded')
+    parser.add_argument('--knee', type=int, default=4, help='operations in flight before the latency grows')
+    parser.add_argument('--target-ms', type=float, default=4.0, help='target latency of the adaptive cap')
+    args = parser.parse_args()
+
+    storage = SimulatedStorage(args.base_ms / 1000, args.knee)
+    throttle = IOThrottle(target_latency=args.target_ms / 1000, max_concurrency=args.threads)
+    throttle.limiter.interval = 0.05
+    for label, candidate in (("unthrottled ", None), ("adaptive cap", throttle)):
+        seconds, latency = simulate(args.threads, args.ops, storage, candidate)
+        cap = f', final cap {throttle.limiter.limit}' if candidate is not None else ''
+        print(f'{label}: {seconds * 1000:7.0f} ms for {args.threads * args.ops} stats, '
+              f'mean storage latency {latency * 1000:.1f} ms{cap}')
+    #end
+#end
@@ -0,0 +1,94 @@
+"""
+Summary:
+Peak memory and time of writing a project's directory listing as JSON, building the
+'directory_tree' and 'filepath_list' in memory and calling json.dump (the previous writer)
+versus streaming them with json_writer.write_json_file. Peak Python memory is measured with
+tracemalloc on a synthetic project of tens of thousands of files, for the whole write: the
+directory snapshot both writers list the project into is counted as well, so the figure is
+what a project costs update_or_create_json_file, not just the writer. Both outputs must be
+byte-identical.
+
+Usage:
+python benchmarks/bench_json_writer.py --dirs 2000 --files 25
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from repository_handling import get_directory_tree_asDictionary, get_filepath_list, iter_directory_tree, \
+                                iter_filepath_list
+from directory_snapshot import DirectorySnapshot
+from json_writer import StreamedDict, StreamedList, write_json_file
+
+
+def make_project(root, n_dirs, n_files):
+    project = os.path.join(root, 'Big Session')
+    for d in range(n_dirs):
+        directory = os.path.join(project, 'Audio Files', f'Track {d // 20:03d}', f'Take {d % 20:02d}')
+        os.makedirs(directory)
+        for i in range(n_files):
+            open(os.path.join(directory, f'Track {d // 20:03d}_Take {d % 20:02d}_{i:03d}.wav'), 'w').close()
+        #end
+    #end
+    return project
+#end
+
+
+def dump_in_memory(project, filename):
+    snapshot = DirectorySnapshot(project)
+    data = {"directory_tree": get_directory_tree_asDictionary(project, snapshot),
+            "filepath_list": get_filepath_list(project, snapshot=snapshot)}
+    with open(filename, 'w') as f:
+        json.dump(data, f, indent=4)
+        f.write("\n")
+    #end
+#end
+
+
+def dump_streamed(project, filename):
+    snapshot = DirectorySnapshot(project)
+    write_json_file(filename, {"directory_tree": StreamedDict(iter_directory_tree(project, snapshot)),
+                               "filepath_list": StreamedList(iter_filepath_list(project, snapshot=snapshot))})
+#end
+
+
+def measure(writer, project, filename):
+    # Each run lists the project into a fresh snapshot, as update_or_create_json_file does
+    start = time.perf_counter()
+    writer(project, filename)
+    elapsed = time.perf_counter() - start
+    # Tracing slows the writers down, so the peak is taken in a second, untimed run
+    tracemalloc.start()
+    writer(project, filename)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+#end
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the in-memory and the streaming JSON writer.')
+    parser.add_argument('--dirs', type=int, default=2000, help='directories in the synthetic project')
+    parser.add_argument('--files', type=int, default=25, help='files per directory')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        project = make_project(tmpdir, args.dirs, args.files)
+        before = os.path.join(tmpdir, 'before.json')
+        after = os.path.join(tmpdir, 'after.json')
+        for label, writer, filename in (('json.dump', dump_in_memory, before), ('streamed ', dump_streamed, after)):
+            elapsed, peak = measure(writer, project, filename)
+            print(f'{label}: peak {peak / 1e6:6.1f} MB, {elapsed * 1000:6.0f} ms')
+        #end
+        with open(before, 'rb') as f1, open(after, 'rb') as f2:
+            assert f1.read() == f2.read(), 'the writers produced different files'
+        #end
+        print(f'identical output: {os.path.getsize(after) / 1e6:.1f} MB, {args.dirs * args.files} files')
+    #end
+#end
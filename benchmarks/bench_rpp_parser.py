@@ -0,0 +1,93 @@
+"""
+Summary:
+Benchmark for the streaming Reaper RPP reader (rpp_parser.py).
+Writes a synthetic Reaper project of the requested size, with tracks, FX chains full of
+base64 plugin state, media items, markers and regions, then times parse_rpp_file on it.
+
+Usage:
+python benchmarks/bench_rpp_parser.py --size-mb 50 --repeat 3
+"""
+
+import os
+import sys
+import time
+import base64
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from rpp_parser import parse_rpp_file
+
+
+def write_synthetic_rpp(filename, size_mb, seed=0):
+    # Write a synthetic RPP of roughly size_mb megabytes and return the number of tracks written.
+    rng = random.Random(seed)
+    target = size_mb * 1024 * 1024
+    state_line = base64.b64encode(rng.randbytes(96)).decode('ascii')
+    n_tracks = 0
+    with open(filename, 'w', newline='\n') as f:
+        f.write('<REAPER_PROJECT 0.1 "6.80/linux-x86_64" 1681234567\n')
+        f.write('  TEMPO 128 7 8\n')
+        for i in range(0, 40, 2):
+            f.write(f'  MARKER {i} {i * 8.0} "Marker {i}" 0 0 1 B {{GUID}} 0\n')
+            f.write(f'  MARKER {i + 1} {i * 8.0 + 2} "Region {i}" 1\n')
+            f.write(f'  MARKER {i + 1} {i * 8.0 + 6} "" 1\n')
+        #end
+        while f.tell() < target:
+            n_tracks += 1
+            f.write(f'  <TRACK {{{n_tracks:08X}-0000-0000-0000-000000000000}}\n')
+            f.write(f'    NAME "Track {n_tracks}"\n    VOLPAN 1 0 -1 -1 1\n    <FXCHAIN\n      SHOW 0\n')
+            for fx in range(4):
+                f.write(f'      <VST "VST: Plugin {fx} (Vendor)" plugin{fx}.dll 0 "" 1919247729<56535472>\n')
+                for _ in range(rng.randint(50, 200)):
+                    f.write(f'        {state_line}\n')
+                #end
+                f.write('      >\n      FXID {00000000-0000-0000-0000-000000000000}\n')
+            #end
+            f.write('    >\n')
+            for item in range(8):
+                f.write(f'    <ITEM\n      POSITION {item * 4.0}\n      LENGTH 4\n      NAME "clip {item}"\n')
+                f.write(f'      <SOURCE WAVE\n        FILE "Audio/track{n_tracks}_{item}.wav"\n      >\n    >\n')
+            #end
+            f.write('  >\n')
+        #end
+        f.write('>\n')
+    #end
+    return n_tracks
+#end
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the streaming RPP reader.')
+    parser.add_argument('--size-mb', type=int, default=50, help='size of the synthetic project')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed parses')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'synthetic.rpp')
+        n_tracks = write_synthetic_rpp(filename, args.size_mb)
+        size = os.path.getsize(filename)
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            info = parse_rpp_file(filename)
+            timings.append(time.perf_counter() - start)
+        #end
+        assert len(info["tracks"]) == n_tracks, (len(info["tracks"]), n_tracks)
+
+        tracemalloc.start()
+        parse_rpp_file(filename)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        best = min(timings)
+        print(f'file: {size / 1e6:.1f} MB, {n_tracks} tracks, {len(info["fx_list"])} fx, '
+              f'{len(info["media_files"])} media files, {len(info["markers"])} markers, '
+              f'{len(info["regions"])} regions')
+        print(f'parse: best {best * 1000:.0f} ms of {args.repeat} ({size / 1e6 / best:.0f} MB/s), '
+              f'traced peak {peak / 1e6:.1f} MB')
+    #end
+#end
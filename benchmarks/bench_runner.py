@@ -0,0 +1,82 @@
+"""
+Summary:
+Wall-clock comparison of the previous multi-root driver, one `python make_json_dtb_file.py
+--autolist root` subprocess per root (each paying interpreter startup, daw_info.csv loading
+and cold caches), and one process running ProjectScanner over all roots. Builds synthetic
+roots of small REAPER projects; both drivers must write the same database files.
+
+Usage:
+python benchmarks/bench_runner.py --roots 20 --projects 10
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+
+REPO_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(REPO_DIRECTORY, "make_json_dtb_file.py")
+
+
+def make_roots(root, n_roots, n_projects):
+    roots = []
+    for r in range(n_roots):
+        for p in range(n_projects):
+            project = os.path.join(root, f'root{r}', f'Song{r}_{p}')
+            os.makedirs(os.path.join(project, 'stems'))
+            with open(os.path.join(project, f'Song{r}_{p}.rpp'), 'w') as f:
+                f.write('<REAPER_PROJECT 0.1 "6.0"\n  TEMPO 120 4 4\n>\n')
+            #end
+            open(os.path.join(project, 'stems', 'kick.wav'), 'w').close()
+        #end
+        roots.append(os.path.join(root, f'root{r}'))
+    #end
+    return roots
+#end
+
+
+def subprocess_driver(roots, outdir):
+    # The previous run_make_json_file.py: one interpreter per root
+    for root in roots:
+        subprocess.call([sys.executable, SCRIPT, "--outdir", outdir, "--autolist", root], stdout=subprocess.DEVNULL)
+    #end
+#end
+
+
+def in_process_driver(roots, outdir):
+    # One interpreter for all roots (started here too, so startup is counted once)
+    code = "import sys; from make_json_dtb_file import ProjectScanner; " \
+           "ProjectScanner(sys.argv[1], log=None).run(roots=sys.argv[2:])"
+    subprocess.call([sys.executable, "-c", code, outdir] + roots, cwd=REPO_DIRECTORY)
+#end
+
+
+def database_files(outdir):
+    return sorted(f.split('.')[1] for f in os.listdir(outdir) if f.startswith('DAW-REPO.'))
+#end
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare the per-root subprocess driver with ProjectScanner.')
+    parser.add_argument('--roots', type=int, default=20, help='number of roots')
+    parser.add_argument('--projects', type=int, default=10, help='projects per root')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        roots = make_roots(os.path.join(tmpdir, 'archive'), args.roots, args.projects)
+        outputs = {}
+        for label, driver in (("subprocess per root", subprocess_driver), ("ProjectScanner     ", in_process_driver)):
+            outdir = os.path.join(tmpdir, label.strip().replace(' ', '_'))
+            os.makedirs(outdir)
+            start = time.perf_counter()
+            driver(roots, outdir)
+            elapsed = time.perf_counter() - start
+            outputs[label] = database_files(outdir)
+            print(f'{label}: {elapsed * 1000:7.0f} ms for {args.roots} roots, {len(outputs[label])} projects')
+        #end
+        first, second = outputs.values()
+        assert first == second and len(first) == args.roots * args.projects, 'the drivers wrote different projects'
+    #end
+#end
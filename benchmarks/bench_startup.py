@@ -0,0 +1,63 @@
+"""
+Summary:
+Startup-time measurement for the CLI modules.
+Each variant is timed in fresh interpreters: the plain import of make_json_dtb_file,
+the same import with thousands of extra lazily registered DAW parsers, and an eager
+variant that imports every built-in parser module up front. The lazy variants should
+cost the same however many DAWs are registered, and should load no parser module.
+
+Usage:
+python benchmarks/bench_startup.py --runs 15
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+import subprocess
+
+PACKAGE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PARSER_MODULES = ['rpp_parser', 'als_parser', 'flp_parser', 'steinberg_parser', 'logic_parser', 'pro_tools_parser']
+
+VARIANTS = {
+    "lazy (built-in DAWs)": "import make_json_dtb_file",
+    "lazy (+1000 DAWs)": "import daw_file_processor as d\n"
+                         "for i in range(1000): d.register_daw_parser(f'DAW {i}', f'third_party_{i}:get_info')\n"
+                         "import make_json_dtb_file",
+    "lazy (+10000 DAWs)": "import daw_file_processor as d\n"
+                          "for i in range(10000): d.register_daw_parser(f'DAW {i}', f'third_party_{i}:get_info')\n"
+                          "import make_json_dtb_file",
+    "eager (all parsers)": "import make_json_dtb_file\n"
+                           "import rpp_parser, als_parser, flp_parser, steinberg_parser, logic_parser",
+}
+REPORT = "\nimport sys\nprint(','.join(m for m in %r if m in sys.modules))" % PARSER_MODULES
+
+
+def time_variant(code, runs):
+    # Median wall time of a fresh interpreter running code, and the parser modules it loaded.
+    timings = []
+    loaded = ""
+    for _ in range(runs):
+        start = time.perf_counter()
+        loaded = subprocess.run([sys.executable, '-c', code + REPORT], cwd=PACKAGE_DIR,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        timings.append(time.perf_counter() - start)
+    #end
+    return statistics.median(timings), loaded
+#end
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Measure CLI startup time.')
+    parser.add_argument('--runs', type=int, default=15, help='interpreter launches per variant')
+    args = parser.parse_args()
+
+    bare, _ = time_variant("pass", args.runs)
+    print(f'{"bare interpreter":<22} {bare * 1000:7.1f} ms')
+    for name, code in VARIANTS.items():
+        median, loaded = time_variant(code, args.runs)
+        print(f'{name:<22} {median * 1000:7.1f} ms  (+{(median - bare) * 1000:5.1f} ms)  '
+              f'parser modules loaded: {loaded or "none"}')
+    #end
+#end
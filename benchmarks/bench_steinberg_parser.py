@@ -0,0 +1,134 @@
+"""
+Summary:
+Benchmark and robustness check for the Cubase/Nuendo chunk scanner (steinberg_parser.py).
+Writes a synthetic RIFF/NUND project with a large binary pool chunk (skipped by seeking)
+and an archive chunk with tempo, signature, marker and plugin objects between binary
+filler, then reports scan throughput. With --fuzz N the same file is truncated at N
+random offsets and has random bytes flipped; every variant must parse to a (possibly
+partial) result or a SteinbergFormatError, never any other exception.
+
+Usage:
+python benchmarks/bench_steinberg_parser.py --pool-mb 200 --archive-mb 20 --fuzz 2000
+"""
+
+import os
+import sys
+import time
+import struct
+import random
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from steinberg_parser import parse_steinberg_buffer, parse_steinberg_file, SteinbergFormatError
+
+
+def _string(text, utf16=False):
+    raw = (text + '\x00').encode('utf-16-be' if utf16 else 'latin-1')
+    return struct.pack('>I', len(raw)) + raw
+#end
+
+
+def _chunk(chunk_id, body):
+    return chunk_id + struct.pack('>I', len(body)) + body
+#end
+
+
+def make_archive(archive_mb, n_markers=64, n_plugins=200, seed=0):
+    # Build the body of a synthetic ARCH chunk.
+    rng = random.Random(seed)
+    target = archive_mb * 1024 * 1024
+    parts = [b'PAppVersion\x00', b'\x00\x02', _string('Cubase'), _string('12.0.70')]
+    parts += [b'MTempoEvent\x00', b'\x00\x00\x00\x01', struct.pack('>d', 132.5)]
+    parts += [b'MTimeSignatureEvent\x00', b'\xff\xff', struct.pack('>II', 6, 8)]
+    objects = []
+    for i in range(n_markers):
+        objects.append(b'MMarkerEvent\x00\x00\x01' + _string(f'Marker {i}', utf16=True) + struct.pack('>d', i * 1920.0))
+    #end
+    for i in range(n_plugins):
+        objects.append(b'Plugin Name\x00\x00\x05' + _string(f'Plugin {i % 50}', utf16=True))
+    #end
+    filler_size = max(0, target - sum(map(len, parts + objects))) // max(1, len(objects))
+    filler = rng.randbytes(filler_size).replace(b'\x00', b'\x01')
+    for obj in objects:
+        parts += [filler, obj]
+    #end
+    return b''.join(parts)
+#end
+
+
+def write_synthetic_project(filename, pool_mb, archive_mb):
+    pool = _chunk(b'POOL', b'\x00' * (pool_mb * 1024 * 1024))
+    root = _chunk(b'ROOT', _string('GDocument'))
+    arch = _chunk(b'ARCH', make_archive(archive_mb))
+    body = b'NUND' + root + pool + arch
+    with open(filename, 'wb') as f:
+        f.write(b'RIFF' + struct.pack('>I', len(body)) + body)
+    #end
+#end
+
+
+def fuzz(data, iterations, seed=1):
+    # Truncate and corrupt data in many ways; return the number of variants parsed.
+    rng = random.Random(seed)
+    parsed = 0
+    for i in range(iterations):
+        # the first variants cut inside the RIFF and chunk headers, the rest anywhere
+        length = i if i < 64 else rng.randrange(len(data) + 1)
+        variant = bytearray(data[:length])
+        for _ in range(rng.randrange(4) if i % 2 else 0):
+            if variant:
+                variant[rng.randrange(len(variant))] = rng.randrange(256)
+            #end
+        #end
+        try:
+            parse_steinberg_buffer(bytes(variant))
+            parsed += 1
+        except SteinbergFormatError:
+            pass
+        #end
+    #end
+    return parsed
+#end
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the Cubase/Nuendo chunk scanner.')
+    parser.add_argument('--pool-mb', type=int, default=200, help='size of the skipped binary chunk')
+    parser.add_argument('--archive-mb', type=int, default=20, help='size of the scanned archive chunk')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timed scans')
+    parser.add_argument('--fuzz', type=int, default=0, metavar='N', help='number of truncated/corrupted variants to parse')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        filename = os.path.join(tmpdir, 'synthetic.cpr')
+        write_synthetic_project(filename, args.pool_mb, args.archive_mb)
+        size = os.path.getsize(filename)
+
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            info = parse_steinberg_file(filename)
+            timings.append(time.perf_counter() - start)
+        #end
+        best = min(timings)
+        print(f'file: {size / 1e6:.0f} MB ({args.archive_mb} MB archive), version {info["version"]!r}, '
+              f'tempo {info["tempo"]}, signature {info["time_signature"]}, '
+              f'{len(info["markers"])} markers, {len(info["plugin_list"])} plugins')
+        print(f'scan: best {best * 1000:.0f} ms of {args.repeat} ({size / 1e6 / best:.0f} MB/s of file, '
+              f'{args.archive_mb * 1.048576 / best:.0f} MB/s of archive)')
+
+        if args.fuzz:
+            small = os.path.join(tmpdir, 'small.cpr')
+            write_synthetic_project(small, 0, 1)
+            with open(small, 'rb') as f:
+                data = f.read()
+            #end
+            start = time.perf_counter()
+            parsed = fuzz(data, args.fuzz)
+            print(f'fuzz: {args.fuzz} truncated/corrupted variants, {parsed} parsed, '
+                  f'{args.fuzz - parsed} rejected as not RIFF/NUND, no other exceptions '
+                  f'({time.perf_counter() - start:.1f} s)')
+        #end
+    #end
+#end
@@ -0,0 +1,286 @@
+"""
+Summary:
+Reproducible benchmark suite. For every scale (number of projects) it builds a synthetic
+archive with synthetic_archive.py and times:
+- discovery: iter_project_directories over the archive, and locate_project_directories
+  over every candidate directory at the project level;
+- extraction: update_or_create_json_file for every project (total and per-project
+  median, p95 and maximum), and for the huge outlier projects separately;
+- parsing: get_daw_project_info's parser of every DAW, over that DAW's project files;
+- consolidation: the --onefile writer, as a JSON array and as NDJSON.
+Every measurement is the best of --repeat runs (extraction into a fresh output directory
+each time). The results are written as JSON together with the configuration and the
+platform; with --compare, the timings are checked against a previous results file and the
+script exits with status 1 when one of them is more than --threshold slower.
+
+Usage:
+python benchmarks/bench_suite.py --scales 10,100,1000 --output bench_results.json
+python benchmarks/bench_suite.py --scales 10,100,1000 --output new.json --compare bench_results.json
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from synthetic_archive import build_archive
+from daw_file_processor import get_daw_parser, get_supported_daws
+from consolidation import ConsolidatedWriter, to_ndjson_line
+from make_json_dtb_file import update_or_create_json_file, iter_project_directories, locate_project_directories, \
+                               is_ignored_directory
+
+RESULTS_FORMAT = "bench-suite-1"
+# Timings below this many seconds are too noisy to be reported as regressions
+MIN_COMPARED_SECONDS = 0.005
+
+
+def best_of(function, repeat):
+    # Smallest wall time of repeat calls, and the result of the last call.
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    #end
+    return best, result
+#end
+
+
+def candidate_directories(root, depth):
+    # Every directory at the project level below root, as locate_project_directories gets them
+    # (hidden and ignored directories are not descended into, those at the last level are kept).
+    level = [root]
+    for _ in range(depth):
+        level = [os.path.join(path, name) for path in level if path == root or not is_ignored_directory(path)
+                 for name in sorted(os.listdir(path)) if os.path.isdir(os.path.join(path, name))]
+    #end
+    return level
+#end
+
+
+def extract(projects, outdir):
+    # update_or_create_json_file over projects into an empty outdir; per-project seconds and the JSON files.
+    # Only the first run places the JSON copies in the project directories; later runs find them unchanged.
+    if os.path.isdir(outdir):
+        shutil.rmtree(outdir)
+    #end
+    os.makedirs(outdir)
+    seconds = []
+    json_files = []
+    for prjPath in projects:
+        start = time.perf_counter()
+        json_files.append(update_or_create_json_file(prjPath, outdir))
+        seconds.append(time.perf_counter() - start)
+    #end
+    return seconds, json_files
+#end
+
+
+def time_extraction(projects, outdir, repeat):
+    # Best total of repeat runs, with the per-project distribution of that run.
+    best = None
+    for _ in range(repeat):
+        seconds, json_files = extract(projects, outdir)
+        if best is None or sum(seconds) < sum(best):
+            best = seconds
+        #end
+    #end
+    ordered = sorted(best)
+    return {
+        "seconds": sum(best),
+        "median": statistics.median(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }, json_files
+#end
+
+
+def time_parsers(project_files, repeat):
+    # Seconds per DAW parser over all project files of that DAW (None when the parser cannot be loaded).
+    results = {}
+    for daw_name in get_supported_daws():
+        files = project_files.get(daw_name, [])
+        if not files:
+            continue
+        #end
+        try:
+            parser = get_daw_parser(daw_name)
+        except ImportError as err:
+            results[daw_name] = {"files": len(files), "seconds": None, "notes": str(err)}
+            continue
+        #end
+        seconds, _ = best_of(lambda: [parser(f) for f in files], repeat)
+        results[daw_name] = {"files": len(files), "seconds": seconds}
+    #end
+    return results
+#end
+
+
+def time_consolidation(json_files, outdir, repeat):
+    texts = []
+    for json_filename in json_files:
+        with open(json_filename, 'r') as f:
+            texts.append(f.read())
+        #end
+    #end
+    ndjson_lines = [to_ndjson_line(text) for text in texts]
+    results = {}
+    for onefile_format, items in (("json", texts), ("ndjson", ndjson_lines)):
+        writer_filename = os.path.join(outdir, f'onefile.{onefile_format}')
+
+        def consolidate():
+            writer = ConsolidatedWriter(writer_filename, onefile_format)
+            for item in items:
+                writer.add(item)
+            #end
+            writer.close()
+        #end
+
+        seconds, _ = best_of(consolidate, repeat)
+        results[onefile_format] = {"seconds": seconds, "bytes": os.path.getsize(writer_filename)}
+    #end
+    return results
+#end
+
+
+def run_scale(tmpdir, n_projects, args):
+    root = os.path.join(tmpdir, f'archive{n_projects}')
+    outdir = os.path.join(tmpdir, f'out{n_projects}')
+    os.makedirs(root)
+    archive = build_archive(root, n_projects, args.depth, args.files, media_bytes=int(args.media_kb * 1024),
+                            huge_projects=args.huge, huge_files=args.huge_files, seed=args.seed)
+    projects = archive["projects"]
+    all_projects = projects + archive["huge_projects"]
+
+    walk_seconds, found = best_of(lambda: list(iter_project_directories(root, args.depth)), args.repeat)
+    assert sorted(found) == sorted(all_projects), 'discovery did not find exactly the generated projects'
+    candidates = candidate_directories(root, args.depth)
+    locate_seconds, located = best_of(lambda: locate_project_directories(candidates), args.repeat)
+    assert sorted(located) == sorted(all_projects), 'locate_project_directories did not keep exactly the projects'
+
+    extraction, json_files = time_extraction(projects, outdir, args.repeat)
+    result = {
+        "archive": {key: archive[key] for key in ("directories", "files", "bytes")},
+        "discovery": {"iter_project_directories": walk_seconds, "locate_project_directories": locate_seconds},
+        "extraction": extraction,
+    }
+    if archive["huge_projects"]:
+        result["extraction_huge"], huge_json_files = time_extraction(archive["huge_projects"],
+                                                                     outdir + '_huge', args.repeat)
+        json_files += huge_json_files
+    #end
+    result["parsers"] = time_parsers(archive["project_files"], args.repeat)
+    result["consolidation"] = time_consolidation(json_files, tmpdir, args.repeat)
+    shutil.rmtree(root)
+    return result
+#end
+
+
+def flatten_timings(results):
+    # {"scale/section/name": seconds} of every timing in a results file.
+    timings = {}
+    for scale, sections in results["scales"].items():
+        for section, values in sections.items():
+            if section == "archive":
+                continue
+            #end
+            for name, value in values.items():
+                if isinstance(value, dict):
+                    value = value.get("seconds")
+                #end
+                if isinstance(value, float):
+                    timings[f'{scale}/{section}/{name}'] = value
+                #end
+            #end
+        #end
+    #end
+    return timings
+#end
+
+
+def compare(results, baseline, threshold):
+    # Print the timings that changed by more than threshold; returns the regressions.
+    current = flatten_timings(results)
+    previous = flatten_timings(baseline)
+    regressions = []
+    for key in sorted(current.keys() & previous.keys()):
+        old, new = previous[key], current[key]
+        if max(old, new) < MIN_COMPARED_SECONDS:
+            continue
+        #end
+        ratio = new / old if old else float('inf')
+        if ratio > 1 + threshold:
+            regressions.append(key)
+            print(f'REGRESSION  {key}: {old * 1000:.1f} ms -> {new * 1000:.1f} ms ({ratio:.2f}x)')
+        elif ratio < 1 / (1 + threshold):
+            print(f'improvement {key}: {old * 1000:.1f} ms -> {new * 1000:.1f} ms ({ratio:.2f}x)')
+        #end
+    #end
+    if results["config"] != baseline.get("config"):
+        print('note: the baseline was recorded with a different configuration')
+    #end
+    return regressions
+#end
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Time discovery, extraction, parsing and consolidation '
+                                                 'on synthetic archives.')
+    parser.add_argument('--scales', default='10,100,1000', help='comma-separated numbers of projects')
+    parser.add_argument('--depth', type=int, default=2, help='directory level of the projects')
+    parser.add_argument('--files', type=int, default=20, help='media files per project')
+    parser.add_argument('--media-kb', type=float, default=4, help='size of every media file in KB')
+    parser.add_argument('--huge', type=int, default=1, help='huge outlier projects per scale')
+    parser.add_argument('--huge-files', type=int, default=5000, help='files per huge project')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement (the best is kept)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', default='bench_results.json', help='results file to write')
+    parser.add_argument('--compare', metavar='file', help='previous results file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.2, help='relative slowdown reported as a regression')
+    args = parser.parse_args()
+
+    config = {key: getattr(args, key) for key in ("scales", "depth", "files", "media_kb", "huge", "huge_files",
+                                                  "repeat", "seed")}
+    results = {
+        "format": RESULTS_FORMAT,
+        "date": time.strftime('%Y-%m-%d %H:%M:%S'),
+        "platform": {"python": platform.python_version(), "system": platform.platform(),
+                     "machine": platform.machine(), "cpus": os.cpu_count()},
+        "config": config,
+        "scales": {},
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n_projects in [int(scale) for scale in args.scales.split(',')]:
+            result = run_scale(tmpdir, n_projects, args)
+            results["scales"][str(n_projects)] = result
+            extraction = result["extraction"]
+            print(f'{n_projects:6d} projects: discovery {result["discovery"]["iter_project_directories"] * 1000:8.1f} ms, '
+                  f'extraction {extraction["seconds"] * 1000:8.1f} ms (median {extraction["median"] * 1000:.2f} ms, '
+                  f'p95 {extraction["p95"] * 1000:.2f} ms), '
+                  f'consolidation {result["consolidation"]["json"]["seconds"] * 1000:6.1f} ms')
+        #end
+    #end
+
+    with open(args.output + ".tmp", 'w') as f:
+        json.dump(results, f, indent=4)
+        f.write("\n")
+    #end
+    os.replace(args.output + ".tmp", args.output)
+    print(f'Results: {args.output}')
+
+    if args.compare:
+        with open(args.compare, 'r') as f:
+            baseline = json.load(f)
+        #end
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+        #end
+    #end
+#end
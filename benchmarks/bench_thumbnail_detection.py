@@ -0,0 +1,107 @@
+"""
+Summary:
+File-open count and timing of project thumbnail detection, before and after the
+extension/name prefilter (thumbnails.py). Builds synthetic project roots holding a
+project file, large sparse WAV and video files, score/text files and one image, then
+counts the files opened per project (through a sys.addaudithook 'open' hook) by the
+previous imghdr-based detector and by get_project_thumbnail. Both must pick the same
+thumbnail. The 'before' variant needs the imghdr module (removed in Python 3.13).
+
+Usage:
+python benchmarks/bench_thumbnail_detection.py --projects 200 --media-files 30
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from repository_handling import get_project_thumbnail
+from directory_snapshot import DirectorySnapshot
+
+with warnings.catch_warnings():
+    warnings.simplefilter('ignore', DeprecationWarning)
+    try:
+        import imghdr
+    except ImportError:
+        imghdr = None
+    #end
+#end
+
+_opens = [0]
+
+
+def _audit(event, args):
+    if event == 'open':
+        _opens[0] += 1
+    #end
+#end
+
+
+def imghdr_thumbnail(prjPath):
+    # The detector before the prefilter: imghdr.what on every file of the project root.
+    image_files = [f for f in os.listdir(prjPath) if os.path.isfile(os.path.join(prjPath, f))
+                   and imghdr.what(os.path.join(prjPath, f)) is not None]
+    thumbnail_files = [f for f in image_files if "thumbnail" in f.lower()]
+    if thumbnail_files:
+        return thumbnail_files[0]
+    elif image_files:
+        return image_files[0]
+    #end
+    return ""
+#end
+
+
+def make_projects(root, n_projects, n_media, media_gb):
+    projects = []
+    for p in range(n_projects):
+        project = os.path.join(root, f'Song{p}')
+        os.makedirs(project)
+        open(os.path.join(project, f'Song{p}.rpp'), 'w').close()
+        for i in range(n_media):
+            ext = ('.wav', '.mov', '.aif', '.txt', '.pdf')[i % 5]
+            with open(os.path.join(project, f'track{i}{ext}'), 'wb') as f:
+                f.truncate(int(media_gb * 1024 ** 3) if ext in ('.wav', '.mov', '.aif') else 100)
+            #end
+        #end
+        with open(os.path.join(project, 'artwork.png' if p % 2 else 'Song_thumbnail.jpg'), 'wb') as f:
+            f.write(b'\x89PNG\r\n\x1a\n' + bytes(64) if p % 2 else b'\xff\xd8\xff\xe0\x00\x10JFIF\x00' + bytes(64))
+        #end
+        projects.append(project)
+    #end
+    return projects
+#end
+
+
+def measure(detector, projects):
+    _opens[0] = 0
+    start = time.perf_counter()
+    found = [detector(project) for project in projects]
+    return found, _opens[0] / len(projects), time.perf_counter() - start
+#end
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Count file opens of project thumbnail detection.')
+    parser.add_argument('--projects', type=int, default=200, help='number of project directories')
+    parser.add_argument('--media-files', type=int, default=30, help='non-image files per project root')
+    parser.add_argument('--media-gb', type=float, default=2, help='logical (sparse) size of the audio/video files')
+    args = parser.parse_args()
+
+    sys.addaudithook(_audit)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        projects = make_projects(tmpdir, args.projects, args.media_files, args.media_gb)
+        after, after_opens, after_time = measure(lambda p: get_project_thumbnail(p, DirectorySnapshot(p)), projects)
+        if imghdr is not None:
+            before, before_opens, before_time = measure(imghdr_thumbnail, projects)
+            assert before == after, 'the detectors picked different thumbnails'
+            print(f'before (imghdr on every file): {before_opens:5.1f} opens/project, {before_time * 1000:7.1f} ms')
+        else:
+            print('before (imghdr on every file): imghdr is not available in this Python version')
+        #end
+        print(f'after  (prefilter + sniff):    {after_opens:5.1f} opens/project, {after_time * 1000:7.1f} ms')
+    #end
+#end
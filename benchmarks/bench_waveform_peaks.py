@@ -0,0 +1,175 @@
+"""
+Summary:
+Benchmark and self-check for the waveform peaks stage (waveform_peaks.py). Requires NumPy.
+Writes synthetic mixdowns in every supported sample layout (WAV 8/16/24/32-bit integer
+and 32-bit float, AIFF 16/24-bit big-endian, AIFC 'sowt'), checks the computed peaks of
+each one against a straightforward full decode, then times the peaks of a large file
+and reports the throughput in MB/s of sample data. A second update of the same file
+must be skipped as unchanged.
+
+Usage:
+python benchmarks/bench_waveform_peaks.py --size-mb 500
+"""
+
+import os
+import sys
+import time
+import struct
+import argparse
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from waveform_peaks import compute_peaks, update_peaks_file, read_peaks_header
+
+RATE = 48000
+
+
+def make_samples(frames, channels, seed=0):
+    # Float test signal in [-1, 1): a sweep plus noise, different per channel.
+    rng = np.random.default_rng(seed)
+    t = np.arange(frames)[:, None] / RATE
+    signal = 0.6 * np.sin(2 * np.pi * (50 + 400 * t) * t * (1 + np.arange(channels)))
+    return np.clip(signal + rng.uniform(-0.3, 0.3, (frames, channels)), -1.0, 0.99997)
+#end
+
+
+def encode(samples, bits, sample_format, byte_order):
+    # Raw sample bytes of samples in the given layout.
+    if sample_format == 'float':
+        return samples.astype(f'{byte_order}f4').tobytes()
+    #end
+    ints = np.round(samples * (2 ** (bits - 1) - 1)).astype(np.int64)
+    if bits == 8 and sample_format == 'uint':
+        return (ints + 128).astype(np.uint8).tobytes()
+    #end
+    raw = ints.astype(f'{byte_order}i4').view(np.uint8).reshape(-1, 4)
+    keep = slice(0, bits // 8) if byte_order == '<' else slice(4 - bits // 8, 4)
+    return raw[:, keep].tobytes()
+#end
+
+
+def write_wav(filename, data, channels, bits, float_format=False):
+    fmt = struct.pack('<HHIIHH', 3 if float_format else 1, channels, RATE, RATE * channels * bits // 8,
+                      channels * bits // 8, bits)
+    with open(filename, 'wb') as f:
+        f.write(b'RIFF' + struct.pack('<I', 4 + 8 + len(fmt) + 8 + len(data)) + b'WAVE')
+        f.write(b'fmt ' + struct.pack('<I', len(fmt)) + fmt + b'data' + struct.pack('<I', len(data)))
+        f.write(data)
+    #end
+#end
+
+
+def write_aiff(filename, data, channels, bits, compression=None):
+    frames = len(data) // (channels * bits // 8)
+    exponent = RATE.bit_length() - 1
+    comm = struct.pack('>hIh', channels, frames, bits) + struct.pack('>HQ', exponent + 16383, RATE << (63 - exponent))
+    if compression:
+        # compression type and an empty, padded compression name
+        comm += compression + b'\x00\x00'
+    #end
+    form = b'AIFC' if compression else b'AIFF'
+    body = form + b'COMM' + struct.pack('>I', len(comm)) + comm + b'SSND' + struct.pack('>III', len(data) + 8, 0, 0)
+    with open(filename, 'wb') as f:
+        f.write(b'FORM' + struct.pack('>I', len(body) + len(data)) + body)
+        f.write(data)
+    #end
+#end
+
+
+LAYOUTS = [
+    # name, writer, bits, sample format, byte order
+    ('wav8', lambda f, d, c: write_wav(f, d, c, 8), 8, 'uint', '<'),
+    ('wav16', lambda f, d, c: write_wav(f, d, c, 16), 16, 'int', '<'),
+    ('wav24', lambda f, d, c: write_wav(f, d, c, 24), 24, 'int', '<'),
+    ('wav32', lambda f, d, c: write_wav(f, d, c, 32), 32, 'int', '<'),
+    ('wavfloat', lambda f, d, c: write_wav(f, d, c, 32, float_format=True), 32, 'float', '<'),
+    ('aiff16', lambda f, d, c: write_aiff(f, d, c, 16), 16, 'int', '>'),
+    ('aiff24', lambda f, d, c: write_aiff(f, d, c, 24), 24, 'int', '>'),
+    ('aifc_sowt', lambda f, d, c: write_aiff(f, d, c, 16, b'sowt'), 16, 'int', '<'),
+]
+
+
+def reference_peaks(samples, bits, sample_format, samples_per_peak):
+    # Min/max per block from fully decoded samples, scaled the way the peaks file stores them.
+    if sample_format == 'float':
+        scaled = np.clip(np.round(samples.astype(np.float32) * 32767.0), -32768, 32767)
+    else:
+        ints = np.round(samples * (2 ** (bits - 1) - 1)).astype(np.int64)
+        scaled = ints >> (bits - 16) if bits > 16 else ints << (16 - bits)
+    #end
+    mins, maxs = [], []
+    for start in range(0, len(scaled), samples_per_peak):
+        mins.append(scaled[start:start + samples_per_peak].min(axis=0))
+        maxs.append(scaled[start:start + samples_per_peak].max(axis=0))
+    #end
+    return np.stack([np.array(mins), np.array(maxs)], axis=-1).astype(np.int16)
+#end
+
+
+def check_layouts(tmpdir, channels=2, frames=RATE * 3 + 77):
+    samples = make_samples(frames, channels)
+    for name, writer, bits, sample_format, byte_order in LAYOUTS:
+        filename = os.path.join(tmpdir, f'{name}.audio')
+        writer(filename, encode(samples, bits, sample_format, byte_order), channels)
+        layout, n_frames, peaks = compute_peaks(filename)
+        expected = reference_peaks(samples, bits, sample_format, peaks[0][0])
+        if n_frames != frames or not np.array_equal(peaks[0][1], expected):
+            raise AssertionError(f'{name}: peaks differ from the full decode')
+        #end
+        for (spp, level), (coarse_spp, coarse) in zip(peaks, peaks[1:]):
+            if not np.array_equal(coarse, reference_peaks_from(level, coarse_spp // spp)):
+                raise AssertionError(f'{name}: zoom level {coarse_spp} is not derived from level {spp}')
+            #end
+        #end
+    #end
+#end
+
+
+def reference_peaks_from(level, factor):
+    return np.stack([np.array([level[i:i + factor, :, 0].min(axis=0) for i in range(0, len(level), factor)]),
+                     np.array([level[i:i + factor, :, 1].max(axis=0) for i in range(0, len(level), factor)])],
+                    axis=-1)
+#end
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark waveform peak precomputation.')
+    parser.add_argument('--size-mb', type=int, default=500, help='size of the timed mixdown')
+    parser.add_argument('--bits', type=int, choices=[16, 24], default=24, help='bit depth of the timed mixdown')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        check_layouts(tmpdir)
+        print(f'check: peaks of {len(LAYOUTS)} sample layouts match a full decode, zoom levels are consistent')
+
+        filename = os.path.join(tmpdir, 'mixdown.wav')
+        frame_bytes = args.bits // 8 * 2
+        frames = args.size_mb * 1024 * 1024 // frame_bytes
+        block = encode(make_samples(RATE * 10, 2), args.bits, 'int', '<')
+        write_wav(filename, b'', 2, args.bits)
+        with open(filename, 'r+b') as f:
+            f.seek(40)
+            f.write(struct.pack('<I', frames * frame_bytes))
+            f.seek(0, os.SEEK_END)
+            for _ in range(frames * frame_bytes // len(block)):
+                f.write(block)
+            #end
+            f.write(block[:frames * frame_bytes % len(block)])
+        #end
+
+        peaks_filename = os.path.join(tmpdir, 'mixdown.peaks')
+        start = time.perf_counter()
+        info = update_peaks_file(filename, peaks_filename)
+        elapsed = time.perf_counter() - start
+        header = read_peaks_header(peaks_filename)
+        print(f'peaks: {info["bytes"] / 1e6:.0f} MB of {args.bits}-bit stereo in {elapsed * 1000:.0f} ms '
+              f'({info["bytes"] / 1e6 / elapsed:.0f} MB/s), levels {[spp for spp, _ in header["levels"]]}, '
+              f'peaks file {os.path.getsize(peaks_filename) / 1e3:.0f} kB')
+        start = time.perf_counter()
+        again = update_peaks_file(filename, peaks_filename)
+        assert again["status"] == "unchanged", again
+        print(f'unchanged mixdown: skipped in {(time.perf_counter() - start) * 1000:.2f} ms')
+    #end
+#end
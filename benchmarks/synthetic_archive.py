@@ -0,0 +1,286 @@
+"""
+Summary:
+Generator of synthetic DAW archives for the benchmark suite (bench_suite.py) and for manual
+runs of make_json_dtb_file.py. An archive holds N project directories, optionally grouped
+below `depth - 1` levels of artist/year-like folders, with one project file each: the project
+files cycle through every extension listed in daw_info.csv, and the ones with a parser
+(.rpp, .als, .logicx, .cpr, .npr, .flp) get small but well-formed content. Every project has a
+mixdown, stems and a configurable mix of audio, video, score, image and other files; a few
+"huge" outlier projects hold thousands of files in nested take folders. Hidden and ignored
+directories are added so discovery has something to prune. The same arguments and seed
+always produce the same archive.
+
+Usage:
+python benchmarks/synthetic_archive.py /tmp/archive --projects 200 --depth 2 --huge 2
+python make_json_dtb_file.py --autolist /tmp/archive --depth 2 --profile
+"""
+
+import os
+import sys
+import gzip
+import json
+import struct
+import random
+import plistlib
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from daw_extension_registry import get_daw_registry
+from get_file_lists_by_type_module import audio_extensions, video_extensions, score_extensions, image_extensions
+
+# Share of each media kind among the files of a project that are not the project file,
+# mixdown or stems
+DEFAULT_MEDIA_MIX = {"audio": 0.5, "video": 0.05, "score": 0.1, "image": 0.1, "other": 0.25}
+OTHER_EXTENSIONS = ['.txt', '.nfo', '.zip', '.log', '']
+MEDIA_EXTENSIONS = {
+    "audio": audio_extensions,
+    "video": video_extensions,
+    "score": score_extensions,
+    "image": image_extensions,
+    "other": OTHER_EXTENSIONS,
+}
+
+
+## =-------------------------------------------------------------------=##
+# Project file content of the DAWs with a parser
+
+def _rpp(rng, name):
+    lines = ['<REAPER_PROJECT 0.1 "6.80/linux-x86_64" 1681234567', f'  TEMPO {rng.randint(70, 180)} 4 4']
+    for i in range(4):
+        lines.append(f'  MARKER {i} {i * 16.0} "Part {i}" 0 0 1 B {{GUID}} 0')
+    #end
+    for t in range(rng.randint(4, 24)):
+        lines += [f'  <TRACK {{{t:08X}-0000-0000-0000-000000000000}}', f'    NAME "{name} track {t}"',
+                  '    <FXCHAIN', f'      <VST "VST: Plugin {t % 7} (Vendor)" plugin{t % 7}.dll 0 "" 1<56535472>',
+                  '      >', '    >',
+                  '    <ITEM', '      POSITION 0', '      LENGTH 4',
+                  '      <SOURCE WAVE', f'        FILE "stems/track{t}.wav"', '      >', '    >', '  >']
+    #end
+    lines.append('>')
+    return ('\n'.join(lines) + '\n').encode('ascii')
+#end
+
+
+def _als(rng, name):
+    tracks = ''.join(f'<AudioTrack Id="{t}"><Name><EffectiveName Value="{name} {t}" /><UserName Value="" /></Name>'
+                     f'<DeviceChain><DeviceChain><Devices><Eq8 Id="0" /></Devices></DeviceChain></DeviceChain>'
+                     f'</AudioTrack>\n' for t in range(rng.randint(4, 24)))
+    xml = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<Ableton MajorVersion="5" MinorVersion="11.0_433" Creator="Ableton Live 11.3.4">\n<LiveSet>\n'
+           f'<Tracks>\n{tracks}</Tracks>\n'
+           '<MasterTrack><Name><EffectiveName Value="Master" /></Name><DeviceChain><Mixer>'
+           f'<Tempo><LomId Value="0" /><Manual Value="{rng.randint(70, 180)}" /></Tempo>'
+           '<TimeSignature><LomId Value="0" /><Manual Value="201" /></TimeSignature>'
+           '</Mixer></DeviceChain></MasterTrack>\n'
+           '<Locators><Locators><Locator Id="0"><Time Value="0" /><Name Value="Intro" /></Locator>'
+           '</Locators></Locators>\n</LiveSet>\n</Ableton>\n')
+    return gzip.compress(xml.encode('utf-8'), compresslevel=6, mtime=0)
+#end
+
+
+def _logicx(rng, name):
+    return plistlib.dumps({"Tempo": float(rng.randint(70, 180)), "NumericalTimeSignature": [4, 4],
+                           "Markers": [{"Name": f'{name} {i}', "Time": i * 16.0} for i in range(4)]})
+#end
+
+
+def _steinberg_string(text, utf16=False):
+    raw = (text + '\x00').encode('utf-16-be' if utf16 else 'latin-1')
+    return struct.pack('>I', len(raw)) + raw
+#end
+
+
+def _steinberg_chunk(chunk_id, body):
+    return chunk_id + struct.pack('>I', len(body)) + body
+#end
+
+
+def _steinberg(rng, name, application):
+    arch = [b'PAppVersion\x00', b'\x00\x02', _steinberg_string(application), _steinberg_string('12.0.70'),
+            b'MTempoEvent\x00', b'\x00\x00\x00\x01', struct.pack('>d', float(rng.randint(70, 180))),
+            b'MTimeSignatureEvent\x00', b'\xff\xff', struct.pack('>II', 4, 4)]
+    for i in range(4):
+        arch.append(b'MMarkerEvent\x00\x00\x01' + _steinberg_string(f'{name} {i}', utf16=True) +
+                    struct.pack('>d', i * 1920.0))
+    #end
+    body = (b'NUND' + _steinberg_chunk(b'ROOT', _steinberg_string('GDocument')) +
+            _steinberg_chunk(b'POOL', bytes(rng.randint(1, 64) * 1024)) + _steinberg_chunk(b'ARCH', b''.join(arch)))
+    return b'RIFF' + struct.pack('>I', len(body)) + body
+#end
+
+
+def _flp_text(event_id, text):
+    raw = text.encode('utf-16-le') + b'\x00\x00'
+    size = len(raw)
+    varint = b''
+    while True:
+        byte = size & 0x7F
+        size >>= 7
+        varint += bytes([byte | 0x80 if size else byte])
+        if not size:
+            return bytes([event_id]) + varint + raw
+        #end
+    #end
+#end
+
+
+def _flp(rng, name):
+    events = bytes([192 + 7]) + bytes([8]) + b'20.8.3\x00\x00'
+    events += _flp_text(192 + 2, name)
+    events += bytes([128 + 28]) + struct.pack('<I', rng.randint(70, 180) * 1000)
+    events += bytes([17, 4, 18, 4])
+    for c in range(rng.randint(4, 16)):
+        events += bytes([64]) + struct.pack('<H', c) + _flp_text(192 + 9, 'Sampler') + _flp_text(192 + 11, f'Ch {c}')
+    #end
+    header = b'FLhd' + struct.pack('<I', 6) + struct.pack('<hHH', 0, 16, 96)
+    return header + b'FLdt' + struct.pack('<I', len(events)) + events
+#end
+
+
+PROJECT_CONTENT = {
+    '.rpp': _rpp,
+    '.als': _als,
+    '.logicx': _logicx,
+    '.cpr': lambda rng, name: _steinberg(rng, name, 'Cubase'),
+    '.npr': lambda rng, name: _steinberg(rng, name, 'Nuendo'),
+    '.flp': _flp,
+}
+
+
+def project_file_content(ext, rng, name):
+    # Content of a synthetic project file: well-formed for the parsed formats, filler otherwise.
+    writer = PROJECT_CONTENT.get(ext)
+    if writer is None:
+        return f'synthetic {ext} project {name}\n'.encode('utf-8')
+    #end
+    return writer(rng, name)
+#end
+
+
+## =-------------------------------------------------------------------=##
+# Media files
+
+def wav_bytes(data_size, rate=48000, bits=24, channels=2):
+    # A PCM WAV file with data_size bytes of silence.
+    block_align = channels * bits // 8
+    data_size -= data_size % block_align
+    fmt = struct.pack('<HHIIHH', 1, channels, rate, rate * block_align, block_align, bits)
+    body = b'WAVE' + b'fmt ' + struct.pack('<I', len(fmt)) + fmt + b'data' + struct.pack('<I', data_size)
+    return b'RIFF' + struct.pack('<I', len(body) + data_size) + body + bytes(data_size)
+#end
+
+
+def media_file_content(ext, media_bytes):
+    if ext == '.wav':
+        return wav_bytes(media_bytes)
+    #end
+    return bytes(media_bytes)
+#end
+
+
+def _write(filename, content):
+    with open(filename, 'wb') as f:
+        f.write(content)
+    #end
+    return len(content)
+#end
+
+
+## =-------------------------------------------------------------------=##
+
+def _project_parents(root, n_projects, depth, groups):
+    # Parent directory of every project: `depth - 1` levels of group folders below root.
+    parents = []
+    for p in range(n_projects):
+        parent = root
+        index = p
+        for level in range(depth - 1):
+            parent = os.path.join(parent, f'group{level}_{index % groups}')
+            index //= groups
+        #end
+        parents.append(parent)
+    #end
+    return parents
+#end
+
+
+def build_archive(root, n_projects, depth=1, files_per_project=20, media_mix=None, media_bytes=4096,
+                  huge_projects=0, huge_files=5000, groups=8, seed=0):
+    # Write a synthetic archive below root and return its description: the project directories
+    # (with the huge ones), the project files of every DAW, and the file and byte counts.
+    rng = random.Random(seed)
+    media_mix = media_mix or DEFAULT_MEDIA_MIX
+    kinds = list(media_mix)
+    weights = [media_mix[kind] for kind in kinds]
+    project_extensions = list(dict.fromkeys(get_daw_registry().extensions))
+    daw_names = get_daw_registry().by_extension
+    archive = {"root": root, "projects": [], "huge_projects": [], "project_files": {},
+               "directories": 0, "files": 0, "bytes": 0}
+
+    parents = _project_parents(root, n_projects + huge_projects, depth, groups)
+    for p, parent in enumerate(parents):
+        ext = project_extensions[p % len(project_extensions)]
+        name = f'Song{p:05d}'
+        prjPath = os.path.join(parent, name)
+        stems = os.path.join(prjPath, 'stems')
+        os.makedirs(stems)
+        archive["directories"] += 2
+        huge = p >= n_projects
+
+        archive["bytes"] += _write(os.path.join(prjPath, name + ext), project_file_content(ext, rng, name))
+        archive["bytes"] += _write(os.path.join(prjPath, f'{name} mix.wav'), wav_bytes(media_bytes))
+        archive["files"] += 2
+        archive["project_files"].setdefault(daw_names[ext], []).append(os.path.join(prjPath, name + ext))
+
+        n_files = huge_files if huge else files_per_project
+        for s in range(max(1, n_files // 4)):
+            archive["bytes"] += _write(os.path.join(stems, f'track{s}.wav'), wav_bytes(media_bytes))
+            archive["files"] += 1
+        #end
+        takes = prjPath
+        for f in range(n_files - max(1, n_files // 4)):
+            if huge and f % 500 == 0:
+                # Outliers keep their bulk in nested take folders
+                takes = os.path.join(prjPath, 'takes', f'session{f // 500:03d}')
+                os.makedirs(takes)
+                archive["directories"] += 1
+            #end
+            kind = rng.choices(kinds, weights)[0]
+            media_ext = rng.choice(MEDIA_EXTENSIONS[kind])
+            archive["bytes"] += _write(os.path.join(takes, f'{kind}{f}{media_ext}'),
+                                       media_file_content(media_ext, media_bytes if kind != "other" else 64))
+            archive["files"] += 1
+        #end
+        (archive["huge_projects"] if huge else archive["projects"]).append(prjPath)
+    #end
+
+    # Directories discovery must prune: hidden and ignored ones holding project files
+    for pruned in ('.cache', 'Backup', 'do_not_process'):
+        os.makedirs(os.path.join(root, pruned, 'Old Song'))
+        _write(os.path.join(root, pruned, 'Old Song', 'Old Song.rpp'), project_file_content('.rpp', rng, 'Old Song'))
+        archive["directories"] += 2
+        archive["files"] += 1
+    #end
+    return archive
+#end
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a synthetic DAW archive.')
+    parser.add_argument('root', help='directory to create the archive in (must not exist)')
+    parser.add_argument('--projects', type=int, default=100, help='number of regular projects')
+    parser.add_argument('--depth', type=int, default=1, help='directory level of the projects below root')
+    parser.add_argument('--files', type=int, default=20, help='media files per regular project')
+    parser.add_argument('--media-kb', type=float, default=4, help='size of every media file in KB')
+    parser.add_argument('--huge', type=int, default=0, help='number of huge outlier projects')
+    parser.add_argument('--huge-files', type=int, default=5000, help='files per huge project')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.root)
+    archive = build_archive(args.root, args.projects, args.depth, args.files, media_bytes=int(args.media_kb * 1024),
+                            huge_projects=args.huge, huge_files=args.huge_files, seed=args.seed)
+    print(json.dumps({"projects": len(archive["projects"]) + len(archive["huge_projects"]),
+                      "daws": len(archive["project_files"]), "directories": archive["directories"],
+                      "files": archive["files"], "bytes": archive["bytes"]}))
+#end
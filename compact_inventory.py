@@ -0,0 +1,181 @@
+"""
+Summary:
+Compact encoding of a project's file inventory, from which both classic views, the nested
+'directory_tree' (get_directory_tree_asDictionary) and the flat 'filepath_list'
+(get_filepath_list), can be derived exactly.
+
+The inventory is a path table: directories are stored once as (parent index, interned
+name) pairs, the root being the implicit index 0; files as (directory index, name) pairs
+with size and mtime kept in parallel columns. Every column is packed into one string
+(names joined by '/', which no file name can contain, numbers by spaces, flags as digits),
+so the project JSON, written with indent=4, does not spend a line per value, and a reader
+splits each column in one call. mtimes are whole seconds relative to 'mtime_base'.
+
+The classic views do not list the same entries: the tree follows symbolic links to
+directories and leaves out broken links, the list (an os.walk) does the opposite. A
+directory flag says whether the walk descends into it, a file flag (bit 1: tree, bit 2:
+list) in which views it appears.
+
+    "inventory": {
+        "format": "compact-1",
+        "dir_parents": "0 0 2",             directories 1..n: parent directory index
+        "dir_names": "stems/Media/sub",
+        "dir_walked": "111",
+        "file_dirs": "0 1 3",                directory index of every file
+        "file_names": "mix.wav/kick.wav/x.wav",
+        "file_flags": "333",
+        "sizes": "529244 288044 1",
+        "mtime_base": 1697500000,
+        "mtimes": "12 0 3"
+    }
+
+License: MIT License
+"""
+
+import os
+
+from directory_snapshot import DirectorySnapshot
+
+## =-------------------------------------------------------------------=##
+
+INVENTORY_FORMAT = "compact-1"
+IN_TREE = 1
+IN_LIST = 2
+
+
+def build_inventory(rootPath, snapshot=None):
+    # Encode the inventory of rootPath, listing every directory once.
+    if snapshot is None:
+        snapshot = DirectorySnapshot(rootPath)
+    #end
+    dir_parents, dir_names, dir_walked = [], [], []
+    file_dirs, file_names, file_flags, sizes, mtimes = [], [], [], [], []
+
+    # Pre-order, children in listing order: the order of both the tree's keys and the walk.
+    # A directory gets its index when it is visited, so the indices follow the walk too.
+    stack = [(rootPath, None, "", True)]
+    while stack:
+        path, parent, dir_name, walked = stack.pop()
+        if parent is None:
+            index = 0
+        else:
+            dir_parents.append(parent)
+            dir_names.append(dir_name)
+            dir_walked.append(walked)
+            index = len(dir_names)
+        #end
+        subdirectories = []
+        for name in snapshot.listdir(path):
+            full_path = os.path.join(path, name)
+            if snapshot.isdir(full_path):
+                # the walk does not descend into symbolic links to directories
+                child_walked = walked and not snapshot.islink(full_path)
+                subdirectories.append((full_path, index, name, child_walked))
+                continue
+            #end
+            flags = (IN_TREE if snapshot.isfile(full_path) else 0) | (IN_LIST if walked else 0)
+            if not flags:
+                continue
+            #end
+            try:
+                st = snapshot.stat(full_path)
+                size, mtime = st.st_size, int(st.st_mtime)
+            except OSError:
+                # broken symbolic link
+                size, mtime = 0, 0
+            #end
+            file_dirs.append(index)
+            file_names.append(name)
+            file_flags.append(flags)
+            sizes.append(size)
+            mtimes.append(mtime)
+        #end
+        stack.extend(reversed(subdirectories))
+    #end
+
+    mtime_base = min(mtimes, default=0)
+    return {
+        "format": INVENTORY_FORMAT,
+        "dir_parents": " ".join(map(str, dir_parents)),
+        "dir_names": "/".join(dir_names),
+        "dir_walked": "".join('1' if walked else '0' for walked in dir_walked),
+        "file_dirs": " ".join(map(str, file_dirs)),
+        "file_names": "/".join(file_names),
+        "file_flags": "".join(map(str, file_flags)),
+        "sizes": " ".join(map(str, sizes)),
+        "mtime_base": mtime_base,
+        "mtimes": " ".join(str(mtime - mtime_base) for mtime in mtimes),
+    }
+#end
+
+
+def _split(column, separator=None):
+    # Split a packed column; an empty string is an empty column.
+    if not column:
+        return []
+    #end
+    return column.split(separator) if separator else column.split()
+#end
+
+
+def decode_inventory(inventory):
+    # Unpack the columns: (dir_parents, dir_names, dir_walked, file_dirs, file_names, file_flags, sizes, mtimes).
+    if inventory.get("format") != INVENTORY_FORMAT:
+        raise ValueError(f'unsupported inventory format {inventory.get("format")!r}')
+    #end
+    base = inventory["mtime_base"]
+    return (
+        [0] + [int(i) for i in _split(inventory["dir_parents"])],
+        [""] + _split(inventory["dir_names"], '/'),
+        [True] + [flag == '1' for flag in inventory["dir_walked"]],
+        [int(i) for i in _split(inventory["file_dirs"])],
+        _split(inventory["file_names"], '/'),
+        [int(flag) for flag in inventory["file_flags"]],
+        [int(size) for size in _split(inventory["sizes"])],
+        [base + int(mtime) for mtime in _split(inventory["mtimes"])],
+    )
+#end
+
+
+def inventory_to_tree(inventory):
+    # The 'directory_tree' view: {"": [files], subdirectory: {...}, ...}.
+    dir_parents, dir_names, _, file_dirs, file_names, file_flags, _, _ = decode_inventory(inventory)
+    trees = [{"": []}]
+    for parent, name in zip(dir_parents[1:], dir_names[1:]):
+        tree = {"": []}
+        trees[parent][name] = tree
+        trees.append(tree)
+    #end
+    for index, name, flags in zip(file_dirs, file_names, file_flags):
+        if flags & IN_TREE:
+            trees[index][""].append(name)
+        #end
+    #end
+    return trees[0]
+#end
+
+
+def inventory_to_filepath_list(inventory):
+    # The 'filepath_list' view: root files by name, others as os.sep + relative path.
+    dir_parents, dir_names, dir_walked, file_dirs, file_names, file_flags, _, _ = decode_inventory(inventory)
+    prefixes = [""]
+    for parent, name in zip(dir_parents[1:], dir_names[1:]):
+        prefixes.append(prefixes[parent] + os.sep + name)
+    #end
+    # The walk lists the files of a directory when it reaches the directory; the directory
+    # indices are in the same pre-order
+    by_directory = {}
+    for index, name, flags in zip(file_dirs, file_names, file_flags):
+        if flags & IN_LIST:
+            by_directory.setdefault(index, []).append(name)
+        #end
+    #end
+    filepaths = []
+    for index in range(len(prefixes)):
+        if dir_walked[index] and index in by_directory:
+            prefix = prefixes[index]
+            filepaths.extend(prefix + os.sep + name if prefix else name for name in by_directory[index])
+        #end
+    #end
+    return filepaths
+#end
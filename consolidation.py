@@ -0,0 +1,122 @@
+"""
+Summary:
+Consolidation of the per-project JSON data into one file (--onefile), streamed: every
+project is appended as soon as its result arrives, from the JSON text the worker already
+serialised, so nothing is re-read from disk or collected in memory first.
+
+Two formats are written: "json", one array of the project objects (the same text as
+json.dump(list, indent=4)), and "ndjson", one compact project object per line. With a
+shard size, the output is split into shards of about that many bytes, each a complete
+file of the chosen format, plus a manifest listing them, so consumers can load the shards
+in parallel. Every file is written to a temporary name and renamed when complete.
+
+License: MIT License
+"""
+
+import os
+import json
+
+## =-------------------------------------------------------------------=##
+
+ONEFILE_FORMATS = ("json", "ndjson")
+
+
+def to_ndjson_line(json_text):
+    # A project's indented JSON text as one compact NDJSON line (without the newline).
+    return json.dumps(json.loads(json_text))
+#end
+
+
+class ConsolidatedWriter:
+    # Appends project JSON texts to the consolidated file, or to its shards.
+
+    def __init__(self, filename, onefile_format="json", shard_bytes=None):
+        if onefile_format not in ONEFILE_FORMATS:
+            raise ValueError(f'unknown consolidated file format {onefile_format!r}')
+        #end
+        self.filename = filename
+        self.onefile_format = onefile_format
+        self.shard_bytes = shard_bytes
+        self.shards = []
+        self._file = None
+        self._filename = None
+    #end
+
+    def _shard_filename(self, index):
+        if not self.shard_bytes:
+            return self.filename
+        #end
+        stem, ext = os.path.splitext(self.filename)
+        return f'{stem}.{index:05d}{ext}'
+    #end
+
+    def _open_shard(self):
+        filename = self._shard_filename(len(self.shards))
+        self.shards.append({"file": os.path.basename(filename), "projects": 0, "bytes": 0})
+        self._file = open(filename + ".tmp", 'w')
+        self._filename = filename
+    #end
+
+    def _close_shard(self):
+        shard = self.shards[-1]
+        if self.onefile_format == "json":
+            self._write("[]\n" if shard["projects"] == 0 else "\n]\n")
+        #end
+        self._file.close()
+        self._file = None
+        os.replace(self._filename + ".tmp", self._filename)
+    #end
+
+    def _write(self, text):
+        self._file.write(text)
+        self.shards[-1]["bytes"] += len(text)
+    #end
+
+    def add(self, json_text):
+        # Append one project, given as the indented JSON text of its database file
+        # (or, for the ndjson format, already as an NDJSON line).
+        if self._file is not None and self.shard_bytes and self.shards[-1]["bytes"] >= self.shard_bytes:
+            self._close_shard()
+        #end
+        if self._file is None:
+            self._open_shard()
+        #end
+        shard = self.shards[-1]
+        if self.onefile_format == "ndjson":
+            self._write(json_text.rstrip("\n") + "\n")
+        else:
+            # The project object becomes an item of the array: indented by one level
+            self._write(("[\n    " if shard["projects"] == 0 else ",\n    ") +
+                        json_text.rstrip("\n").replace("\n", "\n    "))
+        #end
+        shard["projects"] += 1
+    #end
+
+    def close(self):
+        # Finish the last shard (an empty output still gets one) and, when sharding, write
+        # the manifest. Returns the names of the files written.
+        if self._file is None and not self.shards:
+            self._open_shard()
+        #end
+        if self._file is not None:
+            self._close_shard()
+        #end
+        written = [os.path.join(os.path.dirname(self.filename), shard["file"]) for shard in self.shards]
+        if self.shard_bytes:
+            stem, _ = os.path.splitext(self.filename)
+            manifest_filename = f'{stem}.manifest.json'
+            manifest = {
+                "format": self.onefile_format,
+                "projects": sum(shard["projects"] for shard in self.shards),
+                "shards": self.shards,
+            }
+            with open(manifest_filename + ".tmp", 'w') as f:
+                json.dump(manifest, f, indent=4)
+                f.write("\n")
+            #end
+            os.replace(manifest_filename + ".tmp", manifest_filename)
+            written.append(manifest_filename)
+        #end
+        return written
+    #end
+#end
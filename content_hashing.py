@@ -0,0 +1,232 @@
+"""
+Summary:
+Content hashing of media files and the cross-project duplicate report.
+Files are hashed in fixed-size chunks read into a reused buffer, by a bounded thread pool
+(the hash functions release the GIL on large updates, so reads and hashing overlap).
+xxHash's XXH3-128 is used when the optional xxhash package is installed, BLAKE2b-128
+otherwise; digests are prefixed with the algorithm name so the two never mix.
+
+Digests are cached in a SQLite file keyed by (st_dev, st_ino, size, mtime_ns), so a file
+that has not changed is never read twice, not even when it is reached through another
+path (hard links, renamed project folders).
+
+License: MIT License
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+from io_throttle import io_read
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+#end
+
+## =-------------------------------------------------------------------=##
+
+CHUNK_SIZE = 1024 * 1024
+DEFAULT_MAX_WORKERS = 4
+DIGEST_CACHE_FILENAME = "content_digests.sqlite"
+DUPLICATE_REPORT_FILENAME = "duplicate_media_report.json"
+HASH_ALGORITHM = "xxh3_128" if xxhash is not None else "blake2b_128"
+
+
+def _new_hash():
+    if xxhash is not None:
+        return xxhash.xxh3_128()
+    #end
+    return hashlib.blake2b(digest_size=16)
+#end
+
+
+def hash_file(filename, chunk_size=CHUNK_SIZE):
+    # Digest of a file's content, read chunk by chunk into one reused buffer.
+    digest = _new_hash()
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+    with open(filename, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buffer)
+            if not n:
+                break
+            #end
+            io_read(n)
+            digest.update(view[:n])
+        #end
+    #end
+    return f'{HASH_ALGORITHM}:{digest.hexdigest()}'
+#end
+
+
+class DigestCache:
+    # SQLite cache of content digests keyed by (st_dev, st_ino, size, mtime_ns, algorithm).
+
+    def __init__(self, cache_filename):
+        self.cache_filename = cache_filename
+        self._connection = None
+        self._lock = threading.Lock()
+    #end
+
+    def _connect(self):
+        if self._connection is None:
+            import sqlite3
+            connection = sqlite3.connect(self.cache_filename, timeout=60, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS digests (dev INTEGER, ino INTEGER, size INTEGER, "
+                               "mtime_ns INTEGER, algorithm TEXT, digest TEXT NOT NULL, "
+                               "PRIMARY KEY (dev, ino, size, mtime_ns, algorithm))")
+            self._connection = connection
+        #end
+        return self._connection
+    #end
+
+    def lookup(self, keys):
+        # Cached digests of the given (dev, ino, size, mtime_ns) keys, as a dict.
+        found = {}
+        with self._lock:
+            connection = self._connect()
+            for key in keys:
+                row = connection.execute("SELECT digest FROM digests WHERE dev = ? AND ino = ? AND size = ? "
+                                         "AND mtime_ns = ? AND algorithm = ?", (*key, HASH_ALGORITHM)).fetchone()
+                if row is not None:
+                    found[key] = row[0]
+                #end
+            #end
+        #end
+        return found
+    #end
+
+    def store(self, digests):
+        # Store a {(dev, ino, size, mtime_ns): digest} dict in one transaction.
+        if not digests:
+            return
+        #end
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN")
+            connection.executemany("INSERT OR REPLACE INTO digests VALUES (?, ?, ?, ?, ?, ?)",
+                                   [(*key, HASH_ALGORITHM, digest) for key, digest in digests.items()])
+            connection.execute("COMMIT")
+        #end
+    #end
+#end
+
+
+_digest_caches = {}
+_executor = None
+_lock = threading.Lock()
+
+
+def get_digest_cache(cache_filename):
+    # One DigestCache per cache file and process.
+    with _lock:
+        if cache_filename not in _digest_caches:
+            _digest_caches[cache_filename] = DigestCache(cache_filename)
+        #end
+        return _digest_caches[cache_filename]
+    #end
+#end
+
+
+def stat_key(st):
+    return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns)
+#end
+
+
+def hash_files(files, cache=None, max_workers=DEFAULT_MAX_WORKERS):
+    # Digest of every (filename, stat result) in files, in order, through a bounded thread pool
+    # shared by the whole process. Files whose stat key is in the cache are not read.
+    # Returns (digests, stats) where stats counts the files hashed and cached and the bytes hashed.
+    global _executor
+    keys = [stat_key(st) for _, st in files]
+    cached = cache.lookup(keys) if cache is not None else {}
+    # Hard links and repeated entries are hashed once
+    to_hash = {}
+    for (filename, _), key in zip(files, keys):
+        if key not in cached and key not in to_hash:
+            to_hash[key] = filename
+        #end
+    #end
+    start = time.perf_counter()
+    if len(to_hash) > 1:
+        with _lock:
+            if _executor is None:
+                from concurrent.futures import ThreadPoolExecutor
+                _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='content_hashing')
+            #end
+        #end
+        hashed = dict(zip(to_hash, _executor.map(hash_file, to_hash.values())))
+    else:
+        hashed = {key: hash_file(filename) for key, filename in to_hash.items()}
+    #end
+    if cache is not None:
+        cache.store(hashed)
+    #end
+    stats = {
+        "hashed": len(hashed),
+        "cached": len(files) - len(hashed),
+        "bytes": sum(key[2] for key in hashed),
+        "seconds": time.perf_counter() - start,
+    }
+    return [cached.get(key) or hashed[key] for key in keys], stats
+#end
+
+
+## =-------------------------------------------------------------------=##
+
+def build_duplicate_report(project_digests):
+    # Cross-project duplicate report from {project path: {relative file: {"digest", "size"}}}.
+    # Every group of identical files lists its copies; the reclaimable bytes are those of
+    # all copies but one.
+    groups = {}
+    for project, files in project_digests.items():
+        for relative_path, info in files.items():
+            groups.setdefault(info["digest"], []).append({"project": project, "file": relative_path,
+                                                          "size": info["size"]})
+        #end
+    #end
+    total_bytes = sum(copy["size"] for copies in groups.values() for copy in copies)
+    unique_bytes = sum(copies[0]["size"] for copies in groups.values())
+    duplicates = []
+    for digest, copies in groups.items():
+        if len(copies) > 1:
+            size = copies[0]["size"]
+            duplicates.append({
+                "digest": digest,
+                "size": size,
+                "copies": len(copies),
+                "projects": len({copy["project"] for copy in copies}),
+                "reclaimable_bytes": size * (len(copies) - 1),
+                "files": [{"project": copy["project"], "file": copy["file"]} for copy in copies],
+            })
+        #end
+    #end
+    duplicates.sort(key=lambda group: (-group["reclaimable_bytes"], group["digest"]))
+    return {
+        "algorithm": HASH_ALGORITHM,
+        "projects": len(project_digests),
+        "media_files": sum(len(copies) for copies in groups.values()),
+        "unique_files": len(groups),
+        "total_bytes": total_bytes,
+        "unique_bytes": unique_bytes,
+        "reclaimable_bytes": total_bytes - unique_bytes,
+        "duplicate_groups": duplicates,
+    }
+#end
+
+
+def write_duplicate_report(outdir, report):
+    report_filename = os.path.join(outdir, DUPLICATE_REPORT_FILENAME)
+    with open(report_filename + ".tmp", 'w') as f:
+        json.dump(report, f, indent=4)
+        f.write("\n")
+    #end
+    os.replace(report_filename + ".tmp", report_filename)
+    return report_filename
+#end
@@ -0,0 +1,83 @@
+import os
+import csv
+from functools import lru_cache
+from types import MappingProxyType
+
+## =-------------------------------------------------------------------=##
+# Immutable index of daw_info.csv, loaded once per process.
+# Every extension of a CSV row maps to that row's DAW name; when an extension
+# is listed for several DAWs the first row wins.
+# Filenames are matched against the longest registered suffix, so multi-dot
+# extensions such as '.ardour.bak' take precedence over '.bak'.
+## =-------------------------------------------------------------------=##
+
+class DawExtensionRegistry:
+
+    def __init__(self, daw_rows):
+        # daw_rows: iterable of (daw_name, [extensions]) in CSV order
+        daws = {}
+        by_extension = {}
+        for daw_name, extensions in daw_rows:
+            extensions = [ext.strip().lower() for ext in extensions if ext.strip()]
+            daws[daw_name] = tuple(daws.get(daw_name, ()) + tuple(extensions))
+            for ext in extensions:
+                by_extension.setdefault(ext, daw_name)
+            #end
+        #end
+        self.daws = MappingProxyType(daws)
+        self.by_extension = MappingProxyType(by_extension)
+        self.extensions = tuple(ext for extensions in daws.values() for ext in extensions)
+        # The most dots any registered extension has bounds the suffixes worth looking up
+        self._max_dots = max((ext.count('.') for ext in by_extension), default=0)
+    #end
+
+    def match_extension(self, filename):
+        # Return the longest registered extension filename ends with, or None.
+        name = os.path.basename(filename).lower()
+        suffixes = []
+        pos = len(name)
+        for _ in range(self._max_dots):
+            pos = name.rfind('.', 0, pos)
+            if pos <= 0:
+                # no more dots, or only a leading one (hidden file without extension)
+                break
+            #end
+            suffixes.append(name[pos:])
+        #end
+        for suffix in reversed(suffixes):
+            if suffix in self.by_extension:
+                return suffix
+            #end
+        #end
+        return None
+    #end
+
+    def get_daw_name(self, filename):
+        # Return the DAW name of a project file, or 'Unknown'.
+        ext = self.match_extension(filename)
+        return self.by_extension[ext] if ext else 'Unknown'
+    #end
+
+    def is_project_file(self, filename):
+        return self.match_extension(filename) is not None
+    #end
+#end
+
+
+def read_daw_rows(dawINFO_csv):
+    # Read daw_info.csv as (daw_name, [extensions]) rows, skipping the header.
+    with open(dawINFO_csv, 'r') as f:
+        reader = csv.reader(f)
+        next(reader)  # skip header
+        return [(row[0], row[1:]) for row in reader if row]
+    #end
+#end
+
+
+@lru_cache(maxsize=None)
+def get_daw_registry():
+    # The registry for the daw_info.csv next to this script, loaded once per process.
+    dawINFO_csv = os.path.dirname(os.path.abspath(__file__))
+    dawINFO_csv = os.path.join(dawINFO_csv, 'daw_info.csv')
+    return DawExtensionRegistry(read_daw_rows(dawINFO_csv))
+#end
@@ -0,0 +1,195 @@
+import os
+
+from io_throttle import io_operation
+
+## =-------------------------------------------------------------------=##
+# A DirectorySnapshot lists every directory of a project at most once.
+# Each listing is a single os.scandir call; only the entry names and their
+# types are kept (not the DirEntry objects, which the streamed JSON write
+# would otherwise hold for the whole project), and stat results are cached
+# on first use, so every extractor that looks at the same project is
+# served from the cache.
+## =-------------------------------------------------------------------=##
+
+# Entry type flags of a listing
+_FILE, _DIR, _LINK = 1, 2, 4
+
+
+def _entry_flags(entry):
+    # The type flags of a DirEntry; is_file and is_dir follow symbolic links.
+    flags = 0
+    for flag, test in ((_FILE, entry.is_file), (_DIR, entry.is_dir), (_LINK, entry.is_symlink)):
+        try:
+            if test():
+                flags |= flag
+            #end
+        except OSError:
+            pass
+        #end
+    #end
+    return flags
+#end
+
+class DirectorySnapshot:
+
+    def __init__(self, rootPath):
+        self.rootPath = rootPath
+        self._listings = {}
+        self._stats = {}
+        self._root_stat = None
+    #end
+
+    def _key(self, path):
+        return os.path.normcase(os.path.normpath(path))
+    #end
+
+    def _scan(self, path):
+        # Return the cached (names, flags_by_name) listing of a directory.
+        key = self._key(path)
+        listing = self._listings.get(key)
+        if listing is None:
+            try:
+                with io_operation(), os.scandir(path) as it:
+                    names = []
+                    flags_by_name = {}
+                    for entry in it:
+                        names.append(entry.name)
+                        flags_by_name[os.path.normcase(entry.name)] = _entry_flags(entry)
+                    #end
+                #end
+                listing = (names, flags_by_name)
+            except OSError as err:
+                listing = err
+            #end
+            self._listings[key] = listing
+        #end
+        if isinstance(listing, OSError):
+            raise listing
+        #end
+        return listing
+    #end
+
+    def _flags(self, path):
+        # The cached type flags of a path, 0 if it is not listed.
+        parent, name = os.path.split(os.path.normpath(path))
+        try:
+            _, flags_by_name = self._scan(parent or os.curdir)
+        except OSError:
+            return 0
+        #end
+        return flags_by_name.get(os.path.normcase(name), 0)
+    #end
+
+    def prefetch(self, path, stat=False):
+        # List a directory into the cache and resolve the types (and with stat, the stat results)
+        # of its entries, so later lookups do not touch the file system. Returns the paths of the
+        # subdirectories that are not symbolic links; nothing for a directory that cannot be listed.
+        try:
+            names, flags_by_name = self._scan(path)
+        except OSError:
+            return []
+        #end
+        subdirectories = []
+        for name in names:
+            if flags_by_name[os.path.normcase(name)] & (_DIR | _LINK) == _DIR:
+                subdirectories.append(os.path.join(path, name))
+            #end
+            if stat:
+                try:
+                    self.stat(os.path.join(path, name))
+                except OSError:
+                    pass
+                #end
+            #end
+        #end
+        return subdirectories
+    #end
+
+    def listdir(self, path=None):
+        # Drop-in replacement for os.listdir, in os.scandir order.
+        return list(self._scan(self.rootPath if path is None else path)[0])
+    #end
+
+    def isfile(self, path):
+        # Drop-in replacement for os.path.isfile (follows symlinks).
+        return bool(self._flags(path) & _FILE)
+    #end
+
+    def isdir(self, path):
+        # Drop-in replacement for os.path.isdir (follows symlinks).
+        return bool(self._flags(path) & _DIR)
+    #end
+
+    def islink(self, path):
+        # Drop-in replacement for os.path.islink.
+        return bool(self._flags(path) & _LINK)
+    #end
+
+    def stat(self, path):
+        # Cached os.stat result of a path (follows symlinks).
+        key = self._key(path)
+        st = self._stats.get(key)
+        if st is None:
+            with io_operation():
+                st = os.stat(path)
+            #end
+            self._stats[key] = st
+        #end
+        return st
+    #end
+
+    def getsize(self, path):
+        return self.stat(path).st_size
+    #end
+
+    def root_stat(self):
+        # The root itself is not part of any listing, so stat it once on demand.
+        if self._root_stat is None:
+            with io_operation():
+                self._root_stat = os.stat(self.rootPath)
+            #end
+        #end
+        return self._root_stat
+    #end
+
+    def getmtime(self, path=None):
+        if path is None or self._key(path) == self._key(self.rootPath):
+            return self.root_stat().st_mtime
+        #end
+        return self.stat(path).st_mtime
+    #end
+
+    def walk(self, top=None, followlinks=False):
+        # Equivalent of os.walk(top, topdown=True, onerror=None, followlinks=followlinks)
+        # served from the cached listings.
+        top = self.rootPath if top is None else top
+        try:
+            names, flags_by_name = self._scan(top)
+        except OSError:
+            return
+        #end
+
+        dirnames = []
+        filenames = []
+        symlinks = set()
+        for name in names:
+            flags = flags_by_name[os.path.normcase(name)]
+            if flags & _DIR:
+                dirnames.append(name)
+                if flags & _LINK:
+                    symlinks.add(name)
+                #end
+            else:
+                filenames.append(name)
+            #end
+        #end
+
+        yield top, dirnames, filenames
+
+        for dirname in dirnames:
+            if followlinks or dirname not in symlinks:
+                yield from self.walk(os.path.join(top, dirname), followlinks)
+            #end
+        #end
+    #end
+#end
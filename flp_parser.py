@@ -0,0 +1,252 @@
+"""
+Summary:
+Native reader for FL Studio projects (.flp).
+An FLP is a binary file: an 'FLhd' header chunk followed by an 'FLdt' chunk holding a
+flat stream of events. The event id determines the payload size: ids 0-63 carry one byte,
+64-127 two bytes, 128-191 four bytes and 192-255 a variable-length payload prefixed by a
+7-bit varint length. The file is memory-mapped and walked in place; only the event ids
+listed below are decoded, every other event is skipped by its size.
+
+License: MIT License
+"""
+
+import mmap
+import struct
+
+## =-------------------------------------------------------------------=##
+
+# Bump when the extracted information changes; invalidates this parser's parse-cache entries
+PARSER_VERSION = 1
+
+_BYTE, _WORD, _DWORD, _TEXT = 0, 64, 128, 192
+
+EVENT_TIME_SIG_NUMERATOR = _BYTE + 17
+EVENT_TIME_SIG_BEAT = _BYTE + 18
+EVENT_NEW_CHANNEL = _WORD + 0
+EVENT_NEW_PATTERN = _WORD + 1
+EVENT_TEMPO_COARSE = _WORD + 2     # projects saved before the DWORD tempo event existed
+EVENT_TEMPO_FINE = _WORD + 29
+EVENT_TEMPO = _DWORD + 28          # tempo * 1000
+EVENT_CHANNEL_NAME_OLD = _TEXT + 0
+EVENT_PATTERN_NAME = _TEXT + 1
+EVENT_TITLE = _TEXT + 2
+EVENT_FL_VERSION = _TEXT + 7
+EVENT_PLUGIN_INTERNAL_NAME = _TEXT + 9   # e.g. "Fruity Wrapper", "Sampler", "Fruity Limiter"
+EVENT_PLUGIN_NAME = _TEXT + 11           # display name of the channel / plugin instance
+EVENT_GENRE = _TEXT + 14
+EVENT_ARTISTS = _TEXT + 15
+
+_TEXT_EVENTS = {
+    EVENT_CHANNEL_NAME_OLD, EVENT_PATTERN_NAME, EVENT_TITLE, EVENT_FL_VERSION,
+    EVENT_PLUGIN_INTERNAL_NAME, EVENT_PLUGIN_NAME, EVENT_GENRE, EVENT_ARTISTS,
+}
+_FIXED_EVENTS = {
+    EVENT_TIME_SIG_NUMERATOR, EVENT_TIME_SIG_BEAT, EVENT_NEW_CHANNEL, EVENT_NEW_PATTERN,
+    EVENT_TEMPO_COARSE, EVENT_TEMPO_FINE, EVENT_TEMPO,
+}
+# FL Studio 11.5 switched project strings from single-byte text to UTF-16LE
+_UTF16_SINCE_VERSION = (11, 5)
+
+
+class FLPFormatError(ValueError):
+    pass
+#end
+
+
+def _version_tuple(version):
+    parts = []
+    for part in version.split('.'):
+        if not part.isdigit():
+            break
+        #end
+        parts.append(int(part))
+    #end
+    return tuple(parts)
+#end
+
+
+def _decode_text(data, utf16):
+    if utf16:
+        text = data.decode('utf-16-le', 'replace')
+    else:
+        text = data.decode('cp1252', 'replace')
+    #end
+    return text.rstrip('\x00')
+#end
+
+
+def iter_flp_events(buf, offset, end, wanted):
+    # Walk the event stream in buf[offset:end] and yield (event_id, value) for the wanted ids.
+    # Fixed-size values are returned as ints, variable-size payloads as (start, stop) offsets.
+    while offset < end:
+        event_id = buf[offset]
+        offset += 1
+        if event_id < _WORD:
+            size = 1
+        elif event_id < _DWORD:
+            size = 2
+        elif event_id < _TEXT:
+            size = 4
+        else:
+            # 7-bit little-endian varint length prefix
+            size = 0
+            shift = 0
+            while True:
+                if offset >= end:
+                    return
+                #end
+                byte = buf[offset]
+                offset += 1
+                size |= (byte & 0x7F) << shift
+                shift += 7
+                if not byte & 0x80:
+                    break
+                #end
+            #end
+            if offset + size > end:
+                # truncated file: the payload is incomplete
+                return
+            #end
+            if event_id in wanted:
+                yield event_id, (offset, offset + size)
+            #end
+            offset += size
+            continue
+        #end
+        if offset + size > end:
+            return
+        #end
+        if event_id in wanted:
+            yield event_id, int.from_bytes(buf[offset:offset + size], 'little')
+        #end
+        offset += size
+    #end
+#end
+
+
+def parse_flp_buffer(buf):
+    # Parse a complete FLP file held in a bytes-like buffer (an mmap in practice).
+    if len(buf) < 14 or buf[0:4] != b'FLhd':
+        raise FLPFormatError("missing FLhd header")
+    #end
+    header_size = struct.unpack_from('<I', buf, 4)[0]
+    _, n_channels, ppq = struct.unpack_from('<hHH', buf, 8)
+    data_chunk = 8 + header_size
+    if buf[data_chunk:data_chunk + 4] != b'FLdt':
+        raise FLPFormatError("missing FLdt chunk")
+    #end
+    if len(buf) < data_chunk + 8:
+        raise FLPFormatError("truncated FLdt chunk header")
+    #end
+    data_size = struct.unpack_from('<I', buf, data_chunk + 4)[0]
+    start = data_chunk + 8
+    end = min(start + data_size, len(buf))
+
+    info = {
+        "version": "",
+        "title": "",
+        "artists": "",
+        "genre": "",
+        "tempo": None,
+        "time_signature": "",
+        "ppq": ppq,
+        "patterns": [],
+        "channels": [],
+        "plugins": [],
+    }
+    utf16 = False
+    numerator = beat = None
+    tempo_coarse = tempo_fine = None
+    pattern_names = {}
+    current_pattern = None
+    channel = None
+    plugin = None
+
+    for event_id, value in iter_flp_events(buf, start, end, _TEXT_EVENTS | _FIXED_EVENTS):
+        if event_id in _TEXT_EVENTS:
+            if event_id == EVENT_FL_VERSION:
+                # The version string itself is always single-byte text
+                info["version"] = _decode_text(bytes(buf[value[0]:value[1]]), False)
+                utf16 = _version_tuple(info["version"]) >= _UTF16_SINCE_VERSION
+                continue
+            #end
+            text = _decode_text(bytes(buf[value[0]:value[1]]), utf16)
+            if event_id == EVENT_PATTERN_NAME and current_pattern is not None:
+                pattern_names[current_pattern] = text
+            elif event_id == EVENT_TITLE:
+                info["title"] = text
+            elif event_id == EVENT_ARTISTS:
+                info["artists"] = text
+            elif event_id == EVENT_GENRE:
+                info["genre"] = text
+            elif event_id == EVENT_PLUGIN_INTERNAL_NAME:
+                # Starts the description of a generator or effect plugin instance
+                plugin = {"name": text, "internal_name": text}
+                info["plugins"].append(plugin)
+                if channel is not None and not channel["plugin"]:
+                    channel["plugin"] = text
+                #end
+            elif event_id in (EVENT_PLUGIN_NAME, EVENT_CHANNEL_NAME_OLD):
+                if plugin is not None:
+                    plugin["name"] = text
+                #end
+                if channel is not None and not channel["name"]:
+                    channel["name"] = text
+                #end
+            #end
+        elif event_id == EVENT_TEMPO:
+            info["tempo"] = value / 1000
+        elif event_id == EVENT_TEMPO_COARSE:
+            tempo_coarse = value
+        elif event_id == EVENT_TEMPO_FINE:
+            tempo_fine = value
+        elif event_id == EVENT_TIME_SIG_NUMERATOR:
+            numerator = value
+        elif event_id == EVENT_TIME_SIG_BEAT:
+            beat = value
+        elif event_id == EVENT_NEW_PATTERN:
+            current_pattern = value
+        elif event_id == EVENT_NEW_CHANNEL:
+            channel = {"index": value, "name": "", "plugin": ""}
+            info["channels"].append(channel)
+            plugin = None
+        #end
+    #end
+
+    if info["tempo"] is None and tempo_coarse is not None:
+        info["tempo"] = tempo_coarse + (tempo_fine or 0) / 1000
+    #end
+    if numerator and beat:
+        info["time_signature"] = f"{numerator}/{beat}"
+    #end
+    info["patterns"] = [pattern_names[index] for index in sorted(pattern_names)]
+    info["channel_count"] = n_channels
+    return info
+#end
+
+
+def parse_flp_file(daw_project_file):
+    # Memory-map an .flp file and parse it in place.
+    with open(daw_project_file, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return parse_flp_buffer(mm)
+        #end
+    #end
+#end
+
+
+## ==================== DAW parser entry point ================================
+def get_fl_studio_info(daw_project_file):
+    # Get information about a FL Studio project file.
+    if not daw_project_file.lower().endswith('.flp'):
+        return {}
+    #end
+
+    # FLP is a binary event stream; walk it in place through a memory map.
+    try:
+        info = parse_flp_file(daw_project_file)
+    except (OSError, ValueError) as err:
+        return {"daw_name": "FL Studio", "notes": f"FILE NOT READABLE: {err}"}
+    #end
+    return {"daw_name": "FL Studio", **info}
+#end
@@ -1,19 +1,11 @@
 import os
-import csv
+
+from directory_snapshot import DirectorySnapshot
+from daw_extension_registry import get_daw_registry
 
 def get_all_DAW_extensions():
-    # Get the directory where this script is located
-    dawINFO_csv = os.path.dirname(os.path.abspath(__file__))
-    dawINFO_csv = os.path.join(dawINFO_csv,'daw_info.csv')
-    extensions = []
-    with open(dawINFO_csv, 'r') as f:
-        reader = csv.reader(f)
-        next(reader) # skip header row
-        for row in reader:
-            extensions += row[1:]
-        #end
-    #end
-    return extensions
+    # All DAW extensions listed in daw_info.csv, in file order
+    return list(get_daw_registry().extensions)
 #end
 
 
@@ -31,9 +23,12 @@ def get_all_DAW_extensions():
 # .wma (Windows Media Audio)
 audio_extensions = ['.wav', '.flac', '.alac', '.aif', '.aiff', '.mp3', '.m4a', '.ogg', '.opus', '.wma']
 
-def get_list_of_audio_files(directory):
+def get_list_of_audio_files(directory, snapshot=None):
     # Get a list of all files in the directory with an audio extension
-    audio_files = [f for f in os.listdir(directory) if os.path.splitext(f)[1].lower() in audio_extensions]
+    if snapshot is None:
+        snapshot = DirectorySnapshot(directory)
+    #end
+    audio_files = [f for f in snapshot.listdir(directory) if os.path.splitext(f)[1].lower() in audio_extensions]
 
     # Return the list of audio files
     return audio_files
@@ -54,9 +49,12 @@ def get_list_of_audio_files(directory):
 # M4V (iTunes Video File)
 video_extensions = ['.mp4', '.avi', '.mov', '.wmv', '.flv', '.mkv', '.mpeg', '.webm', '.3gp', '.m4v']
 
-def get_list_of_video_files(directory):
+def get_list_of_video_files(directory, snapshot=None):
     # Get a list of all files in the directory with a video extension
-    video_file = [f for f in os.listdir(directory) if os.path.splitext(f)[1].lower() in video_extensions]
+    if snapshot is None:
+        snapshot = DirectorySnapshot(directory)
+    #end
+    video_file = [f for f in snapshot.listdir(directory) if os.path.splitext(f)[1].lower() in video_extensions]
 
     # Return the list of video files
     return video_file
@@ -78,10 +76,24 @@ def get_list_of_video_files(directory):
 # Score file extensions
 score_extensions = ['.pdf', '.mid', '.sib', '.musicxml', '.musx', '.ly', '.mscz', '.gpx', '.abc']
 
-def get_list_of_score_files(directory):
+def get_list_of_score_files(directory, snapshot=None):
     # Get a list of all files in the directory with a score extension
-    score_files = [f for f in os.listdir(directory) if os.path.splitext(f)[1].lower() in score_extensions]
+    if snapshot is None:
+        snapshot = DirectorySnapshot(directory)
+    #end
+    score_files = [f for f in snapshot.listdir(directory) if os.path.splitext(f)[1].lower() in score_extensions]
 
     # Return the list of score files
     return score_files
 #end
+
+## =--- Image file processing ---=##
+
+# PNG - Portable Network Graphics
+# JPEG - Joint Photographic Experts Group
+# GIF - Graphics Interchange Format
+# WebP - Google's image format
+# BMP - Windows bitmap
+
+# Image file extensions
+image_extensions = ['.png', '.jpg', '.jpeg', '.jpe', '.gif', '.webp', '.bmp', '.dib']
@@ -0,0 +1,248 @@
+"""
+Summary:
+Throttling of the scanner's file system access, so a scan does not starve the people
+working live off the same storage. Every directory listing and stat lookup (made through
+DirectorySnapshot, so by repository_handling.py and get_file_lists_by_type_module.py, and
+the direct ones of repository_handling.py and the project discovery) is wrapped in
+io_operation(); file content reads (video.url, the media hashing) call io_read(). Up to
+three limits apply:
+- a cap on operations per second and one on bytes read per second, each a token bucket;
+- an adaptive cap on the operations in flight (AIMD): whenever the average latency of
+  the listings and stat lookups is above a target, the cap is halved, and while it stays
+  below, the cap grows by one per interval. Worker threads beyond the cap wait, so the
+  effective concurrency of the scan follows the latency the storage delivers.
+
+The limits are per process. With --pool thread all projects share them. With --pool process
+the rate caps are divided evenly over the workers and the parent process, which keeps
+listing the archive meanwhile. Since a worker processes one project at a time, the adaptive
+cap is applied by the parent process to the projects in flight instead: every worker
+reports the average latency of its project's operations (io_latency_totals), and the parent
+submits a new project only while fewer than its AdaptiveLimiter's limit (at most --jobs) are
+running (see process_project_directories). With --jobs 1 only the threads of --async-walk
+add concurrency for the cap to limit; without them one operation is in flight, the minimum.
+Until configure_io_throttle is called io_operation returns a shared no-op context manager
+and io_read does nothing.
+The clock and sleep functions can be replaced (see tests/test_io_throttle.py).
+
+License: MIT License
+"""
+
+import time
+import threading
+
+## =-------------------------------------------------------------------=##
+
+DEFAULT_MAX_CONCURRENCY = 16
+# Seconds between two adjustments of the adaptive concurrency cap
+ADJUST_INTERVAL = 0.5
+# Weight of the newest latency sample in the moving average
+LATENCY_SMOOTHING = 0.2
+
+
+class TokenBucket:
+    # At most rate units per second on average, with bursts of up to capacity units.
+
+    def __init__(self, rate, capacity=None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.clock = clock
+        self.sleep = sleep
+        self._tokens = self.capacity
+        self._last = clock()
+        # Seconds callers were told to wait, in total
+        self.waited = 0.0
+        self._lock = threading.Lock()
+    #end
+
+    def _reserve(self, n):
+        # Take n tokens (the balance may go negative) and return how long the caller has to wait.
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # A request larger than the bucket waits for a full bucket, not forever
+            wait = max(0.0, min(n, self.capacity) - self._tokens) / self.rate
+            self._tokens -= n
+            self.waited += wait
+            return wait
+        #end
+    #end
+
+    def acquire(self, n=1):
+        # Block until n units may be used; returns the seconds waited.
+        wait = self._reserve(n)
+        if wait > 0:
+            self.sleep(wait)
+        #end
+        return wait
+    #end
+#end
+
+
+class AdaptiveLimiter:
+    # Cap on the operations in flight, adjusted to keep their latency at target_latency.
+
+    def __init__(self, target_latency, max_limit=DEFAULT_MAX_CONCURRENCY, min_limit=1,
+                 interval=ADJUST_INTERVAL, clock=time.monotonic):
+        self.target_latency = target_latency
+        self.max_limit = max_limit
+        self.min_limit = min_limit
+        self.interval = interval
+        self.clock = clock
+        self.limit = max_limit
+        self.latency = None
+        self.in_flight = 0
+        # Operations released and their summed latency, for io_latency_totals
+        self.operations = 0
+        self.total_latency = 0.0
+        self._last_adjustment = clock()
+        self._condition = threading.Condition()
+    #end
+
+    def acquire(self):
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            #end
+            self.in_flight += 1
+        #end
+    #end
+
+    def release(self, latency=None):
+        # End an operation that took latency seconds, and adjust the cap at most once per interval.
+        # Without a latency (nothing was measured) the cap is left as it is.
+        with self._condition:
+            self.in_flight -= 1
+            if latency is not None:
+                self.operations += 1
+                self.total_latency += latency
+                self.observe(latency)
+            #end
+            self._condition.notify_all()
+        #end
+    #end
+
+    def observe(self, latency):
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += LATENCY_SMOOTHING * (latency - self.latency)
+        #end
+        now = self.clock()
+        if now - self._last_adjustment < self.interval:
+            return
+        #end
+        self._last_adjustment = now
+        if self.latency > self.target_latency:
+            # Multiplicative decrease: back off quickly when the storage is struggling
+            self.limit = max(self.min_limit, self.limit // 2)
+        elif self.limit < self.max_limit:
+            # Additive increase: probe for capacity again once the latency has recovered
+            self.limit += 1
+        #end
+    #end
+#end
+
+
+class IOThrottle:
+
+    def __init__(self, ops_per_second=None, bytes_per_second=None, target_latency=None,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, clock=time.monotonic, sleep=time.sleep):
+        self.clock = clock
+        self.ops = TokenBucket(ops_per_second, clock=clock, sleep=sleep) if ops_per_second else None
+        self.bytes = TokenBucket(bytes_per_second, clock=clock, sleep=sleep) if bytes_per_second else None
+        self.limiter = AdaptiveLimiter(target_latency, max_concurrency, clock=clock) if target_latency else None
+        # Operation start times are per thread: one IOThrottle is entered by all threads of the process
+        self._local = threading.local()
+    #end
+
+    def __enter__(self):
+        if self.ops is not None:
+            self.ops.acquire()
+        #end
+        if self.limiter is not None:
+            self.limiter.acquire()
+        #end
+        self._local.start = self.clock()
+        return self
+    #end
+
+    def __exit__(self, *exc_info):
+        if self.limiter is not None:
+            self.limiter.release(self.clock() - self._local.start)
+        #end
+        return False
+    #end
+
+    def read(self, n):
+        # Account for n bytes read.
+        if self.bytes is not None:
+            self.bytes.acquire(n)
+        #end
+    #end
+
+    def waited(self):
+        # Seconds spent waiting for the rate caps, summed over all threads.
+        return sum(bucket.waited for bucket in (self.ops, self.bytes) if bucket is not None)
+    #end
+#end
+
+
+class _NullOperation:
+    def __enter__(self):
+        return self
+    #end
+
+    def __exit__(self, *exc_info):
+        return False
+    #end
+#end
+
+
+_NULL_OPERATION = _NullOperation()
+_io_throttle = None
+
+
+def configure_io_throttle(ops_per_second=None, bytes_per_second=None, target_latency=None,
+                          max_concurrency=DEFAULT_MAX_CONCURRENCY):
+    # Enable the process-wide throttle (without any limit it is disabled). Called once per worker process.
+    global _io_throttle
+    if ops_per_second or bytes_per_second or target_latency:
+        _io_throttle = IOThrottle(ops_per_second, bytes_per_second, target_latency, max_concurrency)
+    else:
+        _io_throttle = None
+    #end
+    return _io_throttle
+#end
+
+
+def get_io_throttle():
+    return _io_throttle
+#end
+
+
+def io_latency_totals():
+    # (operations, summed latency in seconds) timed by the adaptive cap of this process so far,
+    # or None without one. The difference of two readings gives the average latency in between.
+    throttle = _io_throttle
+    if throttle is None or throttle.limiter is None:
+        return None
+    #end
+    return throttle.limiter.operations, throttle.limiter.total_latency
+#end
+
+
+def io_operation():
+    # Context manager around one directory listing or stat lookup.
+    throttle = _io_throttle
+    return _NULL_OPERATION if throttle is None else throttle
+#end
+
+
+def io_read(nbytes):
+    # Account for nbytes bytes of file content read; a read beyond the rate makes the next one wait.
+    throttle = _io_throttle
+    if throttle is not None:
+        throttle.read(nbytes)
+    #end
+#end
@@ -0,0 +1,167 @@
+"""
+Summary:
+Streaming JSON output for the project database files.
+iter_json_chunks produces the text of json.dump(value, indent=4) chunk by chunk, where
+StreamedDict and StreamedList values are filled from iterators while they are written:
+the directory tree and file list of a project are walked as they are serialised instead
+of being built in memory first. The JSON is written once, to a temporary file that is
+renamed into place, and further copies are hard links (or reflinks, or plain copies
+across file systems) that are renamed into place too, so no reader ever sees a
+partially written file.
+
+A file that already holds the same bytes is left untouched (compared by size first, then by
+content digest), so unchanged projects do not get new mtimes that backup and sync tools
+would pick up.
+
+License: MIT License
+"""
+
+import os
+import json
+import shutil
+import hashlib
+
+## =-------------------------------------------------------------------=##
+
+INDENT = 4
+CHUNK_SIZE = 1024 * 1024
+# Linux FICLONE ioctl: share the extents of a file (Btrfs, XFS, ...)
+FICLONE = 0x40049409
+
+
+class StreamedDict:
+    # A JSON object whose (key, value) items come from an iterable, consumed while writing.
+    def __init__(self, items):
+        self.items = items
+    #end
+#end
+
+
+class StreamedList:
+    # A JSON array whose items come from an iterable, consumed while writing.
+    def __init__(self, items):
+        self.items = items
+    #end
+#end
+
+
+def iter_json_chunks(value, level=0):
+    # Chunks of json.dumps(value, indent=4) for a value starting on a line indented at level.
+    # Streamed values can be nested in streamed values, or be the values of a top-level dict.
+    if level == 0 and isinstance(value, dict):
+        value = StreamedDict(value.items())
+    #end
+    if isinstance(value, StreamedDict):
+        opening, closing = "{", "}"
+        items = ((json.dumps(key) + ": ", item) for key, item in value.items)
+    elif isinstance(value, StreamedList):
+        opening, closing = "[", "]"
+        items = (("", item) for item in value.items)
+    elif isinstance(value, (dict, list, tuple)):
+        # Plain containers are encoded at once, their lines shifted to the current level
+        yield json.dumps(value, indent=INDENT).replace("\n", "\n" + " " * (INDENT * level))
+        return
+    else:
+        # Scalars through the default (cached) encoder
+        yield json.dumps(value)
+        return
+    #end
+    item_indent = "\n" + " " * (INDENT * (level + 1))
+    empty = True
+    for prefix, item in items:
+        yield (opening if empty else ",") + item_indent + prefix
+        yield from iter_json_chunks(item, level + 1)
+        empty = False
+    #end
+    # An empty container is written as {} or []
+    yield opening + closing if empty else "\n" + " " * (INDENT * level) + closing
+#end
+
+
+def _file_digest(filename):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filename, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(block)
+        #end
+    #end
+    return digest.digest()
+#end
+
+
+def same_file_content(filename, other_filename):
+    # Whether two files hold the same bytes: the same file, else equal sizes and then equal digests.
+    try:
+        st, other_st = os.stat(filename), os.stat(other_filename)
+    except OSError:
+        return False
+    #end
+    if (st.st_dev, st.st_ino) == (other_st.st_dev, other_st.st_ino):
+        return True
+    #end
+    if st.st_size != other_st.st_size:
+        return False
+    #end
+    return _file_digest(filename) == _file_digest(other_filename)
+#end
+
+
+def write_json_file(filename, data, chunks=None):
+    # Write data like json.dump(data, f, indent=4) plus a newline, via a temporary file.
+    # Returns "written", or "unchanged" when the file already held these bytes (it is not touched).
+    # The written text is also appended, chunk by chunk, to the optional chunks list.
+    temp_filename = filename + ".tmp"
+    with open(temp_filename, 'w') as f:
+        for chunk in iter_json_chunks(data):
+            f.write(chunk)
+            if chunks is not None:
+                chunks.append(chunk)
+            #end
+        #end
+        f.write("\n")
+    #end
+    if same_file_content(temp_filename, filename):
+        os.remove(temp_filename)
+        return "unchanged"
+    #end
+    os.replace(temp_filename, filename)
+    return "written"
+#end
+
+
+def _reflink(source, destination):
+    # Copy-on-write clone of source, where the platform and file system support it.
+    import fcntl
+    with open(source, 'rb') as src, open(destination, 'wb') as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    #end
+    shutil.copystat(source, destination)
+#end
+
+
+def place_file(source, destination):
+    # Atomically place a copy of source at destination: a hard link on the same file system,
+    # else a reflink, else a copy. Returns the method used: "link", "reflink" or "copy", or
+    # "unchanged" when destination already held the same bytes (it is not touched).
+    if same_file_content(source, destination):
+        return "unchanged"
+    #end
+    temp_filename = destination + ".tmp"
+    if os.path.lexists(temp_filename):
+        os.remove(temp_filename)
+    #end
+    try:
+        os.link(source, temp_filename)
+        method = "link"
+    except OSError:
+        try:
+            _reflink(source, temp_filename)
+            method = "reflink"
+        except (ImportError, OSError):
+            shutil.copy2(source, temp_filename)
+            method = "copy"
+        #end
+    #end
+    os.replace(temp_filename, destination)
+    return method
+#end
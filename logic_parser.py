@@ -0,0 +1,39 @@
+"""
+Summary:
+Logic Pro X project parser, loaded by the DAW parser registry in daw_file_processor.py
+the first time a Logic project is seen.
+
+License: MIT License
+"""
+
+import plistlib
+
+## =-------------------------------------------------------------------=##
+
+# Bump when the extracted information changes; invalidates this parser's parse-cache entries
+PARSER_VERSION = 1
+
+# Logic Pro X
+def get_logic_pro_x_info(daw_project_file):
+    # Get information about a Logic Pro X project file.
+    if not daw_project_file.lower().endswith('.logicx'):
+        return {}
+    #end
+
+    # Parse the project file using the plistlib module.
+    with open(daw_project_file, 'rb') as f:
+        plist = plistlib.load(f)
+
+        # Get the tempo and time signature of the project.
+        tempo = plist['Tempo']
+        time_signature = f"{plist['NumericalTimeSignature'][0]}/{plist['NumericalTimeSignature'][1]}"
+
+        # Get the markers of the project.
+        markers = []
+        for marker in plist['Markers']:
+            markers.append({"name": marker['Name'], "time": marker['Time']})
+        #end
+
+        return {"daw_name": "Logic Pro X", "tempo": tempo, "time_signature": time_signature, "markers": markers}
+    #end
+#end
@@ -14,38 +14,212 @@ License: MIT License
 
 import os
 import json
+import sys
 import argparse
-import csv
 import time
 import uuid
-import shutil
+import traceback
+from collections import deque
 
 from daw_file_processor import *
 from repository_handling import *
+from directory_snapshot import DirectorySnapshot
+from daw_extension_registry import get_daw_registry
+from audio_probe import probe_audio_files
+from waveform_peaks import update_peaks_file, PEAKS_EXTENSION
+from content_hashing import hash_files, get_digest_cache, build_duplicate_report, write_duplicate_report, \
+                            DIGEST_CACHE_FILENAME
+from thumbnails import update_thumbnail_preview, PREVIEW_SUFFIX
+from compact_inventory import build_inventory
+from consolidation import ConsolidatedWriter, to_ndjson_line, ONEFILE_FORMATS
+from uuid_registry import UuidRegistry
+from async_walk import prefetch_snapshot, DEFAULT_WALK_CONCURRENCY
+from io_throttle import configure_io_throttle, get_io_throttle, io_operation, io_latency_totals, AdaptiveLimiter, \
+                        DEFAULT_MAX_CONCURRENCY
+from profiling import enable_profiling, disable_profiling, begin_project, end_project, stage, profiled_iter, \
+                      write_profile_report
+from json_writer import StreamedDict, StreamedList, write_json_file, place_file
+from parse_cache import configure_parse_cache, get_parse_cache, DEFAULT_CACHE_FILENAME
 
 
+# Database file names are f'{DATABASE_PREFIX}.{project root}.{uuid}.json'
+DATABASE_PREFIX = "DAW-REPO"
+# Incremental scan bookkeeping kept in the output directory
+MANIFEST_FILENAME = "incremental_manifest.json"
+# Directories (besides hidden ones) that are never processed or descended into
+IGNORED_DIRECTORY_NAMES = ['backup', 'backups', 'do_not_process']
+
 ## =-------------------------------------------------------------------=##
 
-def update_or_create_json_file(prjPath):
+class ProjectOptions:
+    # What is extracted and written for every project of a run. Built once (see ProjectScanner)
+    # and passed as is to the workers.
+    # With peaks, the waveform peaks of the stereo mixdown are (re)computed next to the JSON file;
+    # with hash_media, the content digests of the media files are added to the JSON data;
+    # with a thumbnail_size, a thumbnail larger than that gets a cached, downscaled preview.
+    # inventory selects how the project files are listed: "classic" ("directory_tree" and
+    # "filepath_list"), "compact" (the "inventory" path table, see compact_inventory.py) or "both".
+    # With an onefile_format ("json" or "ndjson"), the JSON text is kept for the consolidated file.
+    # async_walk is the concurrency of the concurrent project walker (see async_walk.py), None to not use it.
+
+    def __init__(self, peaks=False, hash_media=False, thumbnail_size=None, inventory="classic",
+                 onefile_format=None, async_walk=None):
+        self.peaks = peaks
+        self.hash_media = hash_media
+        self.thumbnail_size = thumbnail_size
+        self.inventory = inventory
+        self.onefile_format = onefile_format
+        self.async_walk = async_walk
+    #end
+
+    def output_options(self):
+        # The options that change what is written for a project, kept in its manifest record:
+        # an incremental run with other options rebuilds the project even when it is unchanged.
+        return {"peaks": bool(self.peaks), "hash_media": bool(self.hash_media),
+                "thumbnail_size": self.thumbnail_size, "inventory": self.inventory}
+    #end
+#end
+
+def update_or_create_json_file(prjPath, outdir, snapshot=None, options=None, stats=None, project_uuid=None):
+    # options is the run's ProjectOptions (the defaults without it).
+    # project_uuid is the UUID assigned by the UUID registry; without it, the UUID of the JSON copy
+    # in the project directory is reused. A copy with another UUID is reported as "uuid_conflict".
+    # The outcome of these optional stages, and the number of JSON files written and skipped
+    # (identical content), is stored in the optional stats dictionary.
+
+    if options is None:
+        options = ProjectOptions()
+    #end
 
     # Locate or create the database file name
-    prefix = "DAW-REPO"
+    prefix = DATABASE_PREFIX
     rood_dir = get_project_root(prjPath)
     ext = "json"
+    # List the project directory once and share the snapshot with every extractor
+    if snapshot is None:
+        snapshot = DirectorySnapshot(prjPath)
+    #end
     # Create a JSON file containing information about a prjPath directory.
-    UID = find_existing_uuid(prjPath, f'{prefix}.{rood_dir}.*.{ext}')
-    if not UID:
-        UID = str(uuid.uuid4())
+    with stage("uuid"):
+        existing_uuid = find_existing_uuid(prjPath, f'{prefix}.{rood_dir}.*.{ext}', snapshot)
+    #end
+    UID = project_uuid or existing_uuid or str(uuid.uuid4())
+    if stats is not None and existing_uuid and existing_uuid != UID:
+        stats["uuid_conflict"] = existing_uuid
     #end
-    json_filename = os.path.join(args.outdir, f'{prefix}.{rood_dir}.{UID}.{ext}')
+    json_filename = os.path.join(outdir, f'{prefix}.{rood_dir}.{UID}.{ext}')
 
     # Get other Parameters
-    mod_time = os.path.getmtime(prjPath)
+    mod_time = snapshot.getmtime()
     upload_date = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(mod_time))
-    daw_project_filename = get_project_name(prjPath)
+    with stage("media_lookup"):
+        daw_project_filename = get_project_name(prjPath, snapshot)
+    #end
     full_project_file_path = (os.path.join(prjPath, daw_project_filename))#os.path.abspath
     full_project_file_path = full_project_file_path.replace("\\", "/")
 
+    # Probe the audio headers of the mixdown and the stems in one bounded batch
+    with stage("media_lookup"):
+        stereo_mixdown = get_stereo_mix(prjPath,[rood_dir,daw_project_filename.split(".")[0]], snapshot)
+        stems = get_stems(prjPath, ["stems", "render"], snapshot)
+        stem_files = get_stem_files(prjPath, stems, snapshot)
+    #end
+    with stage("audio_probe"):
+        audio_info = probe_audio_files([os.path.join(prjPath, f) for f in [stereo_mixdown] + stem_files if f])
+    #end
+    stereo_mixdown_info = audio_info.pop(0) if stereo_mixdown else {}
+
+    # Waveform peaks of the mixdown, skipped when its mtime and size are unchanged.
+    # "waveform_peaks" is only written when this stage ran ("" when it failed).
+    peaks_fields = {}
+    if options.peaks and stereo_mixdown:
+        peaks_filename = f'{prefix}.{rood_dir}.{UID}.{PEAKS_EXTENSION}'
+        try:
+            with stage("peaks"):
+                peaks_info = update_peaks_file(os.path.join(prjPath, stereo_mixdown),
+                                               os.path.join(outdir, peaks_filename))
+            #end
+        except (ImportError, OSError, ValueError) as err:
+            peaks_info = {"status": "failed", "bytes": 0, "seconds": 0.0, "notes": f'{type(err).__name__}: {err}'}
+        #end
+        peaks_fields["waveform_peaks"] = peaks_filename if peaks_info["status"] in ("computed", "unchanged") else ""
+        if stats is not None:
+            stats["peaks"] = peaks_info
+        #end
+    #end
+
+    # Downscaled preview of a large thumbnail, remade only when the thumbnail's mtime changes.
+    # "thumbnail_preview" is only written when this stage ran ("" when the thumbnail is small or failed).
+    with stage("thumbnail"):
+        thumbnail = get_project_thumbnail(prjPath, snapshot)
+    #end
+    preview_fields = {}
+    if options.thumbnail_size and thumbnail:
+        preview_filename = f'{prefix}.{rood_dir}.{UID}.{PREVIEW_SUFFIX}'
+        try:
+            with stage("thumbnail"):
+                preview_status = update_thumbnail_preview(os.path.join(prjPath, thumbnail),
+                                                          os.path.join(outdir, preview_filename),
+                                                          options.thumbnail_size)
+            #end
+        except (ImportError, OSError, ValueError) as err:
+            preview_status = f'failed: {type(err).__name__}: {err}'
+        #end
+        preview_fields["thumbnail_preview"] = preview_filename if preview_status in ("created", "unchanged") else ""
+        if stats is not None:
+            stats["thumbnail_preview"] = preview_status
+        #end
+    #end
+
+    # Content digests of the media files; unchanged files come from the digest cache unread.
+    # "media_digests" is only written with hash_media, so {} always means "no media files".
+    digest_fields = {}
+    if options.hash_media:
+        media_digests = {}
+        media_files = []
+        with stage("media_lookup"):
+            for relative_path, full_path in get_media_files(prjPath, snapshot):
+                try:
+                    media_files.append((relative_path, full_path, snapshot.stat(full_path)))
+                except OSError:
+                    # e.g. a broken symbolic link
+                    continue
+                #end
+            #end
+        #end
+        with stage("hashing"):
+            digests, hash_stats = hash_files([(full_path, st) for _, full_path, st in media_files],
+                                             get_digest_cache(os.path.join(outdir, DIGEST_CACHE_FILENAME)))
+        #end
+        for (relative_path, _, st), digest in zip(media_files, digests):
+            media_digests[relative_path] = {"digest": digest, "size": st.st_size}
+        #end
+        digest_fields["media_digests"] = media_digests
+        if stats is not None:
+            stats["hashing"] = hash_stats
+            stats["media_digests"] = media_digests
+        #end
+    #end
+
+    # The project file listing, in the classic layout and/or the compact one.
+    # The classic views are streamed: the tree and the list are walked while the JSON is written.
+    file_inventory = {}
+    if options.inventory != "compact":
+        file_inventory["directory_tree"] = StreamedDict(profiled_iter("tree", iter_directory_tree(prjPath, snapshot)))
+        file_inventory["filepath_list"] = StreamedList(profiled_iter("filepath_list",
+                                                                     iter_filepath_list(prjPath, snapshot=snapshot)))
+    #end
+    if options.inventory != "classic":
+        with stage("inventory"):
+            file_inventory["inventory"] = build_inventory(prjPath, snapshot)
+        #end
+    #end
+    with stage("media_lookup"):
+        video = get_video_file_with_keywords(prjPath, snapshot=snapshot)
+        score = get_score_file(prjPath, snapshot)
+    #end
+    daw_project_info = get_daw_project_info(full_project_file_path)
+
     # Compose the dictionary for the database file
     data = {
         "uuid": UID, # Add this line to generate a unique identifier
@@ -55,80 +229,630 @@ def update_or_create_json_file(prjPath):
         "song": rood_dir,# Or piece name
         "style": "generic",
         "upload_date": upload_date,
-        "thumbnail": get_project_thumbnail(prjPath),
+        "thumbnail": thumbnail,
+        **preview_fields,
         "intention": "",
         "root": rood_dir,
         "daw_project_filename": daw_project_filename,
         "relative_path": get_relative_path(prjPath),
-        "directory_tree": get_directory_tree_asDictionary(prjPath),
-        "filepath_list":  get_filepath_list(prjPath),
-        "stereo_mixdown": get_stereo_mix(prjPath,[rood_dir,daw_project_filename.split(".")[0]]),
-        "stems": get_stems(prjPath, ["stems", "render"]),
-        "video": get_video_file_with_keywords(prjPath),
-        "score": get_score_file(prjPath),
+        **file_inventory,
+        "stereo_mixdown": stereo_mixdown,
+        "stereo_mixdown_info": stereo_mixdown_info,
+        "stems": stems,
+        "stems_info": [{"file": f, **info} for f, info in zip(stem_files, audio_info)],
+        **peaks_fields,
+        **digest_fields,
+        "video": video,
+        "score": score,
         "lyrics":"",
-        "daw_project_info": get_daw_project_info(full_project_file_path)
+        "daw_project_info": daw_project_info
     }
     
-    # Open and save the file
-    with open(json_filename, 'w') as f:
-        json.dump(data, f, indent=4)
-        f.write("\n")
+    # Write the file once, then link (or copy) it into the original project directory.
+    # Files that already hold the same bytes are left untouched.
+    with stage("write"):
+        chunks = [] if options.onefile_format else None
+        outcomes = [write_json_file(json_filename, data, chunks)]
+        destination_filename = os.path.join(prjPath, f'{prefix}.{rood_dir}.{UID}.{ext}')
+        prj_stat = os.stat(prjPath)
+        outcomes.append(place_file(json_filename, destination_filename))
+        if outcomes[-1] != "unchanged":
+            # Renaming the copy into place touches the project directory; keep its mtime (the upload date)
+            try:
+                os.utime(prjPath, ns=(prj_stat.st_atime_ns, prj_stat.st_mtime_ns))
+            except OSError:
+                pass
+            #end
+        #end
+    #end
+    if stats is not None:
+        unchanged = outcomes.count("unchanged")
+        stats["json_writes"] = {"written": len(outcomes) - unchanged, "skipped": unchanged}
+        if options.onefile_format:
+            json_text = "".join(chunks)
+            stats["json_text"] = to_ndjson_line(json_text) if options.onefile_format == "ndjson" else json_text
+        #end
     #end
 
-    # Copy the JSON file to the original project directory
-    destination_filename = os.path.join(prjPath, f'{prefix}.{rood_dir}.{UID}.{ext}')
-    shutil.copy2(json_filename, destination_filename)
-    
-    print(f'Processed directory: {prjPath}    <+==+>    {json_filename}')
+    return json_filename
 #end
 
-## =-------------------------------------------------------------------=##
+def process_project_directory(prjPath, outdir, options=None, incremental=False, previous=None, project_uuid=None):
+    # Worker entry point for a single project directory.
+    # Errors are caught and returned so one broken project cannot stop the whole run.
+    # In incremental mode the project is skipped when its fingerprint and the output options
+    # match the previous manifest record and the previous JSON file still exists.
+    # With options.async_walk (a concurrency), the project directory is listed by the concurrent
+    # walker (see async_walk.py) before anything reads it.
+    result = {"project": prjPath, "json_filename": None, "error": None, "status": None, "fingerprint": None}
+    io_totals = io_latency_totals()
+    cache = get_parse_cache()
+    if cache is not None:
+        hits, misses = cache.thread_stats()
+    #end
+    if options is None:
+        options = ProjectOptions()
+    #end
+    begin_project()
+    try:
+        snapshot = DirectorySnapshot(prjPath)
+        if options.async_walk:
+            with stage("async_walk"):
+                # The stat results are only needed by the fingerprint, compact inventory and hashing
+                prefetch_snapshot(snapshot, options.async_walk,
+                                  incremental or options.inventory != "classic" or options.hash_media)
+            #end
+        #end
+        if incremental:
+            pattern = f'{DATABASE_PREFIX}.{get_project_root(prjPath)}.*.json'
+            with stage("fingerprint"):
+                result["fingerprint"] = get_project_fingerprint(prjPath, pattern, snapshot)
+            #end
+            result["output_options"] = options.output_options()
+            if previous and previous["fingerprint"] == result["fingerprint"] \
+                    and previous.get("output_options") == result["output_options"] \
+                    and os.path.isfile(previous["json_filename"]):
+                result["json_filename"] = previous["json_filename"]
+                result["status"] = "skipped"
+                if options.hash_media:
+                    # The duplicate report covers unchanged projects too; the matching output options
+                    # guarantee the previous JSON was written with the digests
+                    with open(previous["json_filename"], 'r') as f:
+                        result["media_digests"] = json.load(f)["media_digests"]
+                    #end
+                #end
+                return _end_project(result, io_totals)
+            #end
+        #end
+        stats = {}
+        result["json_filename"] = update_or_create_json_file(prjPath, outdir, snapshot, options, stats, project_uuid)
+        result.update(stats)
+        result["status"] = "updated" if previous else "new"
+    except Exception as err:
+        result["error"] = f'{type(err).__name__}: {err}'
+        result["traceback"] = traceback.format_exc()
+    #end
+    if cache is not None:
+        # Parse cache use of this project, summed up by the parent process
+        thread_hits, thread_misses = cache.thread_stats()
+        result["parse_cache"] = {"hits": thread_hits - hits, "misses": thread_misses - misses}
+    #end
+    return _end_project(result, io_totals)
+#end
 
-def read_daw_info():
-    # This function reads the daw_info.csv and returns a dictionary
-    # where the key is the DAW name and the value is a list of extensions for that DAW.
-    
-    # Get the directory where this script is located
-    dawINFO_csv = os.path.dirname(os.path.abspath(__file__))
-    dawINFO_csv = os.path.join(dawINFO_csv,'daw_info.csv')
+def _end_project(result, io_totals=None):
+    # Attach the project's profile (with --profile) to its result, and with the adaptive I/O cap
+    # the average latency of the I/O operations made meanwhile ("io_latency", see io_throttle.py).
+    profile = end_project()
+    if profile is not None:
+        result["profile"] = profile
+    #end
+    if io_totals is not None:
+        operations, seconds = io_latency_totals()
+        if operations > io_totals[0]:
+            result["io_latency"] = (seconds - io_totals[1]) / (operations - io_totals[0])
+        #end
+    #end
+    return result
+#end
+
+def _init_worker(parser_plugins, parse_cache_options, profile=False, io_throttle_options=None):
+    # Per-process setup: plugin parsers, the parse cache (each process opens its own connection),
+    # the --profile instrumentation and the I/O throttle. Each of the last three is set from this
+    # run's options, None (or False) turning it off, so a run never inherits an earlier run's setup.
+    load_parser_plugins(parser_plugins)
+    configure_parse_cache(*(parse_cache_options or (None,)))
+    if profile:
+        enable_profiling()
+    else:
+        disable_profiling()
+    #end
+    configure_io_throttle(*(io_throttle_options or ()))
+#end
+
+def reset_process_state():
+    # Turn the parse cache, the --profile instrumentation and the I/O throttle of this process
+    # off again, as before any run. Registered parser plugins stay registered.
+    _init_worker((), None)
+#end
 
-    daw_info = {}
-    with open(dawINFO_csv, 'r') as file:
-        reader = csv.reader(file)
-        next(reader)  # skip header
-        for row in reader:
-            daw_name = row[0]
-            extensions = [ext.lower() for ext in row[1:]]
-            daw_info[daw_name] = extensions
+def process_project_directories(directories, outdir, jobs=1, pool="process", manifest=None, parser_plugins=(),
+                                parse_cache_options=None, options=None, uuid_registry=None, profile=False,
+                                io_throttle_options=None, project_limiter=None):
+    # Process the project directories and yield one result per directory, in input order.
+    # Passing the manifest of a previous run (see load_manifest) enables incremental mode.
+    # parser_plugins are modules registering extra DAW parsers; they are imported in every worker.
+    # parse_cache_options are the configure_parse_cache arguments (cache file, max bytes, content hash).
+    # options is the ProjectOptions of every project (what is extracted and written).
+    # With a uuid_registry (see uuid_registry.py), the project UUIDs are assigned here, before submission.
+    # With profile, every result carries the project's "profile" (see profiling.py).
+    # io_throttle_options are the configure_io_throttle arguments (operations and bytes per second,
+    # target latency, maximum concurrency); with process workers, this process and every worker
+    # get an equal share of the rate caps (see split_io_throttle_options).
+    # With a project_limiter (an AdaptiveLimiter, used with --jobs), at most its limit projects are
+    # submitted at a time, and every result's "io_latency" adjusts the limit: the adaptive I/O cap
+    # across worker processes.
+    incremental = manifest is not None
+    projects = manifest["projects"] if incremental else {}
+    worker_throttle_options = None
+    if pool == "process" and jobs > 1:
+        io_throttle_options, worker_throttle_options = split_io_throttle_options(io_throttle_options, jobs)
+    #end
+    _init_worker(parser_plugins, parse_cache_options, profile, io_throttle_options)
+    if jobs <= 1:
+        for prjPath in directories:
+            previous = projects.get(os.path.abspath(prjPath))
+            yield process_project_directory(prjPath, outdir, options, incremental, previous,
+                                            _assign_uuid(uuid_registry, prjPath))
         #end
+        return
+    #end
+
+    # Imported here: the pools are only needed with --jobs and cost ~20 ms of startup
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+    if pool == "process":
+        executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                                       initargs=(tuple(parser_plugins), parse_cache_options, profile,
+                                                 worker_throttle_options))
+    else:
+        executor = ThreadPoolExecutor(max_workers=jobs)
+    #end
+    with executor:
+        # Keep a bounded window of submitted work so results can be yielded
+        # in order while the remaining directories are still being consumed.
+        pending = deque()
+        for prjPath in directories:
+            previous = projects.get(os.path.abspath(prjPath))
+            if project_limiter is not None:
+                # Never waits: the window below keeps the projects in flight under the limit
+                project_limiter.acquire()
+            #end
+            future = executor.submit(process_project_directory, prjPath, outdir, options, incremental, previous,
+                                     _assign_uuid(uuid_registry, prjPath))
+            pending.append((prjPath, future))
+            while len(pending) >= (2 * jobs if project_limiter is None else project_limiter.limit):
+                yield _collect_result(*pending.popleft(), project_limiter)
+            #end
+        #end
+        while pending:
+            yield _collect_result(*pending.popleft(), project_limiter)
+        #end
+    #end
+#end
+
+def split_io_throttle_options(io_throttle_options, jobs):
+    # The (parent, worker) throttle options of a run with jobs worker processes. The parent keeps
+    # listing the archive and looking up UUIDs while the workers run, so the rate caps are split
+    # evenly over jobs + 1 processes; the concurrency cap over the workers.
+    if io_throttle_options is None:
+        return None, None
+    #end
+    ops_per_second, bytes_per_second, target_latency, max_concurrency = io_throttle_options
+    ops_per_second = ops_per_second and ops_per_second / (jobs + 1)
+    bytes_per_second = bytes_per_second and bytes_per_second / (jobs + 1)
+    return ((ops_per_second, bytes_per_second, target_latency, max_concurrency),
+            (ops_per_second, bytes_per_second, target_latency, max(1, max_concurrency // jobs)))
+#end
+
+def _assign_uuid(uuid_registry, prjPath):
+    # The registry's UUID for a project, falling back on its JSON copy for projects it does not know.
+    # A copied project folder gets a new UUID; the JSON copy it inherited is removed, so it is
+    # neither listed with the project's files nor reported as a "uuid_conflict" in every later run.
+    if uuid_registry is None:
+        return None
+    #end
+    pattern = f'{DATABASE_PREFIX}.{get_project_root(prjPath)}.*.json'
+    n_duplicates = len(uuid_registry.duplicates)
+    try:
+        project_uuid = uuid_registry.assign(prjPath, lambda: find_existing_uuid(prjPath, pattern))
+    except OSError:
+        # An unreadable project directory fails in its worker, with the error reported there
+        return None
+    #end
+    if len(uuid_registry.duplicates) > n_duplicates:
+        reused_uuid = uuid_registry.duplicates[-1][1]
+        _remove_stale_copy(prjPath, f'{DATABASE_PREFIX}.{get_project_root(prjPath)}.{reused_uuid}.json')
+    #end
+    return project_uuid
+#end
+
+def _remove_stale_copy(prjPath, filename):
+    # Remove a JSON copy of another project from a project directory, keeping the directory's mtime
+    # (the upload date). A copy that cannot be removed is left to the worker's "uuid_conflict" report.
+    try:
+        prj_stat = os.stat(prjPath)
+        os.remove(os.path.join(prjPath, filename))
+        os.utime(prjPath, ns=(prj_stat.st_atime_ns, prj_stat.st_mtime_ns))
+    except OSError:
+        pass
+    #end
+#end
+
+def _collect_result(prjPath, future, project_limiter=None):
+    # Failures of the pool itself (e.g. a crashed worker process) are reported per project too.
+    try:
+        result = future.result()
+    except Exception as err:
+        result = {"project": prjPath, "json_filename": None, "error": f'{type(err).__name__}: {err}',
+                  "status": None, "fingerprint": None}
+    #end
+    if project_limiter is not None:
+        project_limiter.release(result.get("io_latency"))
+    #end
+    return result
+#end
+
+def load_manifest(outdir):
+    # Load the incremental scan manifest: absolute project path -> fingerprint, output options and JSON file.
+    manifest_filename = os.path.join(outdir, MANIFEST_FILENAME)
+    if not os.path.isfile(manifest_filename):
+        return {"version": 1, "projects": {}}
+    #end
+    with open(manifest_filename, 'r') as f:
+        return json.load(f)
+    #end
+#end
+
+def update_manifest(manifest, result):
+    # Record the fingerprint and output options of a successfully processed project.
+    if result["error"] is None and result["fingerprint"] is not None:
+        manifest["projects"][os.path.abspath(result["project"])] = {
+            "fingerprint": result["fingerprint"],
+            "output_options": result["output_options"],
+            "json_filename": result["json_filename"],
+        }
+    #end
+#end
+
+def save_manifest(outdir, manifest):
+    # Write the manifest atomically so an interrupted run never leaves a broken file.
+    manifest_filename = os.path.join(outdir, MANIFEST_FILENAME)
+    with open(manifest_filename + ".tmp", 'w') as f:
+        json.dump(manifest, f, indent=4)
+        f.write("\n")
     #end
-    return daw_info
+    os.replace(manifest_filename + ".tmp", manifest_filename)
+#end
+
+## =-------------------------------------------------------------------=##
+
+def is_ignored_directory(directory):
+    # Check if the deepest directory level is hidden or in the user-defined ignore list
+    # (of the absolute path, so '.', '..' and a trailing separator name the directory itself)
+    deepest_directory = os.path.basename(os.path.abspath(directory))
+    # deepest_directory = directory.split('/')[-1]
+    return deepest_directory.startswith('.') or deepest_directory.lower() in IGNORED_DIRECTORY_NAMES
 #end
 
 def locate_project_directories(directories):
     # Prune a list of directory paths based on certain criteria.
     pruned_directories = []
-    daw_info = read_daw_info()
+    registry = get_daw_registry()
     for directory in directories:
-        # Check if the deepest directory level is hidden
-        deepest_directory = os.path.basename(directory)
-        # deepest_directory = directory.split('/')[-1]
-        if deepest_directory.startswith('.'):
-            # Ignore hidden directories
-            continue
-        # Ignore directories specified in the user-defined list
-        elif deepest_directory.lower() in ['backup', 'backups', 'do_not_process']:
+        if is_ignored_directory(directory):
             continue
         #end
         # Check if the directory contains a project file
-        if check_for_project_directory(directory, daw_info):
+        if check_for_project_directory(directory, registry):
             pruned_directories.append(directory)
         #end
     #end
     return pruned_directories
 #end
 
+def iter_project_directories(rootPath, max_depth=1):
+    # Find project directories below rootPath and yield each one as soon as it is found,
+    # so processing can start while discovery is still running.
+    # max_depth=1 only looks at the direct children of rootPath (the original --autolist);
+    # larger values descend e.g. artist/year/album. Hidden and ignored directories are
+    # pruned before descending, and a project directory is never descended into.
+    registry = get_daw_registry()
+
+    def _subdirectories(path):
+        try:
+            with io_operation(), os.scandir(path) as it:
+                entries = list(it)
+            #end
+        except OSError:
+            return [], False
+        #end
+        is_project = any(registry.is_project_file(entry.name) for entry in entries)
+        subdirectories = []
+        if not is_project:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                #end
+                if is_dir and not is_ignored_directory(entry.name):
+                    subdirectories.append(os.path.join(path, entry.name))
+                #end
+            #end
+        #end
+        return subdirectories, is_project
+    #end
+
+    def _descend(directory, depth):
+        subdirectories, is_project = _subdirectories(directory)
+        if is_project:
+            yield directory
+        elif depth < max_depth:
+            for subdirectory in subdirectories:
+                yield from _descend(subdirectory, depth + 1)
+            #end
+        #end
+    #end
+
+    # The root itself is not a candidate, only the directories below it
+    for directory in _subdirectories(rootPath)[0]:
+        yield from _descend(directory, 1)
+    #end
+#end
+
+## =-------------------------------------------------------------------=##
+
+class ProjectScanner:
+    # Importable form of the command line. Scans the project directories found below several
+    # roots (and/or given directly) into one output directory, in one process: one worker pool,
+    # one UUID registry and incremental manifest, and the per-process caches (DAW registry,
+    # parse cache, digest cache) are shared by all roots. The options are those of the command
+    # line; log receives the progress and summary lines (None to keep quiet).
+
+    def __init__(self, outdir="database_files", jobs=1, pool="process", depth=1, incremental=False,
+                 parser_plugins=(), parse_cache=None, parse_cache_size=512, parse_cache_hash=False, peaks=False,
+                 hash_media=False, thumbnail_size=None, inventory="classic", onefile=None, onefile_format="json",
+                 shard_size=None, profile=False, async_walk=None, max_io_ops=None, max_io_mb=None,
+                 io_target_latency=None, io_max_concurrency=DEFAULT_MAX_CONCURRENCY, log=print):
+        self.outdir = outdir
+        self.jobs = jobs
+        self.pool = pool
+        self.depth = depth
+        self.incremental = incremental
+        self.parser_plugins = tuple(parser_plugins)
+        self.onefile = onefile
+        self.onefile_format = onefile_format
+        self.shard_size = shard_size
+        self.profile = profile
+        self.options = ProjectOptions(peaks, hash_media, thumbnail_size, inventory,
+                                      onefile_format if onefile else None, async_walk)
+        self.log = log or (lambda line: None)
+        # io_target_latency is in milliseconds, like the command line option
+        self.io_throttle_options = None
+        if max_io_ops or max_io_mb or io_target_latency:
+            self.io_throttle_options = (max_io_ops, max_io_mb and max_io_mb * 1024 * 1024,
+                                        io_target_latency and io_target_latency / 1000, io_max_concurrency)
+        #end
+        # parse_cache is a cache file name, or "" for the default one in the output directory
+        self.parse_cache_options = None
+        if parse_cache is not None:
+            self.parse_cache_options = (parse_cache or os.path.join(outdir, DEFAULT_CACHE_FILENAME),
+                                        int(parse_cache_size * 1024 * 1024), parse_cache_hash)
+        #end
+    #end
+
+    def iter_project_directories(self, roots=(), directories=()):
+        # The project directories below every root (see iter_project_directories), then the given ones.
+        for root in roots:
+            yield from iter_project_directories(root, self.depth)
+        #end
+        yield from locate_project_directories(directories)
+    #end
+
+    def run(self, roots=(), directories=()):
+        # Process every project directory and return the run summary: the counts printed at the
+        # end and the failed results ("failed").
+        os.makedirs(self.outdir, exist_ok=True)
+        self.manifest = load_manifest(self.outdir) if self.incremental else None
+        self.uuid_registry = UuidRegistry(self.outdir)
+        # A worker process handles one project at a time, so with --pool process the adaptive
+        # I/O cap limits the projects in flight, from here (see io_throttle.py)
+        self.project_limiter = None
+        if self.io_throttle_options is not None and self.io_throttle_options[2] and self.jobs > 1 \
+                and self.pool == "process":
+            self.project_limiter = AdaptiveLimiter(self.io_throttle_options[2], max_limit=self.jobs)
+        #end
+        self.onefile_writer = None
+        if self.onefile:
+            # Projects are appended to the consolidated file as their results arrive
+            self.onefile_writer = ConsolidatedWriter(os.path.join(self.outdir, self.onefile), self.onefile_format,
+                                                     int(self.shard_size * 1024 * 1024) if self.shard_size else None)
+        #end
+        self.summary = {
+            "processed": 0,
+            "failed": [],
+            "status": {"new": 0, "updated": 0, "skipped": 0},
+            "json_files": {"written": 0, "skipped": 0},
+            "parse_cache": {"hits": 0, "misses": 0},
+            "peaks": {"computed": 0, "unchanged": 0, "unsupported": 0, "failed": 0, "bytes": 0, "seconds": 0.0},
+            "thumbnail_previews": {"created": 0, "unchanged": 0, "small": 0, "failed": 0},
+            "hashing": {"hashed": 0, "cached": 0, "bytes": 0, "seconds": 0.0},
+        }
+        self.project_digests = {}
+        self.project_profiles = {}
+        try:
+            # Discovery is a generator: projects are processed while the walk continues
+            for result in process_project_directories(self.iter_project_directories(roots, directories),
+                                                     self.outdir, self.jobs, self.pool, self.manifest,
+                                                     self.parser_plugins, self.parse_cache_options, self.options,
+                                                     self.uuid_registry, self.profile, self.io_throttle_options,
+                                                     self.project_limiter):
+                self._add_result(result)
+            #end
+            self._finish()
+        finally:
+            # The parse cache, profiling and I/O throttle are process globals; leave none of them on
+            reset_process_state()
+        #end
+        return self.summary
+    #end
+
+    def _add_result(self, result):
+        summary = self.summary
+        summary["processed"] += 1
+        for key, count in result.get("parse_cache", {}).items():
+            summary["parse_cache"][key] += count
+        #end
+        if "peaks" in result:
+            summary["peaks"][result["peaks"]["status"]] += 1
+            summary["peaks"]["bytes"] += result["peaks"]["bytes"]
+            summary["peaks"]["seconds"] += result["peaks"]["seconds"]
+            if result["peaks"]["status"] == "failed":
+                self.log(f'Waveform peaks failed: {result["project"]}    <!==!>    {result["peaks"]["notes"]}')
+            #end
+        #end
+        for key, count in result.get("json_writes", {}).items():
+            summary["json_files"][key] += count
+        #end
+        for key, count in result.get("hashing", {}).items():
+            summary["hashing"][key] += count
+        #end
+        if "thumbnail_preview" in result:
+            summary["thumbnail_previews"][result["thumbnail_preview"].split(':')[0]] += 1
+            if result["thumbnail_preview"].startswith("failed"):
+                self.log(f'Thumbnail preview failed: {result["project"]}    <!==!>    {result["thumbnail_preview"]}')
+            #end
+        #end
+        if "media_digests" in result:
+            self.project_digests[result["project"]] = result["media_digests"]
+        #end
+        if "profile" in result:
+            self.project_profiles[result["project"]] = result["profile"]
+        #end
+        if "uuid_conflict" in result:
+            self.log(f'UUID conflict: {result["project"]}    <!==!>    holds a JSON copy with UUID '
+                     f'{result["uuid_conflict"]}; the registered UUID is used')
+        #end
+        if result["error"] is None:
+            summary["status"][result["status"]] += 1
+            if result["status"] == "skipped":
+                self.log(f'Unchanged directory: {result["project"]}    <+==+>    {result["json_filename"]}')
+            else:
+                self.log(f'Processed directory: {result["project"]}    <+==+>    {result["json_filename"]}')
+            #end
+            if self.manifest is not None:
+                update_manifest(self.manifest, result)
+            #end
+            if self.onefile_writer is not None:
+                json_text = result.pop("json_text", None)
+                if json_text is None:
+                    # Skipped (unchanged) projects: their JSON file is the only copy of the data
+                    with open(result["json_filename"], 'r') as f:
+                        json_text = f.read()
+                    #end
+                    if self.onefile_format == "ndjson":
+                        json_text = to_ndjson_line(json_text)
+                    #end
+                #end
+                self.onefile_writer.add(json_text)
+            #end
+        else:
+            summary["failed"].append(result)
+            self.log(f'Failed directory: {result["project"]}    <!==!>    {result["error"]}')
+        #end
+    #end
+
+    def _finish(self):
+        # Save the run's bookkeeping and log the summary lines.
+        summary = self.summary
+        log = self.log
+        if self.manifest is not None:
+            save_manifest(self.outdir, self.manifest)
+            status_counts = summary["status"]
+            log(f'Incremental scan: {status_counts["new"]} new, {status_counts["updated"]} updated, '
+                f'{status_counts["skipped"]} skipped')
+        #end
+        write_counts = summary["json_files"]
+        log(f'JSON files: {write_counts["written"]} written, {write_counts["skipped"]} skipped (identical content)')
+        uuid_registry = self.uuid_registry
+        uuid_registry.save()
+        for prjPath, reused_uuid, owner, new_uuid in uuid_registry.duplicates:
+            log(f'Duplicate UUID: {prjPath}    <!==!>    copy of {owner} ({reused_uuid}), assigned {new_uuid}')
+        #end
+        log(f'UUID registry: {len(uuid_registry.projects)} projects, {len(uuid_registry.duplicates)} duplicate '
+            f'UUIDs reassigned    <+==+>    {uuid_registry.filename}')
+        if self.parse_cache_options is not None:
+            cache_counts = summary["parse_cache"]
+            lookups = cache_counts["hits"] + cache_counts["misses"]
+            hit_rate = 100 * cache_counts["hits"] / lookups if lookups else 0
+            log(f'Parse cache: {cache_counts["hits"]} hits, {cache_counts["misses"]} misses '
+                f'({hit_rate:.0f}% hit rate) in {self.parse_cache_options[0]}')
+        #end
+        if self.options.peaks:
+            peaks_counts = summary["peaks"]
+            throughput = peaks_counts["bytes"] / 1e6 / peaks_counts["seconds"] if peaks_counts["seconds"] else 0
+            log(f'Waveform peaks: {peaks_counts["computed"]} computed, {peaks_counts["unchanged"]} unchanged, '
+                f'{peaks_counts["unsupported"]} unsupported, {peaks_counts["failed"]} failed '
+                f'({peaks_counts["bytes"] / 1e6:.1f} MB of samples at {throughput:.0f} MB/s)')
+        #end
+        if self.options.thumbnail_size:
+            preview_counts = summary["thumbnail_previews"]
+            log(f'Thumbnail previews: {preview_counts["created"]} created, {preview_counts["unchanged"]} unchanged, '
+                f'{preview_counts["small"]} small enough, {preview_counts["failed"]} failed')
+        #end
+        if self.options.hash_media:
+            hash_counts = summary["hashing"]
+            report = build_duplicate_report(self.project_digests)
+            report_filename = write_duplicate_report(self.outdir, report)
+            throughput = hash_counts["bytes"] / 1e6 / hash_counts["seconds"] if hash_counts["seconds"] else 0
+            log(f'Media hashing: {hash_counts["hashed"]} files hashed ({hash_counts["bytes"] / 1e6:.1f} MB at '
+                f'{throughput:.0f} MB/s), {hash_counts["cached"]} from the digest cache')
+            log(f'Duplicate media: {len(report["duplicate_groups"])} groups, '
+                f'{report["reclaimable_bytes"] / 1e6:.1f} MB of {report["total_bytes"] / 1e6:.1f} MB reclaimable '
+                f'by deduplication    <+==+>    {report_filename}')
+        #end
+        if self.profile:
+            report_filenames = write_profile_report(self.outdir, self.project_profiles)
+            log(f'Profile: {len(self.project_profiles)} projects    <+==+>    {", ".join(report_filenames)}')
+        #end
+        io_throttle = get_io_throttle()
+        if self.io_throttle_options is not None and io_throttle is not None:
+            if self.project_limiter is not None:
+                limit = (f', projects in flight capped at {self.project_limiter.limit} of '
+                         f'{self.project_limiter.max_limit}')
+            elif io_throttle.limiter is not None:
+                limit = f', concurrency cap {io_throttle.limiter.limit}'
+            else:
+                limit = ''
+            #end
+            log(f'I/O throttle: {io_throttle.waited():.1f} s waited for the rate caps (summed over the threads '
+                f'of this process){limit}')
+        #end
+        failed = summary["failed"]
+        if failed:
+            log(f'{len(failed)} of {summary["processed"]} project directories failed:')
+            for result in failed:
+                log(result.get("traceback", result["error"]))
+            #end
+        #end
+        if self.onefile_writer is not None:
+            onefile_names = self.onefile_writer.close()
+            log(f'Consolidated file: {sum(shard["projects"] for shard in self.onefile_writer.shards)} projects in '
+                f'{len(self.onefile_writer.shards)} file(s)    <+==+>    {onefile_names[-1]}')
+        #end
+    #end
+#end
+
 ## =-------------------------------------------------------------------=##
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Process directories.')
@@ -136,42 +860,74 @@ if __name__ == '__main__':
                         help='output directory for the database files')
     parser.add_argument('--onefile', metavar='filename', type=str,
                         help='save all JSON data to a single file')
-    parser.add_argument('--autolist', metavar='dir', type=str,
-                        help='automatically find subdirectories of the given path')
+    parser.add_argument('--onefile-format', choices=ONEFILE_FORMATS, default='json',
+                        help='format of the --onefile file: a JSON array or one JSON object per line (ndjson)')
+    parser.add_argument('--shard-size', metavar='MB', type=float,
+                        help='split the --onefile output into shards of about MB megabytes, listed in a manifest')
+    parser.add_argument('--autolist', metavar='dir', type=str, action='append', default=[],
+                        help='automatically find project directories below the given path (repeatable)')
+    parser.add_argument('--depth', metavar='N', type=int, default=1,
+                        help='how many directory levels below --autolist to search for projects')
+    parser.add_argument('--jobs', metavar='N', type=int, default=1,
+                        help='number of projects to process in parallel')
+    parser.add_argument('--pool', choices=['process', 'thread'], default='process',
+                        help='worker pool type used when --jobs is greater than 1')
+    parser.add_argument('--incremental', action='store_true',
+                        help='skip projects that have not changed since the previous run')
+    parser.add_argument('--parser-plugin', metavar='module', action='append', default=[],
+                        help='import a module that registers additional DAW parsers (repeatable)')
+    parser.add_argument('--parse-cache', metavar='file', nargs='?', const='',
+                        help='cache extracted DAW project info in a SQLite file '
+                             f'(default: {DEFAULT_CACHE_FILENAME} in the output directory)')
+    parser.add_argument('--parse-cache-size', metavar='MB', type=float, default=512,
+                        help='size budget of the parse cache; least recently used entries are evicted')
+    parser.add_argument('--parse-cache-hash', action='store_true',
+                        help='also validate parse cache entries against a hash of the project file content')
+    parser.add_argument('--peaks', action='store_true',
+                        help='precompute waveform peaks of WAV/AIFF stereo mixdowns (requires NumPy)')
+    parser.add_argument('--hash-media', action='store_true',
+                        help='add content digests of the audio/video files to the JSON and write a '
+                             'cross-project duplicate report to the output directory')
+    parser.add_argument('--thumbnail-size', metavar='px', type=int,
+                        help='write a cached JPEG preview of at most px pixels for larger thumbnails (requires Pillow)')
+    parser.add_argument('--inventory', choices=['classic', 'compact', 'both'], default='classic',
+                        help='layout of the project file listing: directory_tree and filepath_list (classic), '
+                             'the compact path table (compact) or both')
+    parser.add_argument('--profile', action='store_true',
+                        help='time every extraction stage and count listings, stats, opens and bytes read per '
+                             'project; writes profile_report.json/.csv to the output directory')
+    parser.add_argument('--async-walk', metavar='N', type=int, nargs='?', const=DEFAULT_WALK_CONCURRENCY,
+                        help='list every project directory with up to N concurrent directory calls before it is '
+                             f'processed, for high-latency network file systems (default: {DEFAULT_WALK_CONCURRENCY})')
+    parser.add_argument('--max-io-ops', metavar='N', type=float,
+                        help='at most N directory listings and stat lookups per second, to spare shared storage')
+    parser.add_argument('--max-io-mb', metavar='MB', type=float,
+                        help='read at most MB megabytes of file content per second (video links, media hashing)')
+    parser.add_argument('--io-target-latency', metavar='ms', type=float,
+                        help='adapt the number of concurrent listings and stat lookups to keep their average '
+                             'latency below ms milliseconds (halved above it, grown by one below it)')
+    parser.add_argument('--io-max-concurrency', metavar='N', type=int, default=DEFAULT_MAX_CONCURRENCY,
+                        help='upper bound of the adaptive concurrency of --io-target-latency')
+    parser.add_argument('directories', metavar='dir', type=str, nargs='*',
+                        help='project directories to process (without --autolist; default: the current directory)')
     args = parser.parse_args()
 
-    # Create the output directory if it doesn't exist
-    os.makedirs(args.outdir, exist_ok=True)
-
+    scanner = ProjectScanner(args.outdir, jobs=args.jobs, pool=args.pool, depth=args.depth,
+                             incremental=args.incremental, parser_plugins=args.parser_plugin,
+                             parse_cache=args.parse_cache, parse_cache_size=args.parse_cache_size,
+                             parse_cache_hash=args.parse_cache_hash, peaks=args.peaks, hash_media=args.hash_media,
+                             thumbnail_size=args.thumbnail_size, inventory=args.inventory, onefile=args.onefile,
+                             onefile_format=args.onefile_format, shard_size=args.shard_size, profile=args.profile,
+                             async_walk=args.async_walk, max_io_ops=args.max_io_ops, max_io_mb=args.max_io_mb,
+                             io_target_latency=args.io_target_latency, io_max_concurrency=args.io_max_concurrency)
     if args.autolist:
-        directories = [os.path.join(args.autolist, d) for d in os.listdir(args.autolist) if os.path.isdir(os.path.join(args.autolist, d))]
-        pruned_directories = locate_project_directories(directories)
+        summary = scanner.run(roots=args.autolist, directories=args.directories)
     else:
-        parser.add_argument('directories', metavar='dir', type=str, nargs='+',
-                            help='an integer for the accumulator')
-        args = parser.parse_args()
-        pruned_directories = locate_project_directories(args.directories)
-    #end
-
-    for directory in pruned_directories:
-        # Create a new JSON file or update it for each directory
-        update_or_create_json_file(directory)
+        # An absolute path: '.' itself would be pruned as a hidden directory
+        summary = scanner.run(directories=args.directories or [os.path.abspath(os.curdir)])
     #end
 
-    if args.onefile:
-        # Combine all JSON data into a single file
-        output_filename = os.path.join(args.outdir, args.onefile)
-        json_data = []
-        for directory in pruned_directories:
-            json_filename = os.path.join(args.outdir, f'{get_project_root(directory)}.json')
-            with open(json_filename, 'r') as f:
-                data = json.load(f)
-                json_data.append(data)
-            #end
-        #end
-        with open(output_filename, 'w') as f:
-            json.dump(json_data, f, indent=4)
-            f.write("\n")
-        #end
+    if summary["failed"]:
+        sys.exit(1)
     #end
-#end
\ No newline at end of file
+#end
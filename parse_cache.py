@@ -0,0 +1,183 @@
+"""
+Summary:
+On-disk cache of extracted DAW project information (the 'daw_project_info' dict).
+Entries are stored in a SQLite file, one row per project file, keyed by the file's
+absolute path and validated against its (size, mtime_ns) fingerprint, an optional
+content hash, and the version of the parser that produced it. Bumping a parser's
+PARSER_VERSION therefore only invalidates the entries of that parser's DAW(s).
+Once the stored values exceed the size budget, the least recently used entries are
+evicted. SQLite's locking makes the cache safe to share between worker processes.
+
+License: MIT License
+"""
+
+import os
+import json
+import hashlib
+import threading
+
+## =-------------------------------------------------------------------=##
+
+DEFAULT_CACHE_FILENAME = "parse_cache.sqlite"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    daw TEXT NOT NULL,
+    parser_version TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    value TEXT NOT NULL,
+    nbytes INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used);
+"""
+
+
+def hash_file_content(filename):
+    # Chunked blake2b digest of a file's content.
+    digest = hashlib.blake2b(digest_size=16)
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+        #end
+    #end
+    return digest.hexdigest()
+#end
+
+
+class ParseCache:
+
+    def __init__(self, cache_filename, max_bytes=DEFAULT_MAX_BYTES, content_hash=False):
+        self.cache_filename = cache_filename
+        self.max_bytes = max_bytes
+        self.content_hash = content_hash
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._connection = None
+        self._checked_daws = set()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    #end
+
+    def _connect(self):
+        # One connection per cache object, opened on first use (after forking into a worker).
+        if self._connection is None:
+            import sqlite3
+            connection = sqlite3.connect(self.cache_filename, timeout=60, isolation_level=None,
+                                         check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+            self._connection = connection
+        #end
+        return self._connection
+    #end
+
+    def thread_stats(self):
+        # Hit/miss counters of the calling thread; used to attribute cache use to one project.
+        return getattr(self._local, 'hits', 0), getattr(self._local, 'misses', 0)
+    #end
+
+    def _count(self, hit):
+        self._local.hits = getattr(self._local, 'hits', 0) + hit
+        self._local.misses = getattr(self._local, 'misses', 0) + (not hit)
+        with self._lock:
+            self.hits += hit
+            self.misses += not hit
+        #end
+    #end
+
+    def get_or_parse(self, daw_project_file, daw_name, parser_version, parse):
+        # Return the cached info of daw_project_file, or parse it and store the result.
+        import time
+        path = os.path.abspath(daw_project_file)
+        st = os.stat(path)
+        content_hash = hash_file_content(path) if self.content_hash else ""
+        parser_version = str(parser_version)
+        if daw_name not in self._checked_daws:
+            # First project of this DAW: drop what older/newer versions of its parser stored
+            self.invalidate_daw(daw_name, parser_version)
+            self._checked_daws.add(daw_name)
+        #end
+
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT daw, parser_version, size, mtime_ns, content_hash, value FROM entries WHERE path = ?",
+                (path,)).fetchone()
+        #end
+        if row is not None and row[:5] == (daw_name, parser_version, st.st_size, st.st_mtime_ns, content_hash):
+            with self._lock:
+                self._connect().execute("UPDATE entries SET last_used = ? WHERE path = ?", (time.time(), path))
+            #end
+            self._count(True)
+            return json.loads(row[5])
+        #end
+
+        self._count(False)
+        info = parse(daw_project_file)
+        value = json.dumps(info)
+        with self._lock:
+            connection = self._connect()
+            connection.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (path, daw_name, parser_version, st.st_size, st.st_mtime_ns, content_hash,
+                 value, len(value), time.time()))
+            self._evict(connection)
+        #end
+        return info
+    #end
+
+    def _evict(self, connection):
+        # Drop least recently used entries until the stored values fit the size budget.
+        total = connection.execute("SELECT COALESCE(SUM(nbytes), 0) FROM entries").fetchone()[0]
+        while total > self.max_bytes:
+            path, nbytes = connection.execute(
+                "SELECT path, nbytes FROM entries ORDER BY last_used LIMIT 1").fetchone()
+            connection.execute("DELETE FROM entries WHERE path = ?", (path,))
+            total -= nbytes
+            self.evictions += 1
+        #end
+    #end
+
+    def invalidate_daw(self, daw_name, current_version):
+        # Remove the entries of one DAW written by another parser version.
+        with self._lock:
+            self._connect().execute("DELETE FROM entries WHERE daw = ? AND parser_version != ?",
+                                    (daw_name, str(current_version)))
+        #end
+    #end
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        #end
+    #end
+#end
+
+
+## =-------------------------------------------------------------------=##
+# Process-wide cache used by daw_file_processor.get_daw_project_info, off until configured.
+
+_parse_cache = None
+
+
+def configure_parse_cache(cache_filename, max_bytes=DEFAULT_MAX_BYTES, content_hash=False):
+    # Enable the process-wide cache (None disables it). Called once per worker process.
+    global _parse_cache
+    if _parse_cache is not None:
+        _parse_cache.close()
+    #end
+    _parse_cache = ParseCache(cache_filename, max_bytes, content_hash) if cache_filename else None
+    return _parse_cache
+#end
+
+
+def get_parse_cache():
+    return _parse_cache
+#end
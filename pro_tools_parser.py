@@ -0,0 +1,88 @@
+"""
+Summary:
+Pro Tools project parser, loaded by the DAW parser registry in daw_file_processor.py
+the first time a Pro Tools project is seen. Needs the optional aaf2 package.
+
+License: MIT License
+"""
+
+import aaf2
+
+## =-------------------------------------------------------------------=##
+
+# Bump when the extracted information changes; invalidates this parser's parse-cache entries
+PARSER_VERSION = 1
+
+# Pro Tools
+def get_pro_tools_info(daw_project_file):
+    # Get information about a Pro Tools project file.
+    if not daw_project_file.lower().endswith('.ptx'):
+        return {}
+    #end
+
+    # Parse the project file using the AAF SDK for Pro Tools.
+    with aaf2.open(daw_project_file, 'r') as f:
+        if not f:
+            return {}
+        #end
+
+        # Get the tempo and time signature of the project.
+        tempo = f.metadict()['Application Tape Name'].value
+        time_signature = f.metadict()['Start Time'].value
+
+        # Get the markers of the project.
+        markers = []
+        for track in f.content.toplevel()['Timecode Tracks'].values():
+            for edit in track['Segment'].values():
+                if 'Comment' in edit['ComponentData'].keys():
+                    markers.append({"name": edit['ComponentData']['Comment'].value, "time": edit['ComponentData']['Position'].value})
+                #end
+            #end
+        #end
+
+        return {"daw_name": "Pro Tools", "tempo": tempo, "time_signature": time_signature, "markers": markers}
+    #end
+#end
+
+
+# Pro Tools
+def get_pro_tools_info2(daw_project_file):
+    # Get information about a Pro Tools project file.
+    if not daw_project_file.lower().endswith('.ptx'):
+        return {}
+    #end
+
+    # Parse the project file using the Pro Tools SDK.
+    try:
+        import avid
+    except ImportError:
+        return {}
+    #end
+
+    project = avid.AvidProject()
+    if not project.load(daw_project_file):
+        return {}
+    #end
+
+    # Get the tempo and time signature of the project.
+    tempo = project.get_tempo()
+    time_signature = f"{project.get_time_signature_numerator()}/{project.get_time_signature_denominator()}"
+
+    # Get the markers of the project.
+    markers = []
+    for i in range(project.get_num_markers()):
+        marker_name = project.get_marker_name(i)
+        marker_time = project.get_marker_time(i)
+        markers.append({"name": marker_name, "time": marker_time})
+    #end
+
+    # Get a list of all plugins in the project.
+    plugin_list = []
+    for i in range(project.get_num_plugins()):
+        plugin_name = project.get_plugin_name(i)
+        plugin_params = project.get_plugin_parameters(i)
+        plugin_list.append({"name": plugin_name, "parameters": plugin_params})
+    #end
+
+    return {"daw_name": "Pro Tools", "tempo": tempo, "time_signature": time_signature, "markers": markers, "plugin_list": plugin_list}
+#end
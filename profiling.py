@@ -0,0 +1,315 @@
+"""
+Summary:
+Per-project instrumentation behind --profile: wall time per extraction stage and counts of
+directory listings, stat lookups, file opens and bytes read, written as a JSON and a CSV
+report of the slowest projects and the hottest stages.
+
+Stages nest, and each one is charged only its own (exclusive) time, so the stage times of a
+project add up to its total; "other" is what no stage covers. Streamed values (the directory
+tree and file list written while the JSON is serialised) are timed per item with
+profiled_iter. Only real system calls are counted: directory listings and opens by an audit
+hook; stat calls, which raise no audit event, by wrapping os.stat and os.lstat (and with them
+os.path.isfile, getmtime, ...) while profiling, DirectorySnapshot's cache misses included.
+Lookups served from the snapshot's cache are not counted. Bytes read come from /proc/self/io
+(Linux; a per-process figure, so with --pool thread and --jobs > 1 concurrent projects
+overlap). Counters are kept per thread: the opens and stats of the audio
+probe and hashing pool threads are in the bytes read, not in "open" and "stat".
+
+Until enable_profiling is called the module does nothing: stage returns a shared no-op
+context manager, profiled_iter its argument, and neither the audit hook nor the stat
+wrappers are installed. disable_profiling returns to that state: it restores os.stat and
+os.lstat, and the audit hook, which cannot be removed, returns at once.
+
+License: MIT License
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import threading
+
+## =-------------------------------------------------------------------=##
+
+PROFILE_REPORT_FILENAME = "profile_report"
+SLOWEST_PROJECTS = 20
+COUNTERS = ("listdir", "stat", "open", "bytes_read")
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+    #end
+
+    def __exit__(self, *exc_info):
+        return False
+    #end
+#end
+
+
+_NULL_STAGE = _NullStage()
+_enabled = False
+_audit_hook_added = False
+# os.stat and os.lstat while profiling is off
+_real_stat = None
+_real_lstat = None
+_state = threading.local()
+
+
+def _read_bytes():
+    # Bytes read by this process (rchar: read and pread calls, page cache hits included), or None.
+    try:
+        with open('/proc/self/io', 'rb') as f:
+            for line in f:
+                if line.startswith(b'rchar:'):
+                    return int(line.split()[1])
+                #end
+            #end
+        #end
+    except OSError:
+        pass
+    #end
+    return None
+#end
+
+
+def _audit(event, args):
+    # Audit hooks cannot be removed, so this one stays installed and does nothing once disabled
+    if not _enabled:
+        return
+    #end
+    profile = getattr(_state, 'profile', None)
+    if profile is None:
+        return
+    #end
+    if event == 'open':
+        profile.counts["open"] += 1
+    elif event == 'os.scandir' or event == 'os.listdir':
+        profile.counts["listdir"] += 1
+    #end
+#end
+
+
+def _counted_stat(function):
+    # Wrap os.stat or os.lstat to count the calls made on a profiled thread.
+    def counted_stat(*args, **kwargs):
+        profile = getattr(_state, 'profile', None)
+        if profile is not None:
+            profile.counts["stat"] += 1
+        #end
+        return function(*args, **kwargs)
+    #end
+    return counted_stat
+#end
+
+
+class ProjectProfile:
+    # Exclusive time per stage and the counters of one project, on one thread.
+
+    def __init__(self):
+        self.stages = {}
+        self.counts = dict.fromkeys(COUNTERS, 0)
+        self._stack = []
+        self._bytes_start = _read_bytes()
+        self._start = time.perf_counter()
+    #end
+
+    def _switch(self, now):
+        # Charge the time since the last switch to the innermost running stage.
+        if self._stack:
+            name = self._stack[-1][0]
+            self.stages[name] = self.stages.get(name, 0.0) + now - self._stack[-1][1]
+        #end
+    #end
+
+    def enter(self, name):
+        now = time.perf_counter()
+        self._switch(now)
+        self._stack.append([name, now])
+    #end
+
+    def exit(self):
+        now = time.perf_counter()
+        self._switch(now)
+        self._stack.pop()
+        if self._stack:
+            self._stack[-1][1] = now
+        #end
+    #end
+
+    def finish(self):
+        total = time.perf_counter() - self._start
+        bytes_end = _read_bytes()
+        if self._bytes_start is not None and bytes_end is not None:
+            self.counts["bytes_read"] = bytes_end - self._bytes_start
+        #end
+        stages = {name: round(seconds, 6) for name, seconds in self.stages.items()}
+        stages["other"] = round(max(0.0, total - sum(self.stages.values())), 6)
+        return {"seconds": round(total, 6), "stages": stages, "counts": self.counts}
+    #end
+#end
+
+
+class _Stage:
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+    #end
+
+    def __enter__(self):
+        self.profile.enter(self.name)
+        return self
+    #end
+
+    def __exit__(self, *exc_info):
+        self.profile.exit()
+        return False
+    #end
+#end
+
+
+def enable_profiling():
+    # Turn the instrumentation on for this process (in every worker process too).
+    global _enabled, _audit_hook_added, _real_stat, _real_lstat
+    if not _enabled:
+        if not _audit_hook_added:
+            sys.addaudithook(_audit)
+            _audit_hook_added = True
+        #end
+        _real_stat, _real_lstat = os.stat, os.lstat
+        os.stat = _counted_stat(os.stat)
+        os.lstat = _counted_stat(os.lstat)
+        _enabled = True
+    #end
+#end
+
+
+def disable_profiling():
+    # Turn the instrumentation off again: restore os.stat and os.lstat and stop counting.
+    global _enabled
+    if _enabled:
+        os.stat, os.lstat = _real_stat, _real_lstat
+        _enabled = False
+    #end
+    _state.profile = None
+#end
+
+
+def begin_project():
+    # Start profiling the project processed by the calling thread.
+    if _enabled:
+        _state.profile = ProjectProfile()
+    #end
+#end
+
+
+def end_project():
+    # Stop profiling the calling thread's project and return its profile (None when disabled).
+    profile = getattr(_state, 'profile', None)
+    if profile is None:
+        return None
+    #end
+    _state.profile = None
+    return profile.finish()
+#end
+
+
+def stage(name):
+    # Context manager charging the enclosed time to a stage of the current project.
+    if not _enabled:
+        return _NULL_STAGE
+    #end
+    profile = getattr(_state, 'profile', None)
+    return _NULL_STAGE if profile is None else _Stage(profile, name)
+#end
+
+
+def count(name, n=1):
+    # Add to a counter of the current project.
+    if _enabled:
+        profile = getattr(_state, 'profile', None)
+        if profile is not None:
+            profile.counts[name] += n
+        #end
+    #end
+#end
+
+
+def profiled_iter(name, iterable):
+    # Charge the time spent producing every item of iterable to a stage.
+    if not _enabled:
+        return iterable
+    #end
+    return _profiled_items(name, iterable)
+#end
+
+
+def _profiled_items(name, iterable):
+    iterator = iter(iterable)
+    while True:
+        with stage(name):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            #end
+        #end
+        yield item
+    #end
+#end
+
+
+## =-------------------------------------------------------------------=##
+
+def build_profile_report(project_profiles, slowest=SLOWEST_PROJECTS):
+    # Report from {project path: profile}: totals per stage (hottest first), summed counters
+    # and the slowest projects.
+    stages = {}
+    counts = dict.fromkeys(COUNTERS, 0)
+    for profile in project_profiles.values():
+        for name, seconds in profile["stages"].items():
+            stages[name] = stages.get(name, 0.0) + seconds
+        #end
+        for name, n in profile["counts"].items():
+            counts[name] += n
+        #end
+    #end
+    total = sum(profile["seconds"] for profile in project_profiles.values())
+    slowest_projects = sorted(project_profiles.items(), key=lambda item: -item[1]["seconds"])[:slowest]
+    return {
+        "projects": len(project_profiles),
+        "seconds": round(total, 6),
+        "counts": counts,
+        "hottest_stages": [{"stage": name, "seconds": round(seconds, 6),
+                            "share": round(seconds / total, 4) if total else 0.0}
+                           for name, seconds in sorted(stages.items(), key=lambda item: -item[1])],
+        "slowest_projects": [{"project": project, **profile} for project, profile in slowest_projects],
+    }
+#end
+
+
+def write_profile_report(outdir, project_profiles):
+    # Write the report as JSON and every project's profile as a CSV row; returns both file names.
+    report = build_profile_report(project_profiles)
+    json_filename = os.path.join(outdir, PROFILE_REPORT_FILENAME + ".json")
+    with open(json_filename + ".tmp", 'w') as f:
+        json.dump(report, f, indent=4)
+        f.write("\n")
+    #end
+    os.replace(json_filename + ".tmp", json_filename)
+
+    stage_names = [entry["stage"] for entry in report["hottest_stages"]]
+    csv_filename = os.path.join(outdir, PROFILE_REPORT_FILENAME + ".csv")
+    with open(csv_filename + ".tmp", 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["project", "seconds"] + stage_names + list(COUNTERS))
+        for project, profile in sorted(project_profiles.items(), key=lambda item: -item[1]["seconds"]):
+            writer.writerow([project, profile["seconds"]] +
+                            [profile["stages"].get(name, 0.0) for name in stage_names] +
+                            [profile["counts"][name] for name in COUNTERS])
+        #end
+    #end
+    os.replace(csv_filename + ".tmp", csv_filename)
+    return json_filename, csv_filename
+#end
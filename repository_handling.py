@@ -18,31 +18,59 @@ import argparse
 import csv
 import time
 import uuid
-import imghdr
 import fnmatch
 import shutil
 
-from get_file_lists_by_type_module import get_all_DAW_extensions, get_list_of_audio_files, \
-                                          get_list_of_video_files, get_list_of_score_files
+from get_file_lists_by_type_module import get_list_of_audio_files, get_list_of_video_files, \
+                                          get_list_of_score_files, audio_extensions, video_extensions
+from directory_snapshot import DirectorySnapshot
+from thumbnails import is_image_candidate, find_thumbnail
+from daw_extension_registry import DawExtensionRegistry, get_daw_registry
+from json_writer import StreamedDict
+from profiling import profiled_iter
+from io_throttle import io_operation, io_read
 
 
 ## =-------------------------------------------------------------------=##
 
 
-def get_filepath_list(rootPath, followlinks=False):
-    filepaths = []
+def get_filepath_list(rootPath, followlinks=False, snapshot=None):
+    return list(iter_filepath_list(rootPath, followlinks, snapshot))
+#end
+
+def iter_filepath_list(rootPath, followlinks=False, snapshot=None):
+    # Generator form of get_filepath_list: the entries are produced while the directories are walked.
+    if snapshot is None:
+        snapshot = DirectorySnapshot(rootPath)
+    #end
 
-    # os.walk yields a tuple containing the path to the directory, 
-    # as well as lists of its subdirectories and files
-    for dirpath, dirnames, filenames in os.walk(rootPath, followlinks=followlinks):
+    # walk yields a tuple containing the path to the directory, 
+    # as well as lists of its subdirectories and files (same as os.walk)
+    for dirpath, dirnames, filenames in snapshot.walk(rootPath, followlinks=followlinks):
         dirpath = dirpath.replace(rootPath,'')
         for file in filenames:
             # os.path.join() creates the full relative path
-            full_path = os.path.join(dirpath, file)
-            filepaths.append(full_path)
+            yield os.path.join(dirpath, file)
         #end
     #end
-    return filepaths
+#end
+
+def get_media_files(rootPath, snapshot=None):
+    # Get the audio and video files anywhere below rootPath as (relative path, full path) pairs.
+    # The relative paths are written like the get_filepath_list entries.
+    media_extensions = set(audio_extensions + video_extensions)
+    if snapshot is None:
+        snapshot = DirectorySnapshot(rootPath)
+    #end
+    media_files = []
+    for dirpath, dirnames, filenames in snapshot.walk(rootPath):
+        for file in filenames:
+            if os.path.splitext(file)[1].lower() in media_extensions:
+                media_files.append((os.path.join(dirpath.replace(rootPath,''), file), os.path.join(dirpath, file)))
+            #end
+        #end
+    #end
+    return media_files
 #end
 
 def get_directory_tree_asList(rootPath):
@@ -50,7 +78,10 @@ def get_directory_tree_asList(rootPath):
     Get a nested list representing the directory tree of a directory path.
     """
     tree = []
-    for f in os.listdir(rootPath):
+    with io_operation():
+        filenames = os.listdir(rootPath)
+    #end
+    for f in filenames:
         full_path = os.path.join(rootPath, f)
         if os.path.isfile(full_path):
             # Add file to the current directory's list of files
@@ -65,17 +96,20 @@ def get_directory_tree_asList(rootPath):
     return tree
 #end
 
-def get_directory_tree_asDictionary(rootPath):
+def get_directory_tree_asDictionary(rootPath, snapshot=None):
     # Get a dictionary representing the directory tree of a directory path.
+    if snapshot is None:
+        snapshot = DirectorySnapshot(rootPath)
+    #end
     tree = {"": []}
-    for f in os.listdir(rootPath):
+    for f in snapshot.listdir(rootPath):
         full_path = os.path.join(rootPath, f)
-        if os.path.isfile(full_path):
+        if snapshot.isfile(full_path):
             # Add file to the current directory's list of files
             tree[""].append(os.path.relpath(full_path, rootPath))
-        elif os.path.isdir(full_path):
+        elif snapshot.isdir(full_path):
             # Recursively add subdirectory tree
-            subtree = get_directory_tree_asDictionary(full_path)
+            subtree = get_directory_tree_asDictionary(full_path, snapshot)
             # Add subdirectory tree to the current directory's dictionary
             tree[f] = subtree
         #end
@@ -83,6 +117,68 @@ def get_directory_tree_asDictionary(rootPath):
     return tree
 #end
 
+def iter_directory_tree(rootPath, snapshot=None):
+    # Streaming form of get_directory_tree_asDictionary: yields its (key, value) items, each
+    # subdirectory as a StreamedDict that is only listed when it is written (see json_writer.py).
+    if snapshot is None:
+        snapshot = DirectorySnapshot(rootPath)
+    #end
+    files = []
+    subdirectories = []
+    for f in snapshot.listdir(rootPath):
+        full_path = os.path.join(rootPath, f)
+        if snapshot.isfile(full_path):
+            files.append(os.path.relpath(full_path, rootPath))
+        elif snapshot.isdir(full_path):
+            subdirectories.append(f)
+        #end
+    #end
+    yield "", files
+    for f in subdirectories:
+        yield f, StreamedDict(profiled_iter("tree", iter_directory_tree(os.path.join(rootPath, f), snapshot)))
+    #end
+#end
+
+def get_project_fingerprint(prjPath, exclude_pattern="", snapshot=None):
+    # Summarise the project contents as recursive max mtime, file count and total size,
+    # so an unchanged project can be recognised without rebuilding its JSON file.
+    # The root files matching exclude_pattern (the database file copies) are left out.
+    # The root directory's own mtime is kept separately: it is the only trace of a file
+    # renamed in the root, and placing the copy restores it (see update_or_create_json_file).
+    if snapshot is None:
+        snapshot = DirectorySnapshot(prjPath)
+    #end
+    root_mtime_ns = snapshot.root_stat().st_mtime_ns
+    max_mtime_ns = 0
+    file_count = 0
+    total_size = 0
+    for dirpath, dirnames, filenames in snapshot.walk(prjPath):
+        for name in dirnames:
+            try:
+                max_mtime_ns = max(max_mtime_ns, snapshot.stat(os.path.join(dirpath, name)).st_mtime_ns)
+            except OSError:
+                pass
+            #end
+        #end
+        for name in filenames:
+            if dirpath == prjPath and exclude_pattern and fnmatch.fnmatch(name, exclude_pattern):
+                continue
+            #end
+            file_count += 1
+            try:
+                st = snapshot.stat(os.path.join(dirpath, name))
+            except OSError:
+                # e.g. a broken symlink: count it, but it has no size or mtime
+                continue
+            #end
+            total_size += st.st_size
+            max_mtime_ns = max(max_mtime_ns, st.st_mtime_ns)
+        #end
+    #end
+    return {"max_mtime_ns": max_mtime_ns, "root_mtime_ns": root_mtime_ns, "file_count": file_count,
+            "total_size": total_size}
+#end
+
 def get_relative_path(prjPath):
     # Get the relative path of a prjPath with respect to the script path.
     script_path = os.path.dirname(os.path.realpath(__file__))
@@ -97,15 +193,21 @@ def get_relative_path(prjPath):
 
 ## =-------------------------------------------------------------------=##
 
-def check_for_project_directory(prjPath, daw_info):
+def check_for_project_directory(prjPath, registry=None):
     # This function checks if the prjPath contains a file with a DAW extension.
-    for filename in os.listdir(prjPath):
-        _, extension = os.path.splitext(filename)
-        extension = extension.lower()  # consider extensions in any capitalization
-        for daw_extensions in daw_info.values():
-            if extension in daw_extensions:
-                return True
-            #end
+    # registry may also be a daw_info dictionary {daw_name: [extensions]}, as callers used to pass.
+    if registry is None:
+        registry = get_daw_registry()
+    elif isinstance(registry, dict):
+        registry = DawExtensionRegistry(registry.items())
+    #end
+    with io_operation():
+        filenames = os.listdir(prjPath)
+    #end
+    for filename in filenames:
+        # consider extensions in any capitalization
+        if registry.is_project_file(filename):
+            return True
         #end
     #end
     return False
@@ -121,24 +223,27 @@ def get_project_root(prjPath):
     return os.path.basename(prjPath)
 #end
 
-def get_project_name(prjPath):
+def get_project_name(prjPath, snapshot=None):
     # Get the project name from a prjPath directory path.
-    extensions = get_all_DAW_extensions()
-    for filename in os.listdir(prjPath):
-        filename_lower = filename.lower()
-        for ext in extensions:
-            if filename_lower.endswith(ext):
-                return filename
-            #end
+    if snapshot is None:
+        snapshot = DirectorySnapshot(prjPath)
+    #end
+    registry = get_daw_registry()
+    for filename in snapshot.listdir(prjPath):
+        if registry.is_project_file(filename):
+            return filename
         #end
     #end
     return ""
 #end
 
-def get_stems(prjPath, subdir_names):
-    for name in os.listdir(prjPath):
+def get_stems(prjPath, subdir_names, snapshot=None):
+    if snapshot is None:
+        snapshot = DirectorySnapshot(prjPath)
+    #end
+    for name in snapshot.listdir(prjPath):
         full_path = os.path.join(prjPath, name)
-        if os.path.isdir(full_path):
+        if snapshot.isdir(full_path):
             if name.lower() in subdir_names:
                 return name#full_path.replace("\\", "/")
             #end
@@ -148,22 +253,27 @@ def get_stems(prjPath, subdir_names):
     return ""
 #end
 
-def get_project_thumbnail(prjPath):
-    # Get the project thumbnail file path from a prjPath directory.
-    image_files = [f for f in os.listdir(prjPath) if os.path.isfile(os.path.join(prjPath, f)) and imghdr.what(os.path.join(prjPath, f)) is not None]
-    thumbnail_files = [f for f in image_files if "thumbnail" in f.lower()]
-    if thumbnail_files:
-        return thumbnail_files[0]
-    elif image_files:
-        return image_files[0]
-    else:
-        return ""
+def get_stem_files(prjPath, stems_dir, snapshot=None):
+    # Get the audio files directly inside the stems subdirectory (see get_stems), relative to prjPath.
+    if not stems_dir:
+        return []
     #end
+    stems_path = os.path.join(prjPath, stems_dir)
+    return [f'{stems_dir}/{f}' for f in get_list_of_audio_files(stems_path, snapshot)]
 #end
 
+def get_project_thumbnail(prjPath, snapshot=None):
+    # Get the project thumbnail file path from a prjPath directory.
+    # Only image-like names are opened, for one small magic-byte read each (see thumbnails.py).
+    if snapshot is None:
+        snapshot = DirectorySnapshot(prjPath)
+    #end
+    files = [f for f in snapshot.listdir(prjPath) if is_image_candidate(f) and snapshot.isfile(os.path.join(prjPath, f))]
+    return find_thumbnail(prjPath, files)
+#end
 
-def get_stereo_mix(prjPath,extraKeywords):
-    audio_files = get_list_of_audio_files(prjPath)
+def get_stereo_mix(prjPath,extraKeywords, snapshot=None):
+    audio_files = get_list_of_audio_files(prjPath, snapshot)
     keywords = set(['mix', 'stereo', 'render']+extraKeywords)
     for filename in audio_files:
         if any(keyword in filename.lower() for keyword in keywords):
@@ -173,9 +283,12 @@ def get_stereo_mix(prjPath,extraKeywords):
     return ""
 #end
 
-def get_video_file_with_keywords(prjPath, keywords=""):
+def get_video_file_with_keywords(prjPath, keywords="", snapshot=None):
     # Get a list of all video files in the prjPath
-    video_files = get_list_of_video_files(prjPath)
+    if snapshot is None:
+        snapshot = DirectorySnapshot(prjPath)
+    #end
+    video_files = get_list_of_video_files(prjPath, snapshot)
 
     # Look for video files that match the criteria
     for filename in video_files:
@@ -194,9 +307,10 @@ def get_video_file_with_keywords(prjPath, keywords=""):
 
     # Look for video.url file and get the link from it
     video_url_file = os.path.join(prjPath, "video.url")
-    if os.path.isfile(video_url_file):
+    if snapshot.isfile(video_url_file):
         with open(video_url_file, 'r') as f:
             video_url = f.read().strip()
+            io_read(len(video_url))
             video_url = "http" + video_url.split("http")[1]
             if video_url:
                 return video_url
@@ -208,9 +322,9 @@ def get_video_file_with_keywords(prjPath, keywords=""):
     return ""
 #end
 
-def get_score_file(prjPath):
+def get_score_file(prjPath, snapshot=None):
     # Get a list of all score files in the prjPath
-    score_files = get_list_of_score_files(prjPath)
+    score_files = get_list_of_score_files(prjPath, snapshot)
 
     # If there are multiple score files, return the list of files
     if len(score_files) > 1:
@@ -225,11 +339,14 @@ def get_score_file(prjPath):
     return ""
 #end
 
-def find_existing_uuid(directory, pattern):
-    for filename in os.listdir(directory):
+def find_existing_uuid(directory, pattern, snapshot=None):
+    if snapshot is None:
+        snapshot = DirectorySnapshot(directory)
+    #end
+    for filename in snapshot.listdir(directory):
         if fnmatch.fnmatch(filename, pattern):
-            # Assuming UUID is after the second dot and before the extension
-            uuid = filename.split('.')[2]
+            # The UUID is the last dot-separated part before the extension (the root name may contain dots)
+            uuid = os.path.splitext(filename)[0].rsplit('.', 1)[1]
             return uuid
         #end
     #end
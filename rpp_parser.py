@@ -0,0 +1,184 @@
+"""
+Summary:
+Pure-Python, line-streaming reader for the Reaper RPP chunk format (.rpp and .rpp-bak).
+The project file is read line by line in a single pass, keeping only a stack of the
+open chunk names, so memory use does not grow with the size of the embedded FX state.
+Only lines that start a chunk, close a chunk, or carry one of the few keywords we
+extract are tokenized; everything else (mostly base64 plugin state) is skipped with
+a single startswith check.
+
+License: MIT License
+"""
+
+## =-------------------------------------------------------------------=##
+
+# Bump when the extracted information changes; invalidates this parser's parse-cache entries
+PARSER_VERSION = 1
+
+# Keyword lines that carry information we extract
+_KEYWORD_PREFIXES = (b'<', b'>', b'TEMPO ', b'MARKER ', b'NAME ', b'FILE ')
+# Chunks inside an FX chain that describe one plugin instance
+_FX_CHUNKS = {'VST', 'JS', 'AU', 'DX', 'CLAP', 'LV2', 'VIDEO_EFFECT'}
+_FX_CHAIN_CHUNKS = {'FXCHAIN', 'FXCHAIN_REC', 'MASTERFXLIST', 'TAKEFX'}
+# MARKER flag bit that marks the line as a region boundary
+_REGION_FLAG = 1
+
+
+def tokenize_rpp_line(line):
+    # Split one RPP line into tokens. Reaper quotes tokens with ", ' or ` as needed.
+    tokens = []
+    i = 0
+    n = len(line)
+    while i < n:
+        c = line[i]
+        if c in ' \t\r\n':
+            i += 1
+        elif c in '"\'`':
+            j = line.find(c, i + 1)
+            if j < 0:
+                j = n
+            #end
+            tokens.append(line[i + 1:j])
+            i = j + 1
+        else:
+            j = i
+            while j < n and line[j] not in ' \t\r\n':
+                j += 1
+            #end
+            tokens.append(line[i:j])
+            i = j
+        #end
+    #end
+    return tokens
+#end
+
+
+def _to_float(token, default=None):
+    try:
+        return float(token)
+    except (TypeError, ValueError):
+        return default
+    #end
+#end
+
+
+def parse_rpp_lines(lines):
+    # Parse an iterable of RPP lines (bytes) and return the extracted project information.
+    stack = []
+    info = {
+        "version": "",
+        "tempo": None,
+        "time_signature": "",
+        "markers": [],
+        "regions": [],
+        "tracks": [],
+        "fx_list": [],
+        "media_files": [],
+    }
+    open_regions = {}
+    media_seen = set()
+    track = None
+
+    for raw in lines:
+        line = raw.lstrip()
+        if not line.startswith(_KEYWORD_PREFIXES):
+            continue
+        #end
+
+        if line[:1] == b'>':
+            if stack:
+                if stack.pop() == 'TRACK':
+                    track = None
+                #end
+            #end
+            continue
+        #end
+
+        tokens = tokenize_rpp_line(line.decode('utf-8', 'replace'))
+        if not tokens:
+            continue
+        #end
+        keyword = tokens[0]
+
+        if keyword[:1] == '<':
+            chunk = keyword[1:]
+            parent = stack[-1] if stack else ''
+            if chunk == 'REAPER_PROJECT':
+                info["version"] = tokens[2] if len(tokens) > 2 else ""
+            elif chunk == 'TRACK':
+                track = {"name": "", "fx": []}
+                info["tracks"].append(track)
+            elif chunk in _FX_CHUNKS and parent in _FX_CHAIN_CHUNKS:
+                fx_name = tokens[1] if len(tokens) > 1 else chunk
+                if parent == 'MASTERFXLIST':
+                    owner = "MASTER"
+                else:
+                    owner = track["name"] if track is not None else ""
+                    if track is not None:
+                        track["fx"].append(fx_name)
+                    #end
+                #end
+                info["fx_list"].append({"name": fx_name, "track": owner})
+            #end
+            stack.append(chunk)
+            continue
+        #end
+
+        parent = stack[-1] if stack else ''
+        if keyword == 'TEMPO' and parent == 'REAPER_PROJECT':
+            # TEMPO bpm numerator denominator
+            info["tempo"] = _to_float(tokens[1]) if len(tokens) > 1 else None
+            if len(tokens) > 3:
+                info["time_signature"] = f"{tokens[2]}/{tokens[3]}"
+            #end
+        elif keyword == 'MARKER' and parent == 'REAPER_PROJECT' and len(tokens) > 3:
+            # MARKER index position "name" flags ...; a region is written as two lines
+            # with the same index, the second one holding the end position.
+            index = tokens[1]
+            position = _to_float(tokens[2], 0.0)
+            flags = int(_to_float(tokens[4], 0)) if len(tokens) > 4 else 0
+            if flags & _REGION_FLAG:
+                if index in open_regions:
+                    region = open_regions.pop(index)
+                    region["end"] = position
+                else:
+                    region = {"name": tokens[3], "start": position, "end": position}
+                    open_regions[index] = region
+                    info["regions"].append(region)
+                #end
+            else:
+                info["markers"].append({"name": tokens[3], "time": position})
+            #end
+        elif keyword == 'NAME' and parent == 'TRACK' and track is not None and len(tokens) > 1:
+            # NAME is the first line of a TRACK chunk, before its FX chains
+            track["name"] = tokens[1]
+        elif keyword == 'FILE' and parent == 'SOURCE' and len(tokens) > 1:
+            if tokens[1] not in media_seen:
+                media_seen.add(tokens[1])
+                info["media_files"].append(tokens[1])
+            #end
+        #end
+    #end
+    return info
+#end
+
+
+def parse_rpp_file(daw_project_file):
+    # Stream a .rpp / .rpp-bak file from disk through parse_rpp_lines.
+    with open(daw_project_file, 'rb') as f:
+        return parse_rpp_lines(f)
+    #end
+#end
+
+
+## ==================== DAW parser entry point ================================
+def get_reaper_info(daw_project_file):
+    # Get information about a Reaper project file (.rpp or its .rpp-bak backup).
+    if not daw_project_file.lower().endswith(('.rpp', '.rpp-bak')):
+        return {}
+    #end
+
+    # Parse the project file with the native streaming RPP reader,
+    # which does not need a running Reaper instance.
+    return {"daw_name": "Reaper", **parse_rpp_file(daw_project_file)}
+#end
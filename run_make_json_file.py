@@ -1,21 +1,17 @@
 import os
-import subprocess
+import sys
 
-# Set the name of the script file to call
-script_name = "make_json_dtb_file.py"
-
-# Get the directory where this script is located
+# Get the directory where this script is located, so make_json_dtb_file can be imported from anywhere
 script_directory = os.path.dirname(os.path.abspath(__file__))
-
-# Construct the full path to the script file
-script_path = os.path.join(script_directory, script_name)
+sys.path.insert(0, script_directory)
+from make_json_dtb_file import ProjectScanner
 
 # Set the directories to process
 input_directories = ["./Reaper-Projects/", "./Test-DAW-Projects/"]
 output_directory = "./database_files"
 
-# Loop over the directories
-for directory in input_directories:
-    # Call the script file as a subprocess with the specified arguments
-    subprocess.call(["python", script_path, "--outdir", output_directory, "--autolist", directory])
-#end
\ No newline at end of file
+# Process every directory in this process: one worker pool, one UUID registry and shared caches
+summary = ProjectScanner(output_directory).run(roots=input_directories)
+if summary["failed"]:
+    sys.exit(1)
+#end
@@ -0,0 +1,246 @@
+"""
+Summary:
+Chunk-scanning reader for Steinberg Cubase (.cpr) and Nuendo (.npr) projects.
+Both are RIFF-like binary containers: 'RIFF', a big-endian uint32 size and the form type
+'NUND', followed by chunks made of a 4-byte id, a big-endian uint32 length and the body.
+The project objects are serialized into the 'ARCH' chunk(s), where every object starts
+with its null-terminated class name and strings are stored with a big-endian uint32
+length prefix (single-byte or UTF-16BE).
+
+The file is memory-mapped. The reader jumps from chunk header to chunk header and only
+searches the archive chunks, using mmap.find for the class-name tokens below, then decodes
+a small bounded window after each hit. The object layout is not documented, so the field
+decoding is best-effort: every read is bounds-checked and a damaged or truncated file
+yields partial results rather than an exception.
+
+License: MIT License
+"""
+
+import mmap
+import struct
+
+## =-------------------------------------------------------------------=##
+
+# Bump when the extracted information changes; invalidates this parser's parse-cache entries
+PARSER_VERSION = 1
+
+FORM_TYPE = b'NUND'
+ARCHIVE_CHUNKS = {b'ARCH', b'ROOT'}
+
+TOKEN_APP_VERSION = b'PAppVersion\x00'
+TOKEN_TEMPO_EVENT = b'MTempoEvent\x00'
+TOKEN_SIGNATURE_EVENT = b'MTimeSignatureEvent\x00'
+TOKEN_MARKER_EVENT = b'MMarkerEvent\x00'
+TOKEN_PLUGIN_NAME = b'Plugin Name\x00'
+
+# Bytes looked at after a token when decoding its fields
+_FIELD_WINDOW = 64
+_MAX_STRING_LENGTH = 1024
+_TEMPO_RANGE = (10.0, 999.0)
+_SIGNATURE_DENOMINATORS = {1, 2, 4, 8, 16, 32, 64}
+
+
+class SteinbergFormatError(ValueError):
+    pass
+#end
+
+
+def iter_chunks(buf, offset=12):
+    # Yield (chunk_id, body_start, body_end) for the top-level chunks, seeking header to header.
+    # A chunk whose declared length runs past the end of the file is cut at the end of the file.
+    size = len(buf)
+    while offset + 8 <= size:
+        chunk_id = bytes(buf[offset:offset + 4])
+        length = struct.unpack_from('>I', buf, offset + 4)[0]
+        body_start = offset + 8
+        body_end = min(body_start + length, size)
+        yield chunk_id, body_start, body_end
+        if body_start + length > size:
+            return
+        #end
+        offset = body_end
+    #end
+#end
+
+
+def _printable(text):
+    return bool(text) and all(c.isprintable() for c in text)
+#end
+
+
+def read_prefixed_string(buf, pos, end):
+    # Read a uint32-length-prefixed string at pos; returns (text, next_pos) or (None, pos).
+    if pos + 4 > end:
+        return None, pos
+    #end
+    length = struct.unpack_from('>I', buf, pos)[0]
+    if not 0 < length <= _MAX_STRING_LENGTH or pos + 4 + length > end:
+        return None, pos
+    #end
+    raw = bytes(buf[pos + 4:pos + 4 + length])
+    if length % 2 == 0 and length >= 2 and raw[0] == 0 and raw[1] != 0:
+        text = raw.decode('utf-16-be', 'replace')
+    else:
+        text = raw.decode('latin-1')
+    #end
+    text = text.rstrip('\x00')
+    if not _printable(text):
+        return None, pos
+    #end
+    return text, pos + 4 + length
+#end
+
+
+def find_prefixed_string(buf, pos, end, window=_FIELD_WINDOW):
+    # The first plausible prefixed string starting within window bytes of pos.
+    end = min(end, pos + window + 4 + _MAX_STRING_LENGTH)
+    for start in range(pos, min(pos + window, end)):
+        text, next_pos = read_prefixed_string(buf, start, end)
+        if text is not None:
+            return text, next_pos
+        #end
+    #end
+    return None, pos
+#end
+
+
+def _find_double(buf, pos, end, low, high, window=_FIELD_WINDOW):
+    # The first big-endian double within window bytes of pos that lies in [low, high].
+    end = min(end, pos + window)
+    for start in range(pos, end - 7):
+        value = struct.unpack_from('>d', buf, start)[0]
+        if low <= value <= high:
+            return value
+        #end
+    #end
+    return None
+#end
+
+
+def _find_signature(buf, pos, end, window=_FIELD_WINDOW):
+    # The first pair of big-endian uint32 (numerator, denominator) that forms a valid signature.
+    end = min(end, pos + window)
+    for start in range(pos, end - 7):
+        numerator, denominator = struct.unpack_from('>II', buf, start)
+        if 1 <= numerator <= 32 and denominator in _SIGNATURE_DENOMINATORS:
+            return f"{numerator}/{denominator}"
+        #end
+    #end
+    return ""
+#end
+
+
+def _iter_token(buf, token, start, end):
+    pos = buf.find(token, start, end)
+    while pos >= 0:
+        yield pos + len(token)
+        pos = buf.find(token, pos + len(token), end)
+    #end
+#end
+
+
+def parse_steinberg_buffer(buf):
+    # Parse a Cubase/Nuendo project held in a bytes-like buffer (an mmap in practice).
+    if len(buf) < 12 or buf[0:4] != b'RIFF' or buf[8:12] != FORM_TYPE:
+        raise SteinbergFormatError("not a RIFF/NUND project file")
+    #end
+
+    info = {
+        "version": "",
+        "tempo": None,
+        "time_signature": "",
+        "markers": [],
+        "plugin_list": [],
+    }
+    plugins_seen = set()
+    for chunk_id, start, end in iter_chunks(buf):
+        if chunk_id not in ARCHIVE_CHUNKS:
+            continue
+        #end
+
+        if not info["version"]:
+            for pos in _iter_token(buf, TOKEN_APP_VERSION, start, end):
+                # application name followed by its version, e.g. "Cubase" "12.0.70"
+                app, pos = find_prefixed_string(buf, pos, end)
+                version, _ = find_prefixed_string(buf, pos, end)
+                info["version"] = " ".join(part for part in (app, version) if part)
+                break
+            #end
+        #end
+
+        if info["tempo"] is None:
+            for pos in _iter_token(buf, TOKEN_TEMPO_EVENT, start, end):
+                info["tempo"] = _find_double(buf, pos, end, *_TEMPO_RANGE)
+                if info["tempo"] is not None:
+                    break
+                #end
+            #end
+        #end
+
+        if not info["time_signature"]:
+            for pos in _iter_token(buf, TOKEN_SIGNATURE_EVENT, start, end):
+                info["time_signature"] = _find_signature(buf, pos, end)
+                if info["time_signature"]:
+                    break
+                #end
+            #end
+        #end
+
+        for pos in _iter_token(buf, TOKEN_MARKER_EVENT, start, end):
+            name, name_end = find_prefixed_string(buf, pos, end)
+            if name is not None:
+                position = _find_double(buf, name_end, end, 0.0, 1e9)
+                info["markers"].append({"name": name, "time": position})
+            #end
+        #end
+
+        for pos in _iter_token(buf, TOKEN_PLUGIN_NAME, start, end):
+            name, _ = find_prefixed_string(buf, pos, end)
+            if name is not None and name not in plugins_seen:
+                plugins_seen.add(name)
+                info["plugin_list"].append({"name": name})
+            #end
+        #end
+    #end
+    return info
+#end
+
+
+def parse_steinberg_file(daw_project_file):
+    # Memory-map a .cpr/.npr file and scan it in place.
+    with open(daw_project_file, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return parse_steinberg_buffer(mm)
+        #end
+    #end
+#end
+
+
+## ==================== DAW parser entry point ================================
+def get_cubase_info(daw_project_file):
+    # Get information about a Cubase project file.
+    if not daw_project_file.lower().endswith('.cpr'):
+        return {}
+    #end
+    return get_steinberg_info(daw_project_file, "Cubase")
+#end
+
+
+def get_nuendo_info(daw_project_file):
+    # Get information about a Nuendo project file.
+    if not daw_project_file.lower().endswith('.npr'):
+        return {}
+    #end
+    return get_steinberg_info(daw_project_file, "Nuendo")
+#end
+
+
+def get_steinberg_info(daw_project_file, daw_name):
+    # Cubase and Nuendo share the same binary container; scan its chunks through a memory map.
+    try:
+        info = parse_steinberg_file(daw_project_file)
+    except (OSError, ValueError) as err:
+        return {"daw_name": daw_name, "notes": f"FILE NOT READABLE: {err}"}
+    #end
+    return {"daw_name": daw_name, **info}
+#end
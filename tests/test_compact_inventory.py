@@ -0,0 +1,51 @@
+"""
+Summary:
+Tests for compact_inventory.py: both classic views derived from the inventory must equal,
+in order, the 'directory_tree' and 'filepath_list' written by repository_handling.py.
+
+License: MIT License
+"""
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from compact_inventory import build_inventory, inventory_to_tree, inventory_to_filepath_list
+from repository_handling import get_filepath_list, get_directory_tree_asDictionary
+
+
+def make_tree(root, relative_paths):
+    for relative_path in relative_paths:
+        filename = os.path.join(root, *relative_path.split('/'))
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, 'wb') as f:
+            f.write(b'x' * len(relative_path))
+        #end
+    #end
+#end
+
+
+def assert_views_match(root):
+    inventory = build_inventory(root)
+    # Compared without sorting: the entries must come in the order of the walk
+    assert inventory_to_filepath_list(inventory) == get_filepath_list(root)
+    assert json.dumps(inventory_to_tree(inventory)) == json.dumps(get_directory_tree_asDictionary(root))
+#end
+
+
+def test_nested_sibling_directories(tmp_path):
+    root = str(tmp_path / 'Song')
+    make_tree(root, ['a/x/f1', 'a/f0', 'b/f2', 'b/y/f3', 'b/y/z/f4', 'c/f5', 'root.rpp'])
+    assert_views_match(root)
+#end
+
+
+def test_symbolic_links(tmp_path):
+    root = str(tmp_path / 'Song')
+    make_tree(root, ['a/x/f1', 'b/f2', 'root.rpp'])
+    # The tree follows the link to a directory and leaves out the broken link; the walk does the opposite
+    os.symlink(os.path.join(root, 'a'), os.path.join(root, 'b', 'link_to_a'))
+    os.symlink(os.path.join(root, 'missing'), os.path.join(root, 'b', 'broken'))
+    assert_views_match(root)
+#end
@@ -0,0 +1,104 @@
+"""
+Summary:
+Tests for the incremental mode of make_json_dtb_file.py: a project is skipped only when
+its fingerprint and the output options of the run match its manifest record.
+
+License: MIT License
+"""
+
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from make_json_dtb_file import ProjectOptions, process_project_directories, load_manifest, update_manifest, \
+                               save_manifest
+
+
+def make_project(root):
+    project = os.path.join(root, 'Song')
+    os.makedirs(os.path.join(project, 'stems'))
+    with open(os.path.join(project, 'Song.rpp'), 'w') as f:
+        f.write('<REAPER_PROJECT 0.1 "6.80/linux-x86_64" 1700000000\n  TEMPO 120 4 4\n>\n')
+    #end
+    for name in ('Song_mix.wav', os.path.join('stems', 'kick.wav')):
+        with open(os.path.join(project, name), 'wb') as f:
+            f.write(b'RIFF' + os.urandom(256))
+        #end
+    #end
+    return project
+#end
+
+
+def scan(project, outdir, **options):
+    # One incremental run over the project with the given ProjectOptions; returns its result.
+    os.makedirs(outdir, exist_ok=True)
+    manifest = load_manifest(outdir)
+    results = list(process_project_directories([project], outdir, manifest=manifest,
+                                               options=ProjectOptions(**options)))
+    for result in results:
+        assert result["error"] is None, result.get("traceback")
+        update_manifest(manifest, result)
+    #end
+    save_manifest(outdir, manifest)
+    return results[0]
+#end
+
+
+def test_unchanged_project_is_skipped(tmp_path):
+    project = make_project(str(tmp_path / 'archive'))
+    outdir = str(tmp_path / 'out')
+    assert scan(project, outdir)["status"] == "new"
+    assert scan(project, outdir)["status"] == "skipped"
+#end
+
+
+def test_rename_in_project_root_is_rebuilt(tmp_path):
+    project = make_project(str(tmp_path / 'archive'))
+    outdir = str(tmp_path / 'out')
+    scan(project, outdir)
+    os.rename(os.path.join(project, 'Song_mix.wav'), os.path.join(project, 'Song_mixdown.wav'))
+    assert scan(project, outdir)["status"] == "updated"
+    assert scan(project, outdir)["status"] == "skipped"
+#end
+
+
+def test_changed_output_options_rebuild(tmp_path):
+    project = make_project(str(tmp_path / 'archive'))
+    outdir = str(tmp_path / 'out')
+    result = scan(project, outdir)
+    with open(result["json_filename"], 'r') as f:
+        data = json.load(f)
+    #end
+    # Fields of the optional stages are only written when the stage ran
+    for field in ("media_digests", "thumbnail_preview", "waveform_peaks"):
+        assert field not in data
+    #end
+
+    result = scan(project, outdir, hash_media=True)
+    assert result["status"] == "updated"
+    assert len(result["media_digests"]) == 2
+
+    # The skipped project still reports its media for the duplicate report
+    result = scan(project, outdir, hash_media=True)
+    assert result["status"] == "skipped"
+    assert len(result["media_digests"]) == 2
+
+    assert scan(project, outdir)["status"] == "updated"
+    assert scan(project, outdir, thumbnail_size=64)["status"] == "updated"
+    assert scan(project, outdir, thumbnail_size=64)["status"] == "skipped"
+#end
+
+
+def test_changed_inventory_rebuilds(tmp_path):
+    project = make_project(str(tmp_path / 'archive'))
+    outdir = str(tmp_path / 'out')
+    scan(project, outdir)
+    result = scan(project, outdir, inventory="compact")
+    assert result["status"] == "updated"
+    with open(result["json_filename"], 'r') as f:
+        data = json.load(f)
+    #end
+    assert "inventory" in data and "filepath_list" not in data
+    assert scan(project, outdir, inventory="compact")["status"] == "skipped"
+#end
@@ -0,0 +1,195 @@
+"""
+Summary:
+Tests for the I/O throttle (io_throttle.py). The token buckets and the adaptive concurrency
+cap run on a fake clock (sleeping advances it instantly), so their timing is exact: the rate
+a bucket allows, bursts, requests larger than the bucket, the halving of the cap under high
+latency, its recovery by one per interval and the interval between adjustments. Real threads
+check that the cap bounds the operations in flight, and a scan checks that the projects in
+flight across workers follow the cap.
+
+License: MIT License
+"""
+
+import os
+import sys
+import time
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from io_throttle import TokenBucket, AdaptiveLimiter, LATENCY_SMOOTHING
+from make_json_dtb_file import process_project_directories, reset_process_state, split_io_throttle_options
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+    #end
+
+    def __call__(self):
+        return self.now
+    #end
+
+    def sleep(self, seconds):
+        self.now += seconds
+    #end
+#end
+
+
+def close(a, b):
+    return abs(a - b) < 1e-9
+#end
+
+
+def test_token_bucket_rate_and_burst():
+    clock = FakeClock()
+    bucket = TokenBucket(10, clock=clock, sleep=clock.sleep)
+    # A full bucket lets a burst of 10 through, then one every 0.1 s
+    for _ in range(100):
+        bucket.acquire()
+    #end
+    assert close(clock.now, 9.0), clock.now
+    assert close(bucket.waited, 9.0), bucket.waited
+
+    # An idle bucket refills up to its capacity only
+    clock.sleep(100)
+    start = clock.now
+    for _ in range(20):
+        bucket.acquire()
+    #end
+    assert close(clock.now - start, 1.0), clock.now - start
+#end
+
+
+def test_token_bucket_large_request():
+    # A request larger than the bucket waits for a full bucket, and the debt delays the next one
+    clock = FakeClock()
+    bucket = TokenBucket(1024 * 1024, clock=clock, sleep=clock.sleep)
+    assert bucket.acquire(5 * 1024 * 1024) == 0
+    assert close(bucket.acquire(1024 * 1024), 5.0)
+    assert close(clock.now, 5.0)
+#end
+
+
+def test_adaptive_limiter_decrease_and_recovery():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(target_latency=0.010, max_limit=16, interval=0.5, clock=clock)
+
+    # Within an interval the cap does not move, however slow the operations are
+    for _ in range(10):
+        limiter.observe(0.050)
+    #end
+    assert limiter.limit == 16
+
+    # Latency above the target halves the cap once per interval, down to the minimum
+    limits = []
+    for _ in range(6):
+        clock.sleep(0.5)
+        limiter.observe(0.050)
+        limits.append(limiter.limit)
+    #end
+    assert limits == [8, 4, 2, 1, 1, 1], limits
+
+    # Once the moving average is below the target again, the cap grows by one per interval.
+    # From 50 ms, samples of 1 ms take the average below 10 ms at the k-th sample, with
+    # 0.001 + 0.049 * (1 - LATENCY_SMOOTHING) ** k < 0.010
+    k = next(k for k in range(1, 100) if 0.001 + 0.049 * (1 - LATENCY_SMOOTHING) ** k < 0.010)
+    limits = []
+    for _ in range(k + 20):
+        clock.sleep(0.5)
+        limiter.observe(0.001)
+        limits.append(limiter.limit)
+    #end
+    expected = [1] * (k - 1) + [min(16, 2 + i) for i in range(21)]
+    assert limits == expected, (limits, expected)
+#end
+
+
+def test_release_without_latency_keeps_the_cap():
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(target_latency=0.010, max_limit=4, interval=0.5, clock=clock)
+    limiter.acquire()
+    clock.sleep(1.0)
+    limiter.release()
+    assert (limiter.limit, limiter.in_flight, limiter.operations, limiter.latency) == (4, 0, 0, None)
+#end
+
+
+def test_concurrency_cap_bounds_threads(n_threads=16, limit=3):
+    # Real threads: never more than limit operations in flight.
+    limiter = AdaptiveLimiter(target_latency=10.0, max_limit=limit)
+    lock = threading.Lock()
+    state = {"in_flight": 0, "max": 0}
+
+    def worker():
+        for _ in range(20):
+            limiter.acquire()
+            with lock:
+                state["in_flight"] += 1
+                state["max"] = max(state["max"], state["in_flight"])
+            #end
+            time.sleep(0.0005)
+            with lock:
+                state["in_flight"] -= 1
+            #end
+            limiter.release(0.0005)
+        #end
+    #end
+
+    threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+    for thread in threads:
+        thread.start()
+    #end
+    for thread in threads:
+        thread.join()
+    #end
+    assert 1 <= state["max"] <= limit, state
+#end
+
+
+def test_project_limiter_caps_projects_in_flight(tmp_path):
+    # Every project is slower than the (unreachable) target, so the cap on the projects in flight
+    # is halved at every result, and no project is submitted beyond it.
+    directories = []
+    for i in range(8):
+        project = tmp_path / 'archive' / f'Song{i}'
+        (project / 'stems').mkdir(parents=True)
+        (project / f'Song{i}.rpp').write_text('<REAPER_PROJECT 0.1 "6.80" 1700000000\n>\n')
+        directories.append(str(project))
+    #end
+    outdir = tmp_path / 'out'
+    outdir.mkdir()
+
+    project_limiter = AdaptiveLimiter(target_latency=1e-9, max_limit=4, interval=0)
+    submitted = []
+    acquire = project_limiter.acquire
+
+    def recording_acquire():
+        acquire()
+        submitted.append((project_limiter.in_flight, project_limiter.limit))
+    #end
+
+    project_limiter.acquire = recording_acquire
+    try:
+        results = list(process_project_directories(directories, str(outdir), jobs=2, pool="thread",
+                                                   io_throttle_options=(None, None, 1e-9, 16),
+                                                   project_limiter=project_limiter))
+    finally:
+        # Called without ProjectScanner, which turns the process-wide throttle off after its runs
+        reset_process_state()
+    #end
+    assert [result["error"] for result in results] == [None] * len(directories)
+    assert all(result["io_latency"] > 0 for result in results)
+    assert all(in_flight <= limit for in_flight, limit in submitted), submitted
+    assert project_limiter.limit == 1 and project_limiter.in_flight == 0
+#end
+
+
+def test_process_workers_and_parent_split_the_rate_caps():
+    parent, worker = split_io_throttle_options((300, 3e6, 0.01, 16), jobs=2)
+    assert parent == (100, 1e6, 0.01, 16)
+    assert worker == (100, 1e6, 0.01, 8)
+    # Together the parent and the workers stay within the caps
+    assert parent[0] + 2 * worker[0] == 300
+    assert split_io_throttle_options((None, 3e6, None, 16), jobs=2)[1] == (None, 1e6, None, 8)
+    assert split_io_throttle_options(None, jobs=2) == (None, None)
+#end
@@ -0,0 +1,150 @@
+"""
+Summary:
+Robustness tests for the binary and compressed project parsers (steinberg_parser.py,
+flp_parser.py, als_parser.py). A small valid project of each format is truncated at every
+header boundary and at random offsets, and has random bits flipped; the DAW parser entry
+point must return a result for every variant, either the (possibly partial) project
+information or a "FILE NOT READABLE" note, and never raise.
+
+License: MIT License
+"""
+
+import os
+import sys
+import gzip
+import struct
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from steinberg_parser import get_cubase_info
+from flp_parser import get_fl_studio_info
+from als_parser import get_ableton_live_info
+
+VARIANTS = 200
+
+
+def _steinberg_string(text, utf16=False):
+    raw = (text + '\x00').encode('utf-16-be' if utf16 else 'latin-1')
+    return struct.pack('>I', len(raw)) + raw
+#end
+
+
+def _riff_chunk(chunk_id, body):
+    return chunk_id + struct.pack('>I', len(body)) + body
+#end
+
+
+def make_cpr():
+    archive = b''.join([
+        b'PAppVersion\x00', b'\x00\x02', _steinberg_string('Cubase'), _steinberg_string('12.0.70'),
+        b'MTempoEvent\x00', b'\x00\x00\x00\x01', struct.pack('>d', 132.5),
+        b'MTimeSignatureEvent\x00', b'\xff\xff', struct.pack('>II', 6, 8),
+        b'MMarkerEvent\x00\x00\x01', _steinberg_string('Verse', utf16=True), struct.pack('>d', 1920.0),
+        b'Plugin Name\x00\x00\x05', _steinberg_string('Reverb', utf16=True),
+    ])
+    body = b'NUND' + _riff_chunk(b'ROOT', _steinberg_string('GDocument')) + _riff_chunk(b'ARCH', archive)
+    return b'RIFF' + struct.pack('>I', len(body)) + body
+#end
+
+
+def _flp_text(event_id, text, utf16=True):
+    # FL Studio 11.5 and later store project strings as UTF-16LE; the version is always single-byte
+    raw = (text + '\x00').encode('utf-16-le' if utf16 else 'cp1252')
+    return bytes([event_id, len(raw)]) + raw
+#end
+
+
+def make_flp():
+    events = b''.join([
+        _flp_text(199, '20.8.4.2576', utf16=False),
+        bytes([156]) + struct.pack('<I', 140000),
+        bytes([17, 4, 18, 4]),
+        bytes([64]) + struct.pack('<H', 0),
+        _flp_text(201, 'Sampler'),
+        _flp_text(203, 'Kick'),
+        bytes([65]) + struct.pack('<H', 1),
+        _flp_text(193, 'Intro'),
+        _flp_text(194, 'Song'),
+    ])
+    header = b'FLhd' + struct.pack('<IhHH', 6, 0, 1, 96)
+    return header + b'FLdt' + struct.pack('<I', len(events)) + events
+#end
+
+
+def make_als():
+    xml = ('<?xml version="1.0" encoding="UTF-8"?>\n'
+           '<Ableton MajorVersion="5" MinorVersion="11.0_433" Creator="Ableton Live 11.3.4"><LiveSet>'
+           '<Tracks><AudioTrack Id="0"><Name><EffectiveName Value="Drums" /></Name></AudioTrack></Tracks>'
+           '<MasterTrack><DeviceChain><Mixer><Tempo><Manual Value="124" /></Tempo>'
+           '<TimeSignature><Manual Value="201" /></TimeSignature></Mixer></DeviceChain></MasterTrack>'
+           '</LiveSet></Ableton>\n')
+    return gzip.compress(xml.encode('utf-8'))
+#end
+
+
+# name: (builder, extension, entry point, DAW name, header size, expected fields of the intact project)
+FORMATS = {
+    "cubase": (make_cpr, '.cpr', get_cubase_info, "Cubase", 12,
+               {"version": "Cubase 12.0.70", "tempo": 132.5, "time_signature": "6/8"}),
+    "fl_studio": (make_flp, '.flp', get_fl_studio_info, "FL Studio", 22,
+                  {"title": "Song", "tempo": 140.0, "time_signature": "4/4", "patterns": ["Intro"]}),
+    "ableton_live": (make_als, '.als', get_ableton_live_info, "Ableton Live", 10,
+                     {"version": "Ableton Live 11.3.4", "tempo": 124.0, "time_signature": "4/4"}),
+}
+
+
+def variants(data, header_size, seed=0):
+    # Truncations at every header offset and at random offsets, then random bit flips.
+    rng = random.Random(seed)
+    for length in range(header_size + 1):
+        yield f'truncated at {length}', data[:length]
+    #end
+    for _ in range(VARIANTS):
+        length = rng.randrange(len(data))
+        yield f'truncated at {length}', data[:length]
+    #end
+    for _ in range(VARIANTS):
+        variant = bytearray(data)
+        positions = [rng.randrange(len(variant)) for _ in range(rng.randrange(1, 4))]
+        for pos in positions:
+            variant[pos] ^= 1 << rng.randrange(8)
+        #end
+        yield f'bits flipped at {positions}', bytes(variant)
+    #end
+#end
+
+
+@pytest.mark.parametrize("name", sorted(FORMATS))
+def test_intact_project_parses(name, tmp_path):
+    make, extension, get_info, daw_name, _, expected = FORMATS[name]
+    filename = tmp_path / ('project' + extension)
+    filename.write_bytes(make())
+    info = get_info(str(filename))
+    assert info["daw_name"] == daw_name
+    assert "notes" not in info, info
+    for key, value in expected.items():
+        assert info[key] == value, (key, info)
+    #end
+#end
+
+
+@pytest.mark.parametrize("name", sorted(FORMATS))
+def test_damaged_project_gives_clean_result(name, tmp_path):
+    make, extension, get_info, daw_name, header_size, _ = FORMATS[name]
+    filename = tmp_path / ('project' + extension)
+    for label, data in variants(make(), header_size):
+        filename.write_bytes(data)
+        try:
+            info = get_info(str(filename))
+        except Exception as err:
+            pytest.fail(f'{name}, {label}: {type(err).__name__}: {err}')
+        #end
+        assert isinstance(info, dict), label
+        assert info["daw_name"] == daw_name, label
+        if "notes" in info:
+            assert info["notes"].startswith("FILE NOT READABLE"), (label, info)
+        #end
+    #end
+#end
@@ -0,0 +1,83 @@
+"""
+Summary:
+Tests for the --profile counters of profiling.py: only real system calls are counted.
+
+License: MIT License
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from profiling import enable_profiling, disable_profiling, begin_project, end_project
+from directory_snapshot import DirectorySnapshot
+
+
+@pytest.fixture(autouse=True)
+def no_profiling_afterwards():
+    # Leave os.stat and os.lstat unwrapped for the tests that follow
+    yield
+    disable_profiling()
+#end
+
+
+def profile_counts(function):
+    # The counters of one profiled call of function.
+    enable_profiling()
+    begin_project()
+    try:
+        function()
+    finally:
+        profile = end_project()
+    #end
+    return profile["counts"]
+#end
+
+
+def test_snapshot_cache_hits_are_not_counted(tmp_path):
+    for name in ('a.wav', 'b.wav'):
+        (tmp_path / name).write_bytes(b'x')
+    #end
+    snapshot = DirectorySnapshot(str(tmp_path))
+
+    def lookups():
+        for _ in range(3):
+            for name in ('a.wav', 'b.wav'):
+                snapshot.stat(str(tmp_path / name))
+            #end
+            snapshot.getmtime()
+            snapshot.listdir()
+        #end
+    #end
+
+    counts = profile_counts(lookups)
+    assert counts["listdir"] == 1
+    assert counts["stat"] == 3
+#end
+
+
+def test_direct_stat_calls_are_counted(tmp_path):
+    filename = str(tmp_path / 'cover.png')
+    with open(filename, 'wb') as f:
+        f.write(b'x')
+    #end
+    counts = profile_counts(lambda: (os.stat(filename), os.path.isfile(filename), os.path.getmtime(filename)))
+    assert counts["stat"] == 3
+#end
+
+
+def test_disable_restores_stat(tmp_path):
+    stat, lstat = os.stat, os.lstat
+    enable_profiling()
+    assert os.stat is not stat
+    disable_profiling()
+    assert (os.stat, os.lstat) == (stat, lstat)
+
+    # Projects are no longer profiled
+    begin_project()
+    (tmp_path / 'a.wav').write_bytes(b'x')
+    os.listdir(str(tmp_path))
+    assert end_project() is None
+#end
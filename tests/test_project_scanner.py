@@ -0,0 +1,46 @@
+"""
+Summary:
+Tests for ProjectScanner runs in one process: the parse cache, the --profile instrumentation
+and the I/O throttle are process globals, set from each run's options and turned off after it.
+
+License: MIT License
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from make_json_dtb_file import ProjectScanner
+from parse_cache import get_parse_cache
+from io_throttle import get_io_throttle
+
+
+def make_project(root):
+    project = os.path.join(root, 'Song')
+    os.makedirs(project)
+    with open(os.path.join(project, 'Song.rpp'), 'w') as f:
+        f.write('<REAPER_PROJECT 0.1 "6.80/linux-x86_64" 1700000000\n  TEMPO 120 4 4\n>\n')
+    #end
+    return project
+#end
+
+
+def test_second_scanner_does_not_inherit_settings(tmp_path):
+    make_project(str(tmp_path / 'archive'))
+    roots = [str(tmp_path / 'archive')]
+    stat = os.stat
+
+    lines = []
+    ProjectScanner(str(tmp_path / 'out1'), parse_cache="", profile=True, max_io_ops=1000,
+                   log=lines.append).run(roots=roots)
+    assert any(line.startswith('I/O throttle') for line in lines)
+    assert get_parse_cache() is None and get_io_throttle() is None
+    assert os.stat is stat
+
+    lines = []
+    scanner = ProjectScanner(str(tmp_path / 'out2'), log=lines.append)
+    scanner.run(roots=roots)
+    assert not any(line.startswith(('Parse cache', 'Profile', 'I/O throttle')) for line in lines)
+    assert not scanner.project_profiles
+    assert not os.path.exists(str(tmp_path / 'out2' / 'parse_cache.sqlite'))
+#end
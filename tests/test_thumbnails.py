@@ -0,0 +1,40 @@
+"""
+Summary:
+Tests for the cached thumbnail previews of thumbnails.py (requires Pillow).
+
+License: MIT License
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from thumbnails import update_thumbnail_preview
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.mark.parametrize("extension", ['.png', '.jpg'])
+def test_preview_follows_image_and_size(tmp_path, extension):
+    image_filename = str(tmp_path / ('cover' + extension))
+    preview_filename = str(tmp_path / 'cover.thumbnail.jpg')
+    Image.new('RGB', (500, 300), 'red').save(image_filename)
+
+    assert update_thumbnail_preview(image_filename, preview_filename, 64) == "created"
+    assert update_thumbnail_preview(image_filename, preview_filename, 64) == "unchanged"
+
+    # Another size remakes the preview
+    assert update_thumbnail_preview(image_filename, preview_filename, 128) == "created"
+    with Image.open(preview_filename) as preview:
+        assert max(preview.size) == 128
+    #end
+
+    # So does a new version of the image
+    st = os.stat(image_filename)
+    os.utime(image_filename, ns=(st.st_atime_ns, st.st_mtime_ns + 1000000000))
+    assert update_thumbnail_preview(image_filename, preview_filename, 128) == "created"
+
+    assert update_thumbnail_preview(image_filename, preview_filename, 1000) == "small"
+#end
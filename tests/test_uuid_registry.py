@@ -0,0 +1,58 @@
+"""
+Summary:
+Tests for the UUID registry (uuid_registry.py) as used by ProjectScanner: a copied project
+folder gets a new UUID, and the duplicate is reported in one run only.
+
+License: MIT License
+"""
+
+import os
+import sys
+import glob
+import shutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from make_json_dtb_file import ProjectScanner
+
+
+def make_project(root):
+    project = os.path.join(root, 'Song')
+    os.makedirs(project)
+    with open(os.path.join(project, 'Song.rpp'), 'w') as f:
+        f.write('<REAPER_PROJECT 0.1 "6.80/linux-x86_64" 1700000000\n  TEMPO 120 4 4\n>\n')
+    #end
+    return project
+#end
+
+
+def scan(outdir, roots):
+    # One run over the roots; returns the logged lines.
+    lines = []
+    summary = ProjectScanner(outdir, log=lines.append).run(roots=roots)
+    assert not summary["failed"], summary["failed"]
+    return lines
+#end
+
+
+def test_copied_project_is_reported_once(tmp_path):
+    original = make_project(str(tmp_path / 'archive'))
+    outdir = str(tmp_path / 'out')
+    scan(outdir, [str(tmp_path / 'archive')])
+    [original_copy] = glob.glob(os.path.join(original, 'DAW-REPO.Song.*.json'))
+
+    # The copied folder holds the original's JSON copy
+    copied = str(tmp_path / 'copies' / 'Song')
+    shutil.copytree(original, copied)
+    mtime_ns = os.stat(copied).st_mtime_ns
+    roots = [str(tmp_path / 'archive'), str(tmp_path / 'copies')]
+
+    lines = scan(outdir, roots)
+    assert sum(line.startswith('Duplicate UUID: ' + copied) for line in lines) == 1
+    assert not any(line.startswith('UUID conflict') for line in lines)
+    [copied_copy] = glob.glob(os.path.join(copied, 'DAW-REPO.Song.*.json'))
+    assert os.path.basename(copied_copy) != os.path.basename(original_copy)
+    assert os.stat(copied).st_mtime_ns == mtime_ns
+
+    lines = scan(outdir, roots)
+    assert not any(line.startswith(('Duplicate UUID', 'UUID conflict')) for line in lines)
+#end
@@ -0,0 +1,120 @@
+"""
+Summary:
+Project thumbnail detection and cached, downscaled thumbnail previews.
+Instead of sniffing every file of the project root (and so opening every large audio and
+video file next to the project file), only files with an image extension, or an
+extension-less name that says it is a thumbnail/cover, are candidates. Candidates are
+confirmed by their magic bytes (PNG, JPEG, GIF, WebP, BMP) with one SNIFF_BYTES read,
+thumbnail-named candidates first, and the search stops at the first confirmed image.
+
+Previews of large images are made with Pillow, an optional dependency imported only when
+a preview is requested. The preview file gets the mtime of its source image; a preview with
+that mtime whose longer side is the requested size (read from its header) is up to date.
+
+License: MIT License
+"""
+
+import os
+
+from get_file_lists_by_type_module import image_extensions
+
+## =-------------------------------------------------------------------=##
+
+SNIFF_BYTES = 16
+# Names of extension-less files that are worth sniffing
+CANDIDATE_NAME_KEYWORDS = ('thumbnail', 'cover', 'artwork')
+PREVIEW_SUFFIX = "thumbnail.jpg"
+PREVIEW_QUALITY = 85
+
+
+def sniff_image_header(header):
+    # Image type from the first bytes of a file, or None.
+    if header.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    #end
+    if header.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    #end
+    if header[:6] in (b'GIF87a', b'GIF89a'):
+        return 'gif'
+    #end
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    #end
+    if header[:2] == b'BM' and len(header) >= 14:
+        return 'bmp'
+    #end
+    return None
+#end
+
+
+def sniff_image_file(filename):
+    # Image type of a file from one small read, or None (also when it cannot be read).
+    try:
+        with open(filename, 'rb') as f:
+            return sniff_image_header(f.read(SNIFF_BYTES))
+        #end
+    except OSError:
+        return None
+    #end
+#end
+
+
+def is_image_candidate(filename):
+    # Whether a file name is worth sniffing: an image extension, or no extension and a thumbnail-like name.
+    stem, ext = os.path.splitext(filename)
+    if ext:
+        return ext.lower() in image_extensions
+    #end
+    return any(keyword in stem.lower() for keyword in CANDIDATE_NAME_KEYWORDS)
+#end
+
+
+def find_thumbnail(directory, filenames):
+    # The first confirmed image among filenames, preferring names containing "thumbnail"; "" if none.
+    candidates = [f for f in filenames if is_image_candidate(f)]
+    thumbnail_first = [f for f in candidates if "thumbnail" in f.lower()] + \
+                      [f for f in candidates if "thumbnail" not in f.lower()]
+    for filename in thumbnail_first:
+        if sniff_image_file(os.path.join(directory, filename)) is not None:
+            return filename
+        #end
+    #end
+    return ""
+#end
+
+
+def update_thumbnail_preview(image_filename, preview_filename, max_size):
+    # Write a JPEG preview of at most max_size pixels per side for an image larger than that.
+    # Returns "created", "unchanged" (preview already made from this version of the image at this
+    # size) or "small" (the image itself is small enough; no preview is written).
+    from PIL import Image
+    st = os.stat(image_filename)
+    try:
+        if os.stat(preview_filename).st_mtime_ns == st.st_mtime_ns:
+            # Opening only reads the header; a preview made for another max_size is remade
+            with Image.open(preview_filename) as preview:
+                if max(preview.size) == max_size:
+                    return "unchanged"
+                #end
+            #end
+        #end
+    except OSError:
+        pass
+    #end
+    with Image.open(image_filename) as image:
+        if max(image.size) <= max_size:
+            return "small"
+        #end
+        # JPEG images are decoded directly at a reduced scale
+        image.draft('RGB', (max_size, max_size))
+        image.thumbnail((max_size, max_size))
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        #end
+        image.save(preview_filename + ".tmp", format='JPEG', quality=PREVIEW_QUALITY)
+    #end
+    os.replace(preview_filename + ".tmp", preview_filename)
+    os.utime(preview_filename, ns=(st.st_atime_ns, st.st_mtime_ns))
+    return "created"
+#end
@@ -0,0 +1,111 @@
+"""
+Summary:
+Persistent registry of project UUIDs, kept in the output directory.
+It maps the absolute path of every project directory to its UUID, together with the
+directory's (st_dev, st_ino), so a project that was renamed or moved within its file system
+keeps its UUID. The registry is loaded once per run and answers from in-memory indexes;
+the project directory is only searched for a JSON copy (the previous way of recovering a
+UUID) for projects it does not know yet.
+
+A UUID found that way which already belongs to another existing project means the project
+folder was copied, JSON copy included: the copy gets a new UUID, so the two projects do not
+overwrite each other's database file, and the duplicate is reported. The inherited JSON copy
+is then removed from the copied folder (by make_json_dtb_file.py), so it is reported only once.
+
+License: MIT License
+"""
+
+import os
+import json
+import uuid
+
+## =-------------------------------------------------------------------=##
+
+UUID_REGISTRY_FILENAME = "uuid_registry.json"
+
+
+class UuidRegistry:
+
+    def __init__(self, outdir):
+        self.filename = os.path.join(outdir, UUID_REGISTRY_FILENAME)
+        self.projects = {}
+        if os.path.isfile(self.filename):
+            with open(self.filename, 'r') as f:
+                self.projects = json.load(f)["projects"]
+            #end
+        #end
+        self._by_inode = {(entry["dev"], entry["ino"]): path for path, entry in self.projects.items()}
+        self._by_uuid = {}
+        for path, entry in self.projects.items():
+            self._by_uuid.setdefault(entry["uuid"], set()).add(path)
+        #end
+        # (project, reused UUID, project it belongs to, new UUID) of every duplicate found in this run
+        self.duplicates = []
+    #end
+
+    def _record(self, path, project_uuid, st):
+        old = self.projects.get(path)
+        if old is not None:
+            self._by_uuid[old["uuid"]].discard(path)
+        #end
+        self.projects[path] = {"uuid": project_uuid, "dev": st.st_dev, "ino": st.st_ino}
+        self._by_inode[(st.st_dev, st.st_ino)] = path
+        self._by_uuid.setdefault(project_uuid, set()).add(path)
+    #end
+
+    def _forget(self, path):
+        entry = self.projects.pop(path)
+        self._by_uuid[entry["uuid"]].discard(path)
+        if self._by_inode.get((entry["dev"], entry["ino"])) == path:
+            del self._by_inode[(entry["dev"], entry["ino"])]
+        #end
+    #end
+
+    def assign(self, prjPath, find_existing=None):
+        # The UUID of a project directory, recorded at once: the one registered for its path,
+        # else for its (st_dev, st_ino) when that registered path is gone (renamed or moved),
+        # else the one returned by find_existing() (the JSON copy in the directory), else a new one.
+        path = os.path.abspath(prjPath)
+        st = os.stat(path)
+        entry = self.projects.get(path)
+        if entry is not None:
+            project_uuid = entry["uuid"]
+        else:
+            project_uuid = None
+            moved_from = self._by_inode.get((st.st_dev, st.st_ino))
+            if moved_from is not None and not os.path.isdir(moved_from):
+                project_uuid = self.projects[moved_from]["uuid"]
+                self._forget(moved_from)
+            #end
+            if project_uuid is None and find_existing is not None:
+                project_uuid = find_existing()
+                # Registered projects that no longer exist do not keep their UUID
+                owners = [owner for owner in self._by_uuid.get(project_uuid, ()) if os.path.isdir(owner)]
+                for owner in list(self._by_uuid.get(project_uuid, ())):
+                    if owner not in owners:
+                        self._forget(owner)
+                    #end
+                #end
+                if owners:
+                    new_uuid = str(uuid.uuid4())
+                    self.duplicates.append((path, project_uuid, owners[0], new_uuid))
+                    project_uuid = new_uuid
+                #end
+            #end
+            if project_uuid is None:
+                project_uuid = str(uuid.uuid4())
+            #end
+        #end
+        self._record(path, project_uuid, st)
+        return project_uuid
+    #end
+
+    def save(self):
+        # Write the registry atomically so an interrupted run never leaves a broken file.
+        with open(self.filename + ".tmp", 'w') as f:
+            json.dump({"version": 1, "projects": self.projects}, f, indent=4)
+            f.write("\n")
+        #end
+        os.replace(self.filename + ".tmp", self.filename)
+    #end
+#end
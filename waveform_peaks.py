@@ -0,0 +1,201 @@
+"""
+Summary:
+Precomputed waveform peaks of the stereo mixdown, for drawing waveform previews without
+decoding the audio. For uncompressed WAV/RF64 and AIFF/AIFC files, the min/max of every
+block of samples is computed per channel at several zoom levels and saved in a compact
+binary '.peaks' file next to the project JSON.
+
+The sample data is memory-mapped and reduced with NumPy in chunks of frames, each copied
+to a planar (channels, frames) array first; there is no Python loop per sample. Integer
+samples are viewed through a strided int16 array over their most significant 16 bits,
+so 24- and 32-bit files are reduced without a conversion pass.
+The first zoom level is computed from the samples, every further level from the level
+before it. NumPy is an optional dependency: it is only imported when peaks are computed.
+
+Peaks file layout (little-endian):
+    header  '<8sHHHHIQqQ'  magic b'DAWPEAKS', version, channels, level count, reserved,
+                           sample rate, frame count, source mtime_ns, source size
+    levels  '<II' each     samples per peak, peak count
+    data    int16          per level: peak count x channels x (min, max)
+
+License: MIT License
+"""
+
+import os
+import time
+import struct
+
+from audio_probe import read_pcm_layout, AudioProbeError
+
+## =-------------------------------------------------------------------=##
+
+PEAKS_MAGIC = b'DAWPEAKS'
+PEAKS_VERSION = 1
+PEAKS_EXTENSION = "peaks"
+DEFAULT_SAMPLES_PER_PEAK = 256
+DEFAULT_ZOOM_FACTOR = 4
+DEFAULT_LEVELS = 4
+
+_HEADER = struct.Struct('<8sHHHHIQqQ')
+_LEVEL = struct.Struct('<II')
+# Frames reduced per NumPy call; a multiple of every samples-per-peak value in use
+_CHUNK_FRAMES = 1 << 20
+
+
+def _sample_view(np, raw, layout):
+    # A (frames, channels) array over the mapped sample data, without copying it.
+    channels = layout["channels"]
+    width = layout["bit_depth"] // 8
+    order = layout["byte_order"]
+    offset = layout["data_offset"]
+    frames = layout["data_size"] // (width * channels)
+    if layout["sample_format"] == 'float':
+        dtype = f'{order}f{width}'
+    elif width == 1:
+        dtype = 'u1' if layout["sample_format"] == 'uint' else 'i1'
+    else:
+        # The most significant 16 bits of each sample: the last two bytes when little-endian
+        dtype = f'{order}i2'
+        if order == '<':
+            offset += width - 2
+        #end
+    #end
+    return np.ndarray((frames, channels), dtype=dtype, buffer=raw, offset=offset,
+                      strides=(width * channels, width))
+#end
+
+
+def _to_int16(np, values, sample_format):
+    # Scale reduced min/max values of the sample view to the int16 range.
+    if sample_format == 'float':
+        return np.clip(np.round(values * 32767.0), -32768, 32767).astype(np.int16)
+    #end
+    if values.dtype.itemsize == 1:
+        values = values.astype(np.int16)
+        return (values - 128 if sample_format == 'uint' else values) << 8
+    #end
+    return values.astype(np.int16)
+#end
+
+
+def compute_peaks(filename, samples_per_peak=DEFAULT_SAMPLES_PER_PEAK, levels=DEFAULT_LEVELS,
+                  zoom_factor=DEFAULT_ZOOM_FACTOR):
+    # Return (layout, frame count, [(samples per peak, int16 array of shape (peaks, channels, 2))]).
+    import numpy as np
+    layout = read_pcm_layout(filename)
+    channels = layout["channels"]
+    frame_bytes = layout["bit_depth"] // 8 * channels
+    frames = layout["data_size"] // frame_bytes
+    if frames == 0:
+        empty = np.zeros((0, channels, 2), dtype=np.int16)
+        return layout, 0, [(samples_per_peak * zoom_factor ** i, empty) for i in range(levels)]
+    #end
+
+    raw = np.memmap(filename, dtype=np.uint8, mode='r')
+    view = _sample_view(np, raw, layout)
+    n_peaks = -(-frames // samples_per_peak)
+    mins = np.empty((n_peaks, channels), dtype=view.dtype)
+    maxs = np.empty((n_peaks, channels), dtype=view.dtype)
+    chunk_frames = max(samples_per_peak, _CHUNK_FRAMES // samples_per_peak * samples_per_peak)
+    for start in range(0, frames, chunk_frames):
+        # One planar (channels, frames) copy per chunk: reducing along the contiguous last
+        # axis is many times faster than reducing the interleaved frames in place
+        planar = np.ascontiguousarray(view[start:start + chunk_frames].T)
+        full = planar.shape[1] // samples_per_peak * samples_per_peak
+        first = start // samples_per_peak
+        if full:
+            blocks = planar[:, :full].reshape(channels, -1, samples_per_peak)
+            mins[first:first + blocks.shape[1]] = blocks.min(axis=2).T
+            maxs[first:first + blocks.shape[1]] = blocks.max(axis=2).T
+        #end
+        if full < planar.shape[1]:
+            # trailing partial block at the end of the data
+            mins[-1] = planar[:, full:].min(axis=1)
+            maxs[-1] = planar[:, full:].max(axis=1)
+        #end
+    #end
+    del view, raw
+
+    peaks = [(samples_per_peak, np.stack([_to_int16(np, mins, layout["sample_format"]),
+                                          _to_int16(np, maxs, layout["sample_format"])], axis=-1))]
+    for _ in range(1, levels):
+        # Each coarser level combines zoom_factor peaks of the level before it
+        previous_spp, previous = peaks[-1]
+        starts = np.arange(0, len(previous), zoom_factor)
+        level = np.stack([np.minimum.reduceat(previous[:, :, 0], starts, axis=0),
+                          np.maximum.reduceat(previous[:, :, 1], starts, axis=0)], axis=-1)
+        peaks.append((previous_spp * zoom_factor, level))
+    #end
+    return layout, frames, peaks
+#end
+
+
+def write_peaks_file(peaks_filename, source_stat, layout, frames, peaks):
+    # Write the peaks file atomically (temporary file and rename).
+    with open(peaks_filename + ".tmp", 'wb') as f:
+        f.write(_HEADER.pack(PEAKS_MAGIC, PEAKS_VERSION, layout["channels"], len(peaks), 0,
+                             layout["sample_rate"], frames, source_stat.st_mtime_ns, source_stat.st_size))
+        for samples_per_peak, level in peaks:
+            f.write(_LEVEL.pack(samples_per_peak, len(level)))
+        #end
+        for _, level in peaks:
+            f.write(level.astype('<i2').tobytes())
+        #end
+    #end
+    os.replace(peaks_filename + ".tmp", peaks_filename)
+#end
+
+
+def read_peaks_header(peaks_filename):
+    # Header fields and level table of a peaks file; None if it is missing or not a peaks file.
+    try:
+        with open(peaks_filename, 'rb') as f:
+            raw = f.read(_HEADER.size)
+            if len(raw) < _HEADER.size:
+                return None
+            #end
+            magic, version, channels, n_levels, _, sample_rate, frames, mtime_ns, size = _HEADER.unpack(raw)
+            if magic != PEAKS_MAGIC:
+                return None
+            #end
+            table = f.read(_LEVEL.size * n_levels)
+        #end
+    except OSError:
+        return None
+    #end
+    if len(table) < _LEVEL.size * n_levels:
+        return None
+    #end
+    return {
+        "version": version,
+        "channels": channels,
+        "sample_rate": sample_rate,
+        "frames": frames,
+        "source_mtime_ns": mtime_ns,
+        "source_size": size,
+        "levels": [_LEVEL.unpack_from(table, i * _LEVEL.size) for i in range(n_levels)],
+    }
+#end
+
+
+def update_peaks_file(audio_filename, peaks_filename, samples_per_peak=DEFAULT_SAMPLES_PER_PEAK,
+                      levels=DEFAULT_LEVELS, zoom_factor=DEFAULT_ZOOM_FACTOR):
+    # (Re)compute the peaks of audio_filename unless peaks_filename was made from the same
+    # mtime and size with the same zoom levels. Returns the status ("computed", "unchanged" or
+    # "unsupported" for compressed and non-WAV/AIFF audio), the sample data bytes and the seconds.
+    st = os.stat(audio_filename)
+    header = read_peaks_header(peaks_filename)
+    if header is not None and header["version"] == PEAKS_VERSION \
+            and (header["source_mtime_ns"], header["source_size"]) == (st.st_mtime_ns, st.st_size) \
+            and [spp for spp, _ in header["levels"]] == [samples_per_peak * zoom_factor ** i for i in range(levels)]:
+        return {"status": "unchanged", "bytes": 0, "seconds": 0.0}
+    #end
+    start = time.perf_counter()
+    try:
+        layout, frames, peaks = compute_peaks(audio_filename, samples_per_peak, levels, zoom_factor)
+    except AudioProbeError as err:
+        return {"status": "unsupported", "bytes": 0, "seconds": 0.0, "notes": str(err)}
+    #end
+    write_peaks_file(peaks_filename, st, layout, frames, peaks)
+    return {"status": "computed", "bytes": layout["data_size"], "seconds": time.perf_counter() - start}
+#end